@@ -1,11 +1,32 @@
 # API接口模块
 # 提供与前端交互的API接口
 
-from flask import Blueprint, jsonify
-
-from logger import get_logger
+import json
+import sys
+import time
+
+from flask import Blueprint, Response, g, jsonify, request
+
+from cache import (jc_fid_map_cache, jc_fid_map_flight, match_details_flight,
+                   page_cache, page_flight, serialized_cache)
+from cassette import cassette
+from fanout import batch_executor, iter_parallel, run_parallel
+from limiter import upstream_limiter
+from compression import response_encoder
+from config import (LIVE_STREAM_ENABLED, LIVE_STREAM_HEARTBEAT,
+                    LIVE_STREAM_MAX_WATCH, ODDS_BATCH_MAX_IDS,
+                    ODDS_BATCH_MAX_IN_FLIGHT, POISSON_MAX_LAMBDA,
+                    STREAM_CHUNK_SIZE)
+from live_feed import live_feed
+from live_stream import compact_scores, format_event, hub, odds_watcher
+from logger import get_logger, queue_handler
+from metrics import http_request_seconds, registry
+from odds_store import ODDS_KINDS, odds_recorder, odds_store
+from pool import session_pools
+from prefetch import prefetcher
 from scraper import MatchScraper, OddsScraper
 from static.scraper_extensions import StandingsScraper
+from warm_state import warm_state
 
 # 创建日志记录器
 logger = get_logger("api")
@@ -14,31 +35,321 @@ logger = get_logger("api")
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
 
+@api_bp.before_request
+def _start_request_timer():
+    g.request_started_at = time.perf_counter()
+
+
+@api_bp.after_request
+def _record_request_metrics(response):
+    """
+    按接口路由规则记录耗时，路由规则不包含比赛ID，标签基数固定
+    """
+    started_at = g.pop("request_started_at", None)
+    if started_at is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        http_request_seconds.observe(
+            time.perf_counter() - started_at,
+            endpoint=endpoint,
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+
+@api_bp.after_request
+def _encode_response(response):
+    """
+    设置ETag、处理条件请求并压缩JSON响应
+
+    after_request按注册的相反顺序执行，压缩在记录耗时之前完成，耗时包含压缩时间
+    """
+    return response_encoder.process(request, response)
+
+
+def _poisson_stats():
+    """
+    泊松模型的缓存统计；模型模块依赖NumPy，第一次请求时才导入，之前返回空统计
+    """
+    poisson = sys.modules.get("poisson")
+    if poisson is None:
+        return {"hits": 0, "misses": 0, "size": 0, "period_hits": 0, "period_misses": 0}
+    return poisson.cache_stats()
+
+
+def _collect_stats_metrics():
+    """
+    把缓存、请求合并、限流和会话池的统计转换为指标，输出时才计算
+    """
+    caches = {"page": page_cache.stats(), "jc_fid_map": jc_fid_map_cache.stats()}
+    for cache_name, stats in caches.items():
+        labels = {"cache": cache_name}
+        yield "cache_hits_total", "缓存命中次数", "counter", labels, stats["hits"]
+        yield "cache_misses_total", "缓存未命中次数", "counter", labels, stats["misses"]
+        yield "cache_hit_ratio", "缓存命中率", "gauge", labels, stats["hit_ratio"]
+        yield "cache_evictions_total", "缓存淘汰次数", "counter", labels, stats["evictions"]
+        yield "cache_entries", "缓存条目数", "gauge", labels, stats["size"]
+
+    page_stats = caches["page"]
+    parses = page_stats["parse_hits"] + page_stats["parse_misses"]
+    yield "page_parse_hits_total", "复用已解析文档树的次数", "counter", {}, page_stats["parse_hits"]
+    yield "page_parse_misses_total", "重新解析页面的次数", "counter", {}, page_stats["parse_misses"]
+    yield "page_parse_hit_ratio", "文档树复用率", "gauge", {}, round(page_stats["parse_hits"] / parses, 4) if parses else 0.0
+    yield "page_revalidated_total", "上游返回304续期的次数", "counter", {}, page_stats["revalidated"]
+    yield "page_unchanged_total", "内容摘要未变化而沿用旧页面的次数", "counter", {}, page_stats["unchanged"]
+
+    flights = {"page": page_flight, "match_details": match_details_flight, "jc_fid_map": jc_fid_map_flight}
+    for flight_name, flight in flights.items():
+        stats = flight.stats()
+        labels = {"flight": flight_name}
+        yield "single_flight_executions_total", "合并调用中实际执行的次数", "counter", labels, stats["executions"]
+        yield "single_flight_shared_total", "共享其他调用结果的次数", "counter", labels, stats["shared"]
+
+    for host, stats in upstream_limiter.stats().items():
+        labels = {"host": host}
+        yield "upstream_in_flight", "上游主机当前并发请求数", "gauge", labels, stats["in_flight"]
+        yield "upstream_waiting", "等待并发名额的请求数", "gauge", labels, stats["waiting"]
+        yield "upstream_throttled_total", "被令牌桶限速的请求次数", "counter", labels, stats["throttled"]
+
+    for host, stats in session_pools.stats().items():
+        labels = {"host": host}
+        yield "session_pool_sessions", "会话池中的会话数", "gauge", labels, stats["sessions"]
+        yield "session_pool_connections", "会话池建立的连接数", "gauge", labels, stats["connections"]
+        yield "session_pool_connection_reuse_ratio", "连接复用率", "gauge", labels, stats["connection_reuse_ratio"]
+
+    feed_stats = live_feed.stats()
+    yield "live_feed_version", "直播比分快照的版本号", "gauge", {}, feed_stats["version"]
+    yield "live_feed_matches", "直播比分快照中的比赛数", "gauge", {}, feed_stats["matches"]
+    yield "live_feed_polls_total", "直播比赛列表的轮询次数", "counter", {}, feed_stats["polls"]
+    yield "live_feed_poll_errors_total", "直播比赛列表轮询失败的次数", "counter", {}, feed_stats["poll_errors"]
+
+    hub_stats = hub.stats()
+    yield "live_stream_subscribers", "当前SSE连接数", "gauge", {}, hub_stats["subscribers"]
+    yield "live_stream_watched_matches", "SSE连接关注的比赛数", "gauge", {}, hub_stats["watched_matches"]
+    yield "live_stream_events_total", "发布的SSE事件数", "counter", {}, hub_stats["published"]
+    yield "live_stream_rejected_total", "连接数已满被拒绝的SSE连接数", "counter", {}, hub_stats["rejected"]
+    yield "live_stream_watch_rejected_total", "关注比赛总数达到上限而忽略的关注数", "counter", {}, hub_stats["watch_rejected"]
+    yield "live_stream_resyncs_total", "慢客户端落后过多需要重新同步的次数", "counter", {}, hub_stats["resyncs"]
+
+    prefetch_stats = prefetcher.stats()
+    yield "prefetch_pending", "等待预取的比赛数", "gauge", {}, prefetch_stats["pending"]
+    yield "prefetch_warmed_total", "完成预取的比赛数", "counter", {}, prefetch_stats["warmed"]
+    yield "prefetch_fetches_total", "预取执行的抓取次数", "counter", {}, prefetch_stats["fetched"]
+    yield "prefetch_yields_total", "上游繁忙时预取让出的次数", "counter", {}, prefetch_stats["yields"]
+
+    odds_stats = odds_recorder.stats()
+    yield "odds_history_written_total", "写入的赔率快照行数", "counter", {}, odds_stats["snapshots_written"]
+    yield "odds_history_skipped_total", "赔率未变化而跳过的快照数", "counter", {}, odds_stats["snapshots_skipped"]
+    yield "odds_history_rounds_total", "定时记录赔率的轮数", "counter", {}, odds_stats["rounds"]
+
+    serialized_stats = serialized_cache.stats()
+    yield "json_serialized_hits_total", "复用预先序列化字节的响应数", "counter", {}, serialized_stats["hits"]
+    yield "json_serialized_misses_total", "登记的缓存结果第一次序列化的次数", "counter", {}, serialized_stats["misses"]
+
+    encoder_stats = response_encoder.stats()
+    yield "http_not_modified_total", "ETag匹配返回304的响应数", "counter", {}, encoder_stats["not_modified"]
+    yield "http_compressed_total", "压缩的响应数", "counter", {}, encoder_stats["compressed"]
+    yield "http_compressed_bytes_in_total", "压缩前的响应字节数", "counter", {}, encoder_stats["bytes_in"]
+    yield "http_compressed_bytes_out_total", "压缩后的响应字节数", "counter", {}, encoder_stats["bytes_out"]
+
+    poisson_stats = _poisson_stats()
+    yield "poisson_cache_hits_total", "泊松模型缓存命中次数", "counter", {}, poisson_stats["hits"]
+    yield "poisson_cache_misses_total", "泊松模型缓存未命中次数", "counter", {}, poisson_stats["misses"]
+
+    # 日志队列满时丢弃的日志数，未启用日志队列时为0
+    dropped = queue_handler.dropped if queue_handler is not None else 0
+    yield "log_dropped_total", "日志队列已满而丢弃的日志数", "counter", {}, dropped
+
+    warm_stats = warm_state.stats()
+    yield "warm_state_saves_total", "保存启动快照的次数", "counter", {}, warm_stats["saves"]
+    yield "warm_state_save_errors_total", "保存启动快照失败的次数", "counter", {}, warm_stats["save_errors"]
+    yield "warm_state_restored_pages", "启动时从快照恢复的页面数", "gauge", {}, warm_stats["restored_pages"]
+
+
+registry.register_collector(_collect_stats_metrics)
+
+
+def buffered_chunks(chunks, size=STREAM_CHUNK_SIZE):
+    """
+    把流式响应的小片段合并到size个字符后再输出，减少逐个片段写入套接字的次数
+    """
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+# 聚合接口支持的数据部分：名称 -> (抓取函数, 参数类型)
+# 参数类型为match时传入比赛ID，为sid时传入赛事ID
+BUNDLE_SECTIONS = {
+    "name": (OddsScraper.fetch_match_name, "match"),
+    "average": (OddsScraper.fetch_average_data, "match"),
+    "head_to_head": (OddsScraper.fetch_head_to_head_data, "match"),
+    "recent_records": (OddsScraper.fetch_recent_records, "match"),
+    "home_away_records": (OddsScraper.fetch_home_away_records, "match"),
+    "oupei": (OddsScraper.fetch_oupei_data, "match"),
+    "yapan": (OddsScraper.fetch_yapan_data, "match"),
+    "daxiao": (OddsScraper.fetch_daxiao_data, "match"),
+    "odds_stats": (OddsScraper.fetch_all_odds_stats, "match"),
+    "match_process": (OddsScraper.fetch_match_process, "match"),
+    "players": (OddsScraper.fetch_players, "match"),
+    "tech_stats": (OddsScraper.fetch_tech_stats, "match"),
+    "standings": (StandingsScraper.fetch_standings_data, "sid"),
+    "league_average": (StandingsScraper.fetch_league_average_data, "sid"),
+}
+
+
+def _all_odds_tasks(match_id):
+    """
+    一场比赛所有赔率数据的抓取任务，四个页面相互独立，可以并发抓取
+    """
+    return {
+        "name": (OddsScraper.fetch_match_name, match_id),
+        "oupei": (OddsScraper.fetch_oupei_data, match_id),
+        "yapan": (OddsScraper.fetch_yapan_data, match_id),
+        "daxiao": (OddsScraper.fetch_daxiao_data, match_id),
+    }
+
+
+def _all_odds_async_tasks(scraper):
+    """
+    _all_odds_tasks的异步版本，由异步抓取引擎执行，等待上游时不占用线程
+    """
+    def make_tasks(match_id):
+        return {
+            "name": (scraper.fetch_match_name, match_id),
+            "oupei": (scraper.fetch_oupei_data, match_id),
+            "yapan": (scraper.fetch_yapan_data, match_id),
+            "daxiao": (scraper.fetch_daxiao_data, match_id),
+        }
+    return make_tasks
+
+
+def _all_odds_result(match_id, results, errors):
+    return {
+        "id": match_id,
+        "name": results["name"],
+        "oupei": results["oupei"],
+        "yapan": results["yapan"],
+        "daxiao": results["daxiao"],
+        "errors": errors,
+    }
+
+
+@api_bp.route("/matches")
+def api_get_matches():
+    """
+    API接口：获取比赛列表，以JSON数组流式返回
+
+    查询参数:
+        date: 日期，格式为YYYY-MM-DD，不传则获取直播比赛
+
+    比赛列表页面下载后边解析边输出，长的历史比赛页面在整个表格解析完之前就开始返回数据；
+    下载或解析失败时返回已解析的部分（可能为空数组）
+    """
+    date = request.args.get("date")
+
+    def generate():
+        yield "["
+        for idx, match in enumerate(MatchScraper.iter_live_matches(date)):
+            yield ("," if idx else "") + json.dumps(match, ensure_ascii=False, separators=(",", ":"))
+        yield "]"
+
+    return Response(buffered_chunks(generate()), mimetype="application/json")
+
+
 @api_bp.route("/odds/<match_id>")
 def api_get_all_odds(match_id):
     """
     API接口：获取所有赔率数据
     """
     try:
-        match_name = OddsScraper.fetch_match_name(match_id)
-        oupei_data = OddsScraper.fetch_oupei_data(match_id)
-        yapan_data = OddsScraper.fetch_yapan_data(match_id)
-        daxiao_data = OddsScraper.fetch_daxiao_data(match_id)
-
-        return jsonify(
-            {
-                "id": match_id,
-                "name": match_name,
-                "oupei": oupei_data,
-                "yapan": yapan_data,
-                "daxiao": daxiao_data,
-            }
-        )
+        # 四个页面并发抓取，耗时接近最慢的单个页面
+        results, errors = run_parallel(_all_odds_tasks(match_id))
+        return jsonify(_all_odds_result(match_id, results, errors))
     except Exception as e:
         logger.error(f"获取所有赔率数据失败: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+def _batch_ids():
+    """
+    从查询参数ids或POST请求体中读取比赛ID，去掉重复的ID
+
+    请求体可以是JSON（列表或{"ids": [...]}），也可以是以逗号或换行分隔的文本
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            body = body.get("ids")
+        if body is None:
+            raw = request.get_data(as_text=True).replace("\n", ",").split(",")
+        elif isinstance(body, list):
+            raw = body
+        else:
+            raise ValueError("请求体应为比赛ID列表")
+    else:
+        raw = request.args.get("ids", "").split(",")
+
+    ids = []
+    for match_id in raw:
+        match_id = str(match_id).strip()
+        if not match_id:
+            continue
+        if not match_id.isdigit():
+            raise ValueError(f"无效的比赛ID: {match_id}")
+        ids.append(match_id)
+    return list(dict.fromkeys(ids))
+
+
+@api_bp.route("/odds/batch", methods=["GET", "POST"])
+def api_get_odds_batch():
+    """
+    API接口：批量获取多场比赛的所有赔率数据，以NDJSON流式返回
+
+    查询参数:
+        ids: 逗号分隔的比赛ID；也可以用POST请求体传入
+
+    每行是一场比赛的JSON，格式与/api/odds/<match_id>相同，按完成顺序输出。
+    同时抓取的比赛数有上限，抓取使用异步抓取引擎（未安装aiohttp时使用批量专用的线程池），
+    不占用交互请求的并发名额；页面经过共享的页面缓存和请求合并，第一行的等待时间和服务端内存占用与比赛数无关
+    """
+    try:
+        ids = _batch_ids()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not ids:
+        return jsonify({"error": "缺少比赛ID"}), 400
+    if len(ids) > ODDS_BATCH_MAX_IDS:
+        return jsonify({"error": f"每次最多请求 {ODDS_BATCH_MAX_IDS} 场比赛"}), 400
+
+    from async_scraper import async_engine
+
+    if async_engine is not None:
+        make_tasks, executor = _all_odds_async_tasks(async_engine.scraper), async_engine
+    else:
+        make_tasks, executor = _all_odds_tasks, batch_executor
+
+    def generate():
+        matches = iter_parallel(ids, make_tasks, ODDS_BATCH_MAX_IN_FLIGHT, executor=executor)
+        for match_id, results, errors in matches:
+            line = _all_odds_result(match_id, results, errors)
+            yield json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    return Response(
+        generate(),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_bp.route("/odds/oupei/<match_id>")
 def api_get_oupei(match_id):
     """
@@ -90,6 +401,92 @@ def api_get_average_data(match_id):
         logger.error(f"获取平均数据失败: {e}")
         return jsonify({"error": str(e)}), 500
 
+
+@api_bp.route("/odds/stats/<match_id>")
+def api_get_odds_stats(match_id):
+    """
+    API接口：获取赔率统计数据，包括各公司的数值赔率、平均值、最大值、最小值、标准差、
+    隐含概率、抽水率、返还率和凯利指数
+
+    查询参数:
+        kind: oupei、yapan或daxiao，不传返回全部三类
+    """
+    try:
+        kind = request.args.get("kind")
+        if kind is None:
+            return jsonify(OddsScraper.fetch_all_odds_stats(match_id))
+        if kind not in ODDS_KINDS:
+            return jsonify({"error": f"未知的赔率类型: {kind}"}), 400
+        return jsonify(OddsScraper.fetch_odds_stats(match_id, kind))
+    except Exception as e:
+        logger.error(f"获取赔率统计数据失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route("/odds/history/<match_id>")
+def api_get_odds_history(match_id):
+    """
+    API接口：从赔率历史中读取各公司即时赔率的变化，不访问上游
+
+    查询参数:
+        kind: oupei、yapan或daxiao，默认oupei
+        company: 公司名称，不传返回所有公司
+        since, until: 时间范围（Unix时间戳，秒），不传表示不限
+    """
+    try:
+        if not odds_store.enabled:
+            return jsonify({"error": "赔率历史未启用，请设置ODDS_STORE_PATH"}), 503
+        kind = request.args.get("kind", "oupei")
+        if kind not in ODDS_KINDS:
+            return jsonify({"error": f"未知的赔率类型: {kind}"}), 400
+        try:
+            match_id_int = int(match_id)
+            since = request.args.get("since", type=int)
+            until = request.args.get("until", type=int)
+        except ValueError:
+            return jsonify({"error": "无效的比赛ID"}), 400
+
+        history = odds_store.history(match_id_int, kind, request.args.get("company"), since, until)
+        return jsonify({"id": match_id, "kind": kind, "companies": history})
+    except Exception as e:
+        logger.error(f"获取赔率历史失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route("/poisson")
+def api_get_poisson():
+    """
+    API接口：根据预期进球计算泊松比分模型，包括胜平负、常见比分、进球数分布、大小球和半全场概率
+
+    查询参数:
+        home, away: 主客队全场预期进球
+        home_half, away_half: 主客队半场预期进球，同时传入时返回半场和半全场概率
+    """
+    try:
+        try:
+            lambdas = {
+                name: float(request.args[name]) if request.args.get(name) else None
+                for name in ("home", "away", "home_half", "away_half")
+            }
+        except ValueError:
+            return jsonify({"error": "无效的预期进球"}), 400
+        if lambdas["home"] is None or lambdas["away"] is None:
+            return jsonify({"error": "缺少参数home或away"}), 400
+        for name, value in lambdas.items():
+            # value != value用于排除NaN
+            if value is not None and (value != value or not 0 <= value <= POISSON_MAX_LAMBDA):
+                return jsonify({"error": f"参数{name}应在0到{POISSON_MAX_LAMBDA}之间"}), 400
+
+        from poisson import scoreline_model
+
+        return jsonify(
+            scoreline_model(lambdas["home"], lambdas["away"], lambdas["home_half"], lambdas["away_half"])
+        )
+    except Exception as e:
+        logger.error(f"计算泊松比分模型失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 @api_bp.route("/odds/head-to-head/<match_id>")
 def api_get_head_to_head_data(match_id):
     """
@@ -207,3 +604,212 @@ def api_get_match_details(fid):
     except Exception as e:
         logger.error(f"获取比赛详情失败: {e}")
         return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route("/match/<match_id>/bundle")
+def api_get_match_bundle(match_id):
+    """
+    API接口：一次返回比赛弹窗需要的所有数据
+
+    查询参数:
+        sections: 逗号分隔的数据部分名称，不传则返回全部
+        sid: 赛事ID，standings和league_average需要
+
+    各部分并发抓取，依赖同一上游页面的部分（如shuju页的平均数据、交战历史、
+    近期战绩）通过页面缓存和请求合并共享一次下载和一次解析
+    """
+    try:
+        sid = request.args.get("sid", "")
+        sections_arg = request.args.get("sections", "")
+        if sections_arg:
+            sections = [name.strip() for name in sections_arg.split(",") if name.strip()]
+            unknown = [name for name in sections if name not in BUNDLE_SECTIONS]
+            if unknown:
+                return jsonify({"error": f"未知的数据部分: {', '.join(unknown)}"}), 400
+        else:
+            sections = list(BUNDLE_SECTIONS)
+
+        tasks = {}
+        errors = {}
+        for name in sections:
+            fetcher, arg_type = BUNDLE_SECTIONS[name]
+            if arg_type == "sid":
+                if not sid:
+                    # 未传入赛事ID时只有显式请求的部分才标记错误
+                    if sections_arg:
+                        errors[name] = "缺少sid参数"
+                    continue
+                tasks[name] = (fetcher, sid)
+            else:
+                tasks[name] = (fetcher, match_id)
+
+        results, task_errors = run_parallel(tasks)
+        errors.update(task_errors)
+
+        bundle = {"id": match_id, "sid": sid}
+        bundle.update(results)
+        bundle["errors"] = errors
+        return jsonify(bundle)
+    except Exception as e:
+        logger.error(f"获取比赛聚合数据失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route("/live/changes")
+def api_get_live_changes():
+    """
+    API接口：获取直播比赛列表的增量变化
+
+    查询参数:
+        since: 客户端上一次拿到的版本号，不传或为0时返回完整列表
+
+    返回version、full、matches和removed，full为False时matches只包含比分、状态或
+    半场比分在since之后变化过的比赛，removed为已从列表移除的比赛fid。
+    所有客户端共享同一个后台轮询，上游请求量与客户端数量无关
+    """
+    try:
+        since = request.args.get("since", "0")
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"error": f"无效的版本号: {since}"}), 400
+
+        live_feed.ensure_running()
+        if live_feed.updated_at is None:
+            # 轮询线程刚启动还没有快照时，先同步获取一次
+            live_feed.poll()
+        return jsonify(live_feed.changes(since))
+    except Exception as e:
+        logger.error(f"获取直播比分变化失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+@api_bp.route("/live/stream")
+def api_live_stream():
+    """
+    API接口：以Server-Sent Events推送比分变化和被关注比赛的即时欧赔变化
+
+    查询参数:
+        watch: 逗号分隔的比赛fid，推送这些比赛的即时欧赔变化；不在直播列表中的比赛，
+               以及所有连接关注的比赛总数达到上限后新增的比赛会被忽略
+
+    事件类型:
+        scores: 比分、状态或半场比分的变化，格式与/api/live/changes相同，比赛只包含变化字段；
+                新连接先收到一个full为True的完整快照
+        odds: 被关注比赛各公司即时欧赔的变化
+        resync: 连接落后过多，部分事件已丢弃，客户端应通过/api/live/changes重新获取完整列表
+
+    浏览器断线重连时带上Last-Event-ID，事件仍在缓冲区内时从断开的位置继续推送，否则重新推送完整快照
+
+    需要流式发送响应的WSGI服务器，LIVE_STREAM_ENABLED为0（函数计算、Vercel）时返回501
+    """
+    if not LIVE_STREAM_ENABLED:
+        return jsonify({"error": "当前部署不支持实时推送，请改用/api/live/changes轮询"}), 501
+    watch = [fid.strip() for fid in request.args.get("watch", "").split(",") if fid.strip()]
+    if len(watch) > LIVE_STREAM_MAX_WATCH:
+        return jsonify({"error": f"最多关注 {LIVE_STREAM_MAX_WATCH} 场比赛"}), 400
+    if not all(fid.isdigit() for fid in watch):
+        return jsonify({"error": "参数watch应为逗号分隔的数字比赛fid"}), 400
+
+    last_event_id = request.headers.get("Last-Event-ID")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    try:
+        live_feed.ensure_running()
+        if live_feed.updated_at is None:
+            # 轮询线程刚启动还没有快照时，先同步获取一次
+            live_feed.poll()
+    except Exception as e:
+        logger.error(f"建立实时推送连接失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    # 只关注直播列表中的比赛，任意的fid不会触发上游请求
+    watch = live_feed.known(watch)
+
+    # 先注册再生成完整快照，两者之间发布的事件最多重复推送一次，不会丢失
+    subscription = hub.subscribe(watch, last_event_id)
+    if subscription is None:
+        return jsonify({"error": "推送连接数已满，请改用/api/live/changes轮询"}), 503
+    if subscription.watch:
+        odds_watcher.ensure_running()
+    initial = None
+    if not subscription.resumed:
+        # 新连接，或Last-Event-ID无法继续（进程重启、事件已丢弃）时先推送完整快照
+        initial = format_event(subscription.cursor, "scores", compact_scores(live_feed.changes(0)))
+
+    def generate():
+        try:
+            # 断线后浏览器5秒后重连
+            yield "retry: 5000\n\n"
+            if initial:
+                yield initial
+            while True:
+                events, resync = hub.read(subscription, LIVE_STREAM_HEARTBEAT)
+                if resync:
+                    yield format_event(subscription.cursor, "resync", {"version": live_feed.version})
+                elif events:
+                    yield "".join(format_event(seq, event, payload) for seq, event, payload in events)
+                else:
+                    # 心跳：保持轮询线程运行，并让断开的连接尽快在写入时被发现
+                    live_feed.ensure_running()
+                    yield ": ping\n\n"
+        finally:
+            hub.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_bp.route("/cache-stats")
+def api_get_cache_stats():
+    """
+    API接口：获取页面缓存的命中统计和请求合并统计
+    """
+    return jsonify(
+        {
+            "page_cache": page_cache.stats(),
+            "page_flight": page_flight.stats(),
+            "match_details_flight": match_details_flight.stats(),
+            "jc_fid_map_cache": jc_fid_map_cache.stats(),
+            "jc_fid_map_flight": jc_fid_map_flight.stats(),
+            "serialized_cache": serialized_cache.stats(),
+            "cassette": cassette.stats(),
+            "live_feed": live_feed.stats(),
+            "live_stream": hub.stats(),
+            "prefetch": prefetcher.stats(),
+            "odds_history": odds_recorder.stats(),
+            "poisson": _poisson_stats(),
+            "compression": response_encoder.stats(),
+            "warm_state": warm_state.stats(),
+        }
+    )
+
+
+@api_bp.route("/limiter-stats")
+def api_get_limiter_stats():
+    """
+    API接口：获取各上游主机的并发和限流统计，包括排队等待时间和当前并发数
+    """
+    return jsonify(upstream_limiter.stats())
+
+
+@api_bp.route("/pool-stats")
+def api_get_pool_stats():
+    """
+    API接口：获取各上游主机的会话池和连接复用统计
+    """
+    return jsonify(session_pools.stats())
+
+
+@api_bp.route("/_metrics")
+def api_get_metrics():
+    """
+    API接口：以Prometheus文本格式输出各阶段耗时直方图、计数器和缓存命中率
+    """
+    return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,357 @@
+# 异步抓取模块
+# 基于asyncio和aiohttp的上游抓取引擎，与MatchScraper.make_request_with_retries的
+# 重试、退避、编码和请求头语义保持一致，等待网络和退避时不占用线程。
+# 批量赔率接口通过它抓取页面，同时进行的上游请求不再各占一个线程
+#
+# aiohttp是可选依赖，未安装时async_engine为None，调用方退回线程池抓取
+
+import asyncio
+import random
+import threading
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from cache import CachedPage, page_cache
+from cassette import cassette
+from config import (ASYNC_MAX_CONNECTIONS, ASYNC_MAX_CONNECTIONS_PER_HOST,
+                    BASE_HEADERS, BASE_URL, MAX_DELAY, MAX_RETRIES,
+                    REQUEST_TIMEOUT, USER_AGENTS)
+from limiter import upstream_limiter
+from logger import get_logger
+from metrics import (observe_upstream_request, upstream_retries,
+                     upstream_stage_seconds)
+from scraper import HEADERS, ODDS_PAGES, MatchScraper, OddsScraper
+
+# 创建日志记录器
+logger = get_logger("async_scraper")
+
+
+class AsyncScraper:
+    """
+    异步抓取器
+
+    页面通过共享的aiohttp连接池下载并写入页面缓存，之后在线程中用同步版本的解析方法解析下载的页面，
+    解析结果同样随页面缓存，因此异步版本与同步版本的返回结果完全一致
+    """
+
+    def __init__(
+        self,
+        limit=ASYNC_MAX_CONNECTIONS,
+        limit_per_host=ASYNC_MAX_CONNECTIONS_PER_HOST,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._session = None
+        self._in_flight = {}  # url -> asyncio.Task，合并同一URL的并发下载
+
+    async def _get_session(self):
+        """
+        获取或创建共享的aiohttp会话，所有请求复用同一个连接池
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=BASE_HEADERS,
+                cookies=MatchScraper._get_initial_cookies(),
+            )
+        return self._session
+
+    async def close(self):
+        """
+        关闭会话和连接池
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request_with_retries(
+        self,
+        url,
+        headers=None,
+        retries=MAX_RETRIES,
+        timeout=REQUEST_TIMEOUT,
+    ):
+        """
+        带有指数退避策略的异步请求函数，不经过页面缓存
+
+        :return: CachedPage，失败时返回None
+        """
+        # 回放模式下直接返回录制的响应，不访问网络
+        if cassette.replaying:
+            return cassette.replay(url)
+
+        session = await self._get_session()
+
+        # 构建请求头
+        final_headers = dict(BASE_HEADERS)
+        final_headers["User-Agent"] = random.choice(USER_AGENTS)
+
+        # 添加自定义请求头
+        if headers:
+            final_headers.update(headers)
+
+        last_error = ""
+        host_limiter = upstream_limiter.for_url(url)
+        host = host_limiter.host
+        queued_at = time.perf_counter()
+        # 与同步请求共享上游主机的并发名额，直到请求和所有重试结束
+        async with host_limiter.slot_async():
+            upstream_stage_seconds.observe(time.perf_counter() - queued_at, host=host, stage="limiter_wait")
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+            for attempt in range(retries):
+                try:
+                    # 指数退避策略
+                    if attempt > 0:
+                        upstream_retries.inc(host=host, reason=last_error)
+                        # 延迟时间 = 基础延迟 * 2^(尝试次数-1) + 随机抖动
+                        base_delay = 0.5 * (2 ** (attempt - 1))
+                        jitter = random.uniform(0, 0.5)
+                        delay_time = min(base_delay + jitter, MAX_DELAY)
+                        with upstream_stage_seconds.time(host=host, stage="backoff"):
+                            await asyncio.sleep(delay_time)
+                        logger.debug("第%s次重试请求: %s, 延迟: %.2f秒", attempt+1, url, delay_time)
+
+                    # 按令牌桶速率发出请求，每次重试都计入速率
+                    with upstream_stage_seconds.time(host=host, stage="rate_wait"):
+                        await host_limiter.throttle_async()
+                    network_start = time.perf_counter()
+                    async with session.get(url, headers=final_headers, timeout=client_timeout) as response:
+                        response.raise_for_status()
+                        content = await response.read()
+                        upstream_stage_seconds.observe(time.perf_counter() - network_start, host=host, stage="network")
+
+                        logger.debug("请求成功: %s, 状态码: %s", url, response.status)
+                        page = CachedPage(
+                            url,
+                            content,
+                            response.status,
+                            dict(response.headers),
+                            MatchScraper._encoding_for(url),
+                        )
+                        if cassette.recording:
+                            cassette.record(url, page.status_code, page.headers, content, page.encoding)
+                        return page
+                except aiohttp.ClientResponseError as e:
+                    last_error = "http"
+                    logger.warning("HTTP错误 (尝试%s/%s): %s, 状态码: %s, 错误: %s", attempt+1, retries, url, e.status, e)
+                    # 对于4xx错误，通常不需要重试
+                    if 400 <= e.status < 500:
+                        logger.error("HTTP客户端错误，停止重试: %s, 状态码: %s", url, e.status)
+                        return None
+                    if attempt == retries - 1:
+                        logger.error("HTTP错误达到最大重试次数: %s", url)
+                        return None
+                except aiohttp.ClientConnectionError as e:
+                    last_error = "connection"
+                    logger.warning("连接错误 (尝试%s/%s): %s, 错误: %s", attempt+1, retries, url, e)
+                    if attempt == retries - 1:
+                        logger.error("连接错误达到最大重试次数: %s", url)
+                        return None
+                except asyncio.TimeoutError as e:
+                    last_error = "timeout"
+                    logger.warning("请求超时 (尝试%s/%s): %s, 错误: %s", attempt+1, retries, url, e)
+                    if attempt == retries - 1:
+                        logger.error("请求超时达到最大重试次数: %s", url)
+                        return None
+                except aiohttp.ClientError as e:
+                    last_error = "other"
+                    logger.warning("请求异常 (尝试%s/%s): %s, 错误: %s", attempt+1, retries, url, e)
+                    if attempt == retries - 1:
+                        logger.error("请求异常达到最大重试次数: %s", url)
+                        return None
+        return None
+
+    async def _download_page(self, url, headers, retries, timeout):
+        """
+        下载页面并写入页面缓存，缓存中有过期页面时先做条件请求
+        """
+        stale, validators = page_cache.revalidation_headers(url)
+        if validators:
+            headers = {**(headers or {}), **validators}
+
+        start = time.perf_counter()
+        page = await self._request_with_retries(url, headers, retries, timeout)
+        observe_upstream_request(url, page.status_code if page is not None else None, time.perf_counter() - start)
+        if page is None:
+            return None
+
+        status_code = page.status_code
+        if status_code == 304:
+            page = None
+        return page_cache.store(url, page, MatchScraper._cache_ttl_for(url), stale, status_code)
+
+    async def fetch_page(
+        self,
+        url,
+        headers=None,
+        retries=MAX_RETRIES,
+        timeout=REQUEST_TIMEOUT,
+    ):
+        """
+        异步获取页面，与MatchScraper.fetch_page共享页面缓存
+        """
+        page = page_cache.get(url)
+        if page is not None:
+            logger.debug("页面缓存命中: %s", url)
+            return page
+
+        # 同一URL的并发未命中只下载一次
+        task = self._in_flight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._download_page(url, headers, retries, timeout))
+            self._in_flight[url] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def make_request_with_retries(
+        self,
+        url,
+        headers=None,
+        retries=MAX_RETRIES,
+        timeout=REQUEST_TIMEOUT,
+    ):
+        """
+        make_request_with_retries的异步版本，返回requests响应对象
+        """
+        page = await self.fetch_page(url, headers, retries, timeout)
+        return page.to_response() if page else None
+
+    async def _parse(self, url, parse, headers=None, failure=None):
+        """
+        异步下载页面后，在线程中解析下载的页面，解析时不再经过同步的fetch_page
+
+        :param parse: 解析函数，参数为CachedPage
+        :param failure: 下载失败时的返回值，与同步方法请求失败时一致
+        """
+        page = await self.fetch_page(url, headers)
+        if page is None:
+            return failure
+        return await asyncio.to_thread(parse, page)
+
+    @staticmethod
+    def _odds_url(kind, match_id):
+        return f'{BASE_URL["ODDS_BASE"]}{kind}-{match_id}.shtml'
+
+    async def _fetch_odds(self, kind, match_id):
+        page_name = ODDS_PAGES[kind][0]
+        return await self._parse(
+            self._odds_url(page_name, match_id),
+            lambda page: OddsScraper._parse_odds_page(kind, page),
+            {**HEADERS, "referer": self._odds_url("shuju", match_id)},
+        )
+
+    async def _fetch_shuju(self, match_id, key, parse):
+        """
+        OddsScraper._shuju_data的异步版本，解析结果使用相同的缓存key
+        """
+        url = self._odds_url("shuju", match_id)
+        return await self._parse(
+            url, lambda page: page.derived(key, lambda: parse(page, url, match_id), serialize=True)
+        )
+
+    async def fetch_match_name(self, match_id):
+        return await self._parse(
+            self._odds_url("shuju", match_id), OddsScraper._parse_match_name, failure="获取失败"
+        )
+
+    async def fetch_average_data(self, match_id):
+        return await self._fetch_shuju(match_id, "average", OddsScraper._parse_average_data)
+
+    async def fetch_head_to_head_data(self, match_id):
+        return await self._fetch_shuju(match_id, "head_to_head", OddsScraper._parse_head_to_head_data)
+
+    async def fetch_recent_records(self, match_id):
+        return await self._fetch_shuju(match_id, "recent_records", OddsScraper._parse_recent_records)
+
+    async def fetch_home_away_records(self, match_id):
+        return await self._fetch_shuju(match_id, "home_away_records", OddsScraper._parse_home_away_records)
+
+    async def fetch_oupei_data(self, match_id):
+        return await self._fetch_odds("oupei", match_id)
+
+    async def fetch_yapan_data(self, match_id):
+        return await self._fetch_odds("yapan", match_id)
+
+    async def fetch_daxiao_data(self, match_id):
+        return await self._fetch_odds("daxiao", match_id)
+
+    async def fetch_all_odds(self, match_id):
+        """
+        使用asyncio.gather并发获取比赛名称和三种赔率
+        """
+        name, oupei, yapan, daxiao = await asyncio.gather(
+            self.fetch_match_name(match_id),
+            self.fetch_oupei_data(match_id),
+            self.fetch_yapan_data(match_id),
+            self.fetch_daxiao_data(match_id),
+        )
+        return {"id": match_id, "name": name, "oupei": oupei, "yapan": yapan, "daxiao": daxiao}
+
+    async def gather(self, calls, return_exceptions=True):
+        """
+        并发执行多个抓取调用
+
+        :param calls: 字典，{名称: (异步方法名, 参数)}，例如 {"oupei": ("fetch_oupei_data", "123")}
+        :return: 字典，{名称: 结果}；return_exceptions为True时失败的调用返回异常对象
+        """
+        names = list(calls)
+        results = await asyncio.gather(
+            *(getattr(self, method)(arg) for method, arg in calls.values()),
+            return_exceptions=return_exceptions,
+        )
+        return dict(zip(names, results))
+
+
+class AsyncEngine:
+    """
+    在后台线程中运行事件循环，供同步代码（如Flask视图）提交异步抓取任务
+
+    所有任务共享一个事件循环和一个AsyncScraper连接池，
+    单个进程即可同时保持数百个上游请求而不需要数百个线程
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._scraper = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._scraper = AsyncScraper()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="async-engine", daemon=True
+                )
+                self._thread.start()
+        return self._loop
+
+    @property
+    def scraper(self):
+        self._ensure_started()
+        return self._scraper
+
+    def submit(self, fn, *args):
+        """
+        在引擎的事件循环中执行协程，接口与线程池的submit相同，可以作为fanout.iter_parallel的executor
+
+        :param fn: 协程函数，例如 async_engine.scraper.fetch_oupei_data
+        :return: concurrent.futures.Future
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(fn(*args), loop)
+
+
+# 全局异步抓取引擎，未安装aiohttp时为None
+async_engine = AsyncEngine() if aiohttp is not None else None
@@ -0,0 +1,170 @@
+# 冷启动基准测试
+# 在新的Python进程中测量函数计算/Vercel入口的冷启动：
+#   1. python -X importtime导入main的耗时（多次取中位数），并列出累计耗时最高的模块
+#   2. 导入后第一个接口请求的耗时，对比没有启动快照和从启动快照恢复两种情况
+#
+# 上游页面使用bench_parsers的离线样本，通过录制回放（SCRAPER_CASSETTE_MODE=replay）提供，不访问网络；
+# 真实部署中没有快照时首个请求还要等待上游下载，实际差距比这里测得的更大
+#
+# 用法: python -m benchmarks.bench_coldstart [--runs 15] [--baseline HEAD~1]
+#   --baseline 在临时git worktree中检出指定提交，用同样的方法测量导入耗时作为对比
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 首个请求访问的接口，比赛弹窗打开时最先请求的两个页面
+FIRST_REQUESTS = ["/api/odds/oupei/{id}", "/api/odds/head-to-head/{id}"]
+
+# 子进程：导入应用并依次请求接口，输出各阶段耗时
+CHILD_SCRIPT = r"""
+import json, sys, time
+start = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+client = app.test_client()
+timings = {"import": imported - start, "requests": []}
+for path in json.loads(sys.argv[1]):
+    t = time.perf_counter()
+    response = client.get(path)
+    assert response.status_code == 200, (path, response.status_code)
+    timings["requests"].append(time.perf_counter() - t)
+if len(sys.argv) > 2 and sys.argv[2] == "save":
+    from warm_state import warm_state
+    assert warm_state.save()
+print(json.dumps(timings))
+"""
+
+
+def _env(**extra):
+    env = dict(os.environ, LOG_LEVEL="ERROR", PYTHONDONTWRITEBYTECODE="1")
+    env.pop("WARM_STATE_PATH", None)
+    env.update(extra)
+    return env
+
+
+def import_times(root, runs):
+    """
+    用-X importtime测量导入main的耗时
+
+    :return: (每次运行的总耗时列表（秒）, 最后一次运行的{模块: (自身耗时, 累计耗时)}（微秒）)
+    """
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=root, env=_env(), capture_output=True, text=True, check=True,
+        ).stderr
+        modules = {}
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        totals.append(modules["main"][1] / 1e6)
+    return totals, modules
+
+
+def _write_cassette(directory):
+    """
+    把离线样本写入录制目录，子进程以回放模式读取
+    """
+    from benchmarks.bench_parsers import _pages
+    from cassette import CassetteStore
+    from scraper import MatchScraper
+
+    sizes = {"live_rows": 300, "history_rows": 0, "companies": 200, "h2h_rows": 60, "recent_rows": 20, "events": 40}
+    store = CassetteStore(directory, mode="record")
+    for url, content in _pages(None, sizes).values():
+        store.record(url, 200, {"Content-Type": "text/html"}, content, MatchScraper._encoding_for(url))
+
+
+def first_requests(runs, cassette_dir, snapshot_path=None):
+    """
+    在新进程中导入应用并请求FIRST_REQUESTS，返回各次运行的(导入耗时, 首个请求耗时, 全部请求耗时)
+    """
+    from benchmarks.bench_parsers import MATCH_ID
+
+    paths = json.dumps([path.format(id=MATCH_ID) for path in FIRST_REQUESTS])
+    extra = {"SCRAPER_CASSETTE_MODE": "replay", "SCRAPER_CASSETTE_DIR": cassette_dir}
+    if snapshot_path:
+        extra["WARM_STATE_PATH"] = snapshot_path
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT, paths],
+            cwd=ROOT, env=_env(**extra), capture_output=True, text=True, check=True,
+        ).stdout
+        timings = json.loads(output.splitlines()[-1])
+        results.append((timings["import"], timings["requests"][0], sum(timings["requests"])))
+    return results
+
+
+def _save_snapshot(cassette_dir, snapshot_path):
+    from benchmarks.bench_parsers import MATCH_ID
+
+    paths = json.dumps([path.format(id=MATCH_ID) for path in FIRST_REQUESTS])
+    extra = {"SCRAPER_CASSETTE_MODE": "replay", "SCRAPER_CASSETTE_DIR": cassette_dir, "WARM_STATE_PATH": snapshot_path}
+    subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, paths, "save"],
+        cwd=ROOT, env=_env(**extra), capture_output=True, text=True, check=True,
+    )
+
+
+def _median_ms(values):
+    return statistics.median(values) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=15, help="每种情况启动的进程数，取中位数")
+    parser.add_argument("--top", type=int, default=15, help="列出累计导入耗时最高的模块数")
+    parser.add_argument("--baseline", help="对比的git提交，在临时worktree中测量导入耗时")
+    args = parser.parse_args()
+
+    totals, modules = import_times(ROOT, args.runs)
+    print(f"import main: 中位数 {_median_ms(totals):.1f}ms（{args.runs}次，最快 {min(totals) * 1000:.1f}ms）")
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as worktree:
+            subprocess.run(["git", "worktree", "add", "--detach", worktree, args.baseline],
+                           cwd=ROOT, capture_output=True, check=True)
+            # 与当前目录一样使用已编译的字节码，只比较导入本身
+            subprocess.run([sys.executable, "-m", "compileall", "-q", worktree], capture_output=True)
+            try:
+                baseline_totals, _ = import_times(worktree, args.runs)
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT, capture_output=True)
+        print(f"import main ({args.baseline}): 中位数 {_median_ms(baseline_totals):.1f}ms，"
+              f"减少 {_median_ms(baseline_totals) - _median_ms(totals):.1f}ms")
+
+    # 只列出顶层模块，子模块的耗时已计入所属包的累计耗时
+    print(f"\n累计导入耗时最高的{args.top}个模块（最后一次运行）:")
+    top_level = {name: value for name, value in modules.items() if "." not in name}
+    for name, (self_us, cumulative_us) in sorted(top_level.items(), key=lambda item: -item[1][1])[: args.top]:
+        print(f"  {name:28s} 累计 {cumulative_us / 1000:8.1f}ms  自身 {self_us / 1000:7.1f}ms")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cassette_dir = os.path.join(workdir, "cassettes")
+        snapshot_path = os.path.join(workdir, "warm_state.json")
+        _write_cassette(cassette_dir)
+        _save_snapshot(cassette_dir, snapshot_path)
+        print(f"\n启动快照大小: {os.path.getsize(snapshot_path) / 1024:.1f}KB")
+
+        print(f"\n{'情况':14s} {'导入ms':>8s} {'首个请求ms':>10s} {'全部请求ms':>10s} {'导入+请求ms':>11s}")
+        for name, path in (("无快照", None), ("恢复快照", snapshot_path)):
+            results = first_requests(args.runs, cassette_dir, path)
+            imports, firsts, requests_total = zip(*results)
+            combined = [i + r for i, _, r in results]
+            print(f"{name:14s} {_median_ms(imports):8.1f} {_median_ms(firsts):10.2f} "
+                  f"{_median_ms(requests_total):10.2f} {_median_ms(combined):11.1f}")
+
+
+if __name__ == "__main__":
+    main()
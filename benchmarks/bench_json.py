@@ -0,0 +1,103 @@
+# JSON序列化基准测试
+# 用离线页面样本得到各接口实际返回的数据，对比Flask默认JSON提供者（标准库json，中文转义）、
+# orjson编码，以及命中serialized_cache（随页面缓存的解析结果第二次输出）时生成响应的耗时，
+# 并校验orjson的输出与标准库解码后完全一致
+#
+# 用法: python -m benchmarks.bench_json [--repeat 50] [--fixtures-dir DIR]
+
+import argparse
+import json
+import logging
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.bench_parsers import MATCH_ID, _pages, _prime
+from cache import serialized_cache
+from json_provider import CachedJSONProvider, OrjsonProvider, orjson
+from scraper import OddsScraper
+
+# 接口及其返回的数据：{接口: (需要预先写入缓存的页面, 获取数据的函数)}
+ENDPOINTS = {
+    "/odds/oupei": (["ouzhi.shtml"], lambda: OddsScraper.fetch_oupei_data(MATCH_ID)),
+    "/odds/stats?kind=oupei": (["ouzhi.shtml"], lambda: OddsScraper.fetch_odds_stats(MATCH_ID, "oupei")),
+    "/odds/head-to-head": (["shuju.shtml"], lambda: OddsScraper.fetch_head_to_head_data(MATCH_ID)),
+    "/odds/recent-records": (["shuju.shtml"], lambda: OddsScraper.fetch_recent_records(MATCH_ID)),
+    "/odds/home-away-records": (["shuju.shtml"], lambda: OddsScraper.fetch_home_away_records(MATCH_ID)),
+    # 组合多个缓存结果的新字典，不会命中serialized_cache
+    "/odds/<id>": (
+        ["ouzhi.shtml", "shuju.shtml"],
+        lambda: {"id": MATCH_ID, "oupei": OddsScraper.fetch_oupei_data(MATCH_ID), "errors": {}},
+    ),
+}
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON序列化基准测试")
+    parser.add_argument("--repeat", type=int, default=50, help="每种方式重复次数，取最快一次")
+    parser.add_argument("--fixtures-dir", help="保存的上游页面目录，存在同名文件时替换生成的样本")
+    args = parser.parse_args()
+
+    logging.getLogger("scraper").setLevel(logging.WARNING)
+    logging.getLogger("json_provider").setLevel(logging.WARNING)
+
+    sizes = {
+        "live_rows": 0,
+        "history_rows": 0,
+        "companies": 200,
+        "h2h_rows": 60,
+        "recent_rows": 20,
+        "events": 0,
+    }
+    pages = _pages(args.fixtures_dir, sizes)
+    app = Flask(__name__)
+    providers = {"default": DefaultJSONProvider(app), "stdlib": CachedJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+    else:
+        print("未安装orjson，只对比标准库")
+
+    print(
+        f"{'接口':26s} {'KB(默认)':>9s} {'KB(UTF-8)':>9s} {'默认ms':>8s} {'标准库ms':>8s} "
+        f"{'orjson ms':>9s} {'缓存命中ms':>10s} {'提速':>7s}"
+    )
+    with app.app_context():
+        for endpoint, (names, fetch) in ENDPOINTS.items():
+            serialized_cache.clear()
+            _prime(pages, names)
+            payload = fetch()
+            registered = serialized_cache.lookup(payload)[0]
+
+            default_body = providers["default"].response(payload).get_data()
+            fast = providers.get("orjson", providers["stdlib"])
+            fast_body = fast.encode(payload)
+            assert json.loads(default_body) == json.loads(fast_body), f"{endpoint}: 输出不一致"
+
+            default_time = _best_of(lambda: providers["default"].response(payload), args.repeat)
+            stdlib_time = _best_of(lambda: providers["stdlib"].encode(payload), args.repeat)
+            orjson_time = _best_of(lambda: providers["orjson"].encode(payload), args.repeat) if orjson else None
+            # 第一次输出保存编码结果，之后的输出都命中缓存
+            fast.response(payload)
+            hit_time = _best_of(lambda: fast.response(payload), args.repeat) if registered else None
+
+            best = hit_time or orjson_time or stdlib_time
+            print(
+                f"{endpoint:26s} {len(default_body) / 1024:9.1f} {len(fast_body) / 1024:9.1f} "
+                f"{default_time * 1000:8.3f} {stdlib_time * 1000:8.3f} "
+                f"{orjson_time * 1000 if orjson_time else float('nan'):9.3f} "
+                f"{hit_time * 1000 if hit_time else float('nan'):10.3f} {default_time / best:6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# 比赛列表解析基准测试
+# 对比旧的解析方式（html.parser构建整棵文档树后CSS选择）与
+# MatchScraper.parse_match_list（lxml iterparse只解析比赛行、按位置取单元格）的单页耗时，
+# 并校验两种方式得到的比赛字典和竞彩标识映射完全一致
+#
+# 用法: python -m benchmarks.bench_live_list [--rows 300] [--repeat 10]
+
+import argparse
+import logging
+import time
+
+from benchmarks.fixtures import history_list_page, live_list_page
+from benchmarks.legacy_list_parser import (legacy_parse_jc_fid_map,
+                                           legacy_parse_match_list)
+from scraper import MatchScraper
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比赛列表解析基准测试")
+    parser.add_argument("--rows", type=int, default=300, help="直播页面的比赛行数")
+    parser.add_argument("--repeat", type=int, default=10, help="每种方式重复次数，取最快一次")
+    args = parser.parse_args()
+
+    # 基准测试只关心解析耗时，关闭逐行日志
+    logging.getLogger("scraper").setLevel(logging.WARNING)
+
+    cases = [
+        ("live", live_list_page(args.rows).decode("gbk"), None),
+        ("history", history_list_page(args.rows * 2).decode("gbk"), "2024-01-01"),
+    ]
+    for name, html, date in cases:
+        jc_fid_map = MatchScraper.parse_jc_fid_map(html)
+        assert jc_fid_map == legacy_parse_jc_fid_map(html), f"{name}: 竞彩标识映射不一致"
+        legacy = legacy_parse_match_list(html, date, False, jc_fid_map)
+        fast = MatchScraper.parse_match_list(html, date, False, jc_fid_map)
+        assert legacy == fast, f"{name}: 两种解析方式的结果不一致"
+
+        legacy_time = _best_of(
+            lambda: legacy_parse_match_list(html, date, False, legacy_parse_jc_fid_map(html)), args.repeat
+        )
+        fast_time = _best_of(
+            lambda: MatchScraper.parse_match_list(html, date, False, MatchScraper.parse_jc_fid_map(html)),
+            args.repeat,
+        )
+        print(
+            f"{name:8s} {len(fast):4d}行 {len(html) / 1024:7.1f}KB  "
+            f"旧方式 {legacy_time * 1000:8.2f}ms  新方式 {fast_time * 1000:8.2f}ms  "
+            f"提速 {legacy_time / fast_time:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
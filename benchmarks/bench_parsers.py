@@ -0,0 +1,260 @@
+# 页面解析基准测试
+# 用离线的页面样本（gbk/gb18030编码）测量各抓取方法的解析耗时、内存峰值和内存分配，
+# 结果写入JSON文件，便于在不同提交之间对比，整个过程不访问网络
+#
+# 用法:
+#   python -m benchmarks.bench_parsers [--repeat 10] [--output results.json]
+#   python -m benchmarks.bench_parsers --fixtures-dir DIR   # 使用保存下来的上游页面替换生成的样本
+#   python -m benchmarks.bench_parsers --compare old.json   # 与之前的结果对比
+#   python -m benchmarks.bench_parsers --log-level INFO     # 包含日志开销
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from benchmarks.fixtures import (detail_page, history_list_page,
+                                 live_list_page, ouzhi_page, shuju_page)
+from cache import (CachedPage, jc_fid_map_cache, match_details_flight,
+                   page_cache)
+from config import BASE_URL
+from logger import console_handler
+from scraper import MatchScraper, OddsScraper
+
+# 基准测试使用的比赛fid
+MATCH_ID = "1100001"
+
+
+def _pages(fixtures_dir, sizes):
+    """
+    准备各页面的URL和原始字节
+
+    fixtures_dir中存在同名文件时使用文件内容（例如保存下来的真实上游页面），否则使用生成的样本
+    :return: {文件名: (URL, 原始字节)}
+    """
+    generated = {
+        "live.html": ("https://live.500.com/", lambda: live_list_page(sizes["live_rows"])),
+        "2h1.html": (BASE_URL["LIVE_MATCHES"], lambda: live_list_page(sizes["live_rows"], seed=6)),
+        "wanchang.html": (
+            BASE_URL["HISTORY_MATCHES"].format(date="2024-01-01"),
+            lambda: history_list_page(sizes["history_rows"]),
+        ),
+        "ouzhi.shtml": (
+            f'{BASE_URL["ODDS_BASE"]}ouzhi-{MATCH_ID}.shtml',
+            lambda: ouzhi_page(sizes["companies"]),
+        ),
+        "shuju.shtml": (
+            f'{BASE_URL["ODDS_BASE"]}shuju-{MATCH_ID}.shtml',
+            lambda: shuju_page(sizes["h2h_rows"], sizes["recent_rows"], sizes["recent_rows"]),
+        ),
+        "detail.html": (f"https://live.500.com/detail.php?fid={MATCH_ID}", lambda: detail_page(sizes["events"])),
+    }
+    pages = {}
+    for name, (url, build) in generated.items():
+        path = os.path.join(fixtures_dir, name) if fixtures_dir else None
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                pages[name] = (url, f.read())
+        else:
+            pages[name] = (url, build())
+    return pages
+
+
+def _prime(pages, names):
+    """
+    把页面写入页面缓存，每次都创建新的CachedPage，保证测量的是完整的解码和解析
+    """
+    for name in names:
+        url, content = pages[name]
+        page_cache.set(url, CachedPage(url, content, 200, {}, MatchScraper._encoding_for(url)))
+
+
+def _cases(pages):
+    """
+    基准测试用例：{名称: (需要预先写入缓存的页面, 调用函数)}
+    """
+
+    def live_matches():
+        jc_fid_map_cache.clear()
+        return MatchScraper.fetch_live_matches()
+
+    def history_matches():
+        jc_fid_map_cache.clear()
+        return MatchScraper.fetch_live_matches("2024-01-01")
+
+    def match_details():
+        # 绕过合并调用的结果复用，每次都重新解析
+        match_details_flight.forget(MATCH_ID)
+        return MatchScraper.fetch_match_details(MATCH_ID)
+
+    return {
+        "fetch_live_matches": (["live.html", "2h1.html"], live_matches),
+        "fetch_live_matches[history]": (["live.html", "wanchang.html"], history_matches),
+        "fetch_jc_fid_map": (["live.html"], lambda: (jc_fid_map_cache.clear(), MatchScraper.fetch_jc_fid_map())[1]),
+        "fetch_oupei_data": (["ouzhi.shtml"], lambda: OddsScraper.fetch_oupei_data(MATCH_ID)),
+        "fetch_odds_stats[oupei]": (["ouzhi.shtml"], lambda: OddsScraper.fetch_odds_stats(MATCH_ID, "oupei")),
+        "fetch_head_to_head_data": (["shuju.shtml"], lambda: OddsScraper.fetch_head_to_head_data(MATCH_ID)),
+        "fetch_recent_records": (["shuju.shtml"], lambda: OddsScraper.fetch_recent_records(MATCH_ID)),
+        "fetch_home_away_records": (["shuju.shtml"], lambda: OddsScraper.fetch_home_away_records(MATCH_ID)),
+        "fetch_match_details": (["detail.html"], match_details),
+    }
+
+
+def _result_size(result):
+    """
+    结果的条目数，用于确认解析器确实解析出了数据
+    """
+    if isinstance(result, dict):
+        return sum(len(v) if isinstance(v, (list, dict)) else 1 for v in result.values())
+    if isinstance(result, list):
+        return len(result)
+    return 0
+
+
+def _measure(pages, names, fn, repeat):
+    """
+    测量单个用例
+
+    耗时在关闭tracemalloc的情况下测量；内存单独跑一次，
+    tracemalloc只能统计存活的内存块，因此内存分配以峰值、调用结束后仍保留的内存块
+    以及期间触发的第0代垃圾回收次数（反映容器对象的分配量）来衡量
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        _prime(pages, names)
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    _prime(pages, names)
+    gc.collect()
+    gen0_before = gc.get_stats()[0]["collections"]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gen0_collections = gc.get_stats()[0]["collections"] - gen0_before
+    retained = after.compare_to(before, "filename")
+
+    content_size = sum(len(pages[name][1]) for name in names)
+    return {
+        "pages": names,
+        "page_bytes": content_size,
+        "items": _result_size(result),
+        "repeat": repeat,
+        "time_min_ms": round(min(times) * 1000, 3),
+        "time_median_ms": round(statistics.median(times) * 1000, 3),
+        "time_mean_ms": round(statistics.fmean(times) * 1000, 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "retained_kb": round(sum(stat.size_diff for stat in retained) / 1024, 1),
+        "retained_blocks": sum(stat.count_diff for stat in retained),
+        "gc_gen0_collections": gen0_collections,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _compare(results, baseline_path):
+    """
+    与之前保存的结果对比中位数耗时和内存峰值
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n与 {baseline_path} ({baseline.get('commit') or '未知提交'}) 对比:")
+    for name, current in results["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if not old:
+            print(f"  {name:30s} 无对比数据")
+            continue
+        time_ratio = current["time_median_ms"] / old["time_median_ms"] if old["time_median_ms"] else 0
+        memory_ratio = current["peak_memory_kb"] / old["peak_memory_kb"] if old["peak_memory_kb"] else 0
+        print(f"  {name:30s} 耗时 {time_ratio:6.2f}x  内存峰值 {memory_ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="页面解析基准测试")
+    parser.add_argument("--repeat", type=int, default=10, help="每个用例的计时次数")
+    parser.add_argument("--fixtures-dir", help="保存的上游页面目录，存在同名文件时替换生成的样本")
+    parser.add_argument("--output", help="JSON结果文件，默认benchmarks/results/<提交>.json")
+    parser.add_argument("--compare", help="与之前的JSON结果对比")
+    parser.add_argument("--only", action="append", help="只运行指定用例，可重复指定")
+    parser.add_argument("--log-level", help="保留scraper日志并设置级别（如INFO），日志写入空设备")
+    parser.add_argument("--live-rows", type=int, default=300, help="直播页面的比赛行数")
+    parser.add_argument("--history-rows", type=int, default=600, help="历史页面的比赛行数")
+    parser.add_argument("--companies", type=int, default=200, help="欧赔页面的公司数")
+    parser.add_argument("--h2h-rows", type=int, default=60, help="交战历史的比赛行数")
+    parser.add_argument("--recent-rows", type=int, default=20, help="近期战绩和主客场战绩的比赛行数")
+    parser.add_argument("--events", type=int, default=40, help="比赛详情的事件数")
+    args = parser.parse_args()
+
+    if args.log_level:
+        # 保留日志，输出到空设备，测量日志格式化和写入的开销
+        logging.getLogger("scraper").setLevel(args.log_level)
+        console_handler.setStream(open(os.devnull, "w", encoding="utf-8"))
+    else:
+        # 基准测试只关心解析耗时，关闭逐行日志
+        logging.getLogger("scraper").setLevel(logging.WARNING)
+
+    sizes = {
+        "live_rows": args.live_rows,
+        "history_rows": args.history_rows,
+        "companies": args.companies,
+        "h2h_rows": args.h2h_rows,
+        "recent_rows": args.recent_rows,
+        "events": args.events,
+    }
+    pages = _pages(args.fixtures_dir, sizes)
+    cases = _cases(pages)
+    if args.only:
+        cases = {name: case for name, case in cases.items() if name in args.only}
+
+    results = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "fixtures_dir": args.fixtures_dir or "",
+        "log_level": args.log_level or "",
+        "cases": {},
+    }
+    print(f"{'用例':30s} {'页面KB':>8s} {'条目':>6s} {'中位数ms':>10s} {'最快ms':>10s} {'峰值KB':>10s} {'保留块':>8s} {'GC':>4s}")
+    for name, (names, fn) in cases.items():
+        stats = _measure(pages, names, fn, args.repeat)
+        results["cases"][name] = stats
+        print(
+            f"{name:30s} {stats['page_bytes'] / 1024:8.1f} {stats['items']:6d} "
+            f"{stats['time_median_ms']:10.2f} {stats['time_min_ms']:10.2f} "
+            f"{stats['peak_memory_kb']:10.1f} {stats['retained_blocks']:8d} {stats['gc_gen0_collections']:4d}"
+        )
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"{results['commit'] or 'latest'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {output}")
+
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# 泊松比分模型基准测试
+# 对比前端Match_data.js的嵌套循环（每个比分单独调用poissonProbability，半全场为9^4次循环）与
+# poisson.scoreline_model（外积矩阵）计算一场比赛全场、半场和半全场概率的耗时，
+# 并校验两种方式的胜平负、常见比分、进球数分布和半全场概率一致
+#
+# 安装了node时直接在node中运行Match_data.js的原始函数，否则只对比逐行移植的Python循环
+#
+# 用法: python -m benchmarks.bench_poisson [--matches 200] [--repeat 5]
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import time
+
+import poisson
+
+MATCH_DATA_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "Match_data.js")
+
+# 在node中加载Match_data.js，对每组λ执行renderXg中的计算，输出结果和总耗时
+NODE_SCRIPT = r"""
+const fs = require('fs');
+const vm = require('vm');
+const code = fs.readFileSync(process.argv[1], 'utf8');
+const m = vm.runInNewContext(code + '\n;matchDataModule', {console});
+const cases = JSON.parse(fs.readFileSync(0, 'utf8'));
+const repeat = parseInt(process.argv[2], 10);
+function run(c) {
+    const [hf, af, hh, ah] = c;
+    return {
+        full: m.calculateWinDrawLossProbabilities(hf, af),
+        fullScores: m.calculateScoreCombinationProbabilities(hf, af),
+        fullGoals: m.calculateGoalDistributions(hf, af),
+        half: m.calculateWinDrawLossProbabilities(hh, ah),
+        halfScores: m.calculateScoreCombinationProbabilities(hh, ah),
+        halfGoals: m.calculateGoalDistributions(hh, ah),
+        halfFull: m.calculateHalfFullProbabilities(hh, ah, hf, af),
+    };
+}
+const results = cases.map(run);
+let best = Infinity;
+for (let r = 0; r < repeat; r++) {
+    const start = process.hrtime.bigint();
+    cases.forEach(run);
+    best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e9);
+}
+process.stdout.write(JSON.stringify({seconds: best, results}));
+"""
+
+
+def _pmf(k, lam):
+    return math.exp(-lam) * lam ** k / math.factorial(k)
+
+
+def _outcome(home, away):
+    return "胜" if home > away else "平" if home == away else "负"
+
+
+def legacy_model(home_full, away_full, home_half, away_half):
+    """
+    逐行移植Match_data.js的循环计算
+    """
+
+    def win_draw_loss(home, away):
+        result = {"胜": 0.0, "平": 0.0, "负": 0.0}
+        for i in range(9):
+            for j in range(9):
+                result[_outcome(i, j)] += _pmf(i, home) * _pmf(j, away)
+        return result
+
+    def scores(home, away):
+        combos = [
+            (i, j, _pmf(i, home) * _pmf(j, away)) for i in range(5) for j in range(5)
+        ]
+        combos = [c for c in combos if c[2] > 0.001]
+        combos.sort(key=lambda c: -c[2])
+        return combos[:10]
+
+    def goals(home, away):
+        totals = [sum(_pmf(h, home) * _pmf(t - h, away) for h in range(t + 1)) for t in range(13)]
+        return [_pmf(k, home) for k in range(7)], [_pmf(k, away) for k in range(7)], totals
+
+    half_full = {}
+    for hh in range(9):
+        for ah in range(9):
+            for hf in range(9):
+                for af in range(9):
+                    prob = _pmf(hh, home_half) * _pmf(ah, away_half) * _pmf(hf, home_full) * _pmf(af, away_full)
+                    key = _outcome(hh, ah) + _outcome(hf, af)
+                    half_full[key] = half_full.get(key, 0.0) + prob
+
+    return {
+        "full": win_draw_loss(home_full, away_full),
+        "full_scores": scores(home_full, away_full),
+        "full_goals": goals(home_full, away_full),
+        "half": win_draw_loss(home_half, away_half),
+        "half_scores": scores(home_half, away_half),
+        "half_goals": goals(home_half, away_half),
+        "half_full": half_full,
+    }
+
+
+def _normalize_node(result):
+    """
+    把node输出转换为legacy_model的结构
+    """
+
+    def wdl(value):
+        return {"胜": value["homeWin"], "平": value["draw"], "负": value["awayWin"]}
+
+    def scores(value):
+        return [(s["homeGoals"], s["awayGoals"], s["probability"]) for s in value]
+
+    def goals(value):
+        return tuple([g["probability"] for g in value[key]] for key in ("homeGoals", "awayGoals", "totalGoals"))
+
+    return {
+        "full": wdl(result["full"]),
+        "full_scores": scores(result["fullScores"]),
+        "full_goals": goals(result["fullGoals"]),
+        "half": wdl(result["half"]),
+        "half_scores": scores(result["halfScores"]),
+        "half_goals": goals(result["halfGoals"]),
+        "half_full": result["halfFull"],
+    }
+
+
+def _check(name, expected, model):
+    def close(a, b):
+        assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-15), f"{name}: {a} != {b}"
+
+    for period, key in (("full", "full_time"), ("half", "half_time")):
+        actual = model[key]
+        for result, field in zip("胜平负", ("home_win", "draw", "away_win")):
+            close(expected[period][result], actual["win_draw_loss"][field])
+        assert len(expected[f"{period}_scores"]) == len(actual["scores"]), f"{name}: 常见比分数量不一致"
+        # 概率几乎相同的比分可能因浮点误差交换顺序，按比分逐个比较概率
+        expected_scores = {(home, away): prob for home, away, prob in expected[f"{period}_scores"]}
+        for score in actual["scores"]:
+            close(expected_scores[(score["home_goals"], score["away_goals"])], score["probability"])
+        for values, field in zip(expected[f"{period}_goals"], ("home_goals", "away_goals", "total_goals")):
+            for a, b in zip(values, actual[field], strict=True):
+                close(a, b)
+    for key, value in expected["half_full"].items():
+        close(value, model["half_full"][key])
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _engine_uncached(cases):
+    poisson._match_model.cache_clear()
+    poisson._period_model.cache_clear()
+    for case in cases:
+        poisson.scoreline_model(*case)
+
+
+def _engine_cached(cases):
+    for case in cases:
+        poisson.scoreline_model(*case)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="泊松比分模型基准测试")
+    parser.add_argument("--matches", type=int, default=200, help="比赛数（不同的λ组合数）")
+    parser.add_argument("--repeat", type=int, default=5, help="每种方式重复次数，取最快一次")
+    args = parser.parse_args()
+
+    rng = random.Random(20)
+    cases = []
+    for _ in range(args.matches):
+        home, away = round(rng.uniform(0.3, 3.0), 2), round(rng.uniform(0.3, 3.0), 2)
+        cases.append((home, away, round(home * 0.45, 2), round(away * 0.45, 2)))
+
+    legacy_time = _best_of(lambda: [legacy_model(*case) for case in cases], args.repeat)
+    for i, case in enumerate(cases):
+        _check(f"python#{i}", legacy_model(*case), poisson.scoreline_model(*case))
+    uncached_time = _best_of(lambda: _engine_uncached(cases), args.repeat)
+    _engine_cached(cases)
+    cached_time = _best_of(lambda: _engine_cached(cases), args.repeat)
+
+    rows = [("Python循环", legacy_time)]
+    node = shutil.which("node")
+    if node:
+        output = subprocess.run(
+            [node, "-e", NODE_SCRIPT, MATCH_DATA_JS, str(args.repeat)],
+            input=json.dumps(cases), capture_output=True, text=True, check=True,
+        )
+        node_result = json.loads(output.stdout)
+        for i, (case, result) in enumerate(zip(cases, node_result["results"])):
+            _check(f"node#{i}", _normalize_node(result), poisson.scoreline_model(*case))
+        rows.insert(0, ("Match_data.js(node)", node_result["seconds"]))
+    else:
+        print("未找到node，跳过Match_data.js原始函数的对比")
+
+    rows += [("NumPy外积（无缓存）", uncached_time), ("NumPy外积（缓存命中）", cached_time)]
+    print(f"{len(cases)}场比赛（全场+半场+半全场），结果已校验一致")
+    for name, seconds in rows:
+        print(f"{name:24s} 总计 {seconds * 1000:9.2f}ms  每场 {seconds / len(cases) * 1e6:9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
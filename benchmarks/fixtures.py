@@ -0,0 +1,290 @@
+# 基准测试用的页面样本
+# 按500.com页面结构生成确定性的HTML样本，并按上游实际使用的编码输出字节，
+# 用于在没有网络的情况下测量解析耗时
+
+import random
+
+LEAGUES = ["英超", "西甲", "意甲", "德甲", "法甲", "中超", "日职", "韩K联", "澳超", "荷甲", "葡超", "苏超"]
+TEAMS = [
+    "曼彻斯特联", "切尔西", "阿森纳", "利物浦", "皇家马德里", "巴塞罗那", "拜仁慕尼黑", "多特蒙德",
+    "尤文图斯", "国际米兰", "AC米兰", "巴黎圣日耳曼", "上海海港", "山东泰山", "北京国安", "广州队",
+    "浦和红钻", "川崎前锋", "蔚山现代", "全北现代", "悉尼FC", "墨尔本胜利", "阿贾克斯", "本菲卡",
+]
+
+# 模拟页面头部、脚本和广告等与比赛行无关的内容
+_PAGE_FILLER = "".join(
+    f'<div class="nav_item"><a href="https://www.500.com/{i}">导航{i}</a><script>var a{i}={i};</script></div>'
+    for i in range(400)
+)
+
+
+def _team(rng):
+    return rng.choice(TEAMS), rng.randint(100, 9999)
+
+
+def _live_row(rng, i, jc):
+    """
+    直播页面(2h1.php)和首页的一行比赛
+    """
+    fid = 1100000 + i
+    league = rng.choice(LEAGUES)
+    (home, home_id), (away, away_id) = _team(rng), _team(rng)
+    status = rng.choice(["0", "1", "2", "3", "4"])
+    jc_td = f'<td><input type="checkbox" name="check_id[]" value="{fid}">周三{i:03d}</td>' if jc else "<td></td>"
+    return (
+        f'<tr id="a{fid}" order="{i}" status="{status}" gy="{league},{home},{away}" yy="{league}" fid="{fid}" sid="{rng.randint(1, 9000)}">'
+        f"{jc_td}"
+        f'<td class="ssbox_01" bgcolor="#{rng.randint(0, 0xFFFFFF):06X}"><a href="https://liansai.500.com/zuqiu-{i}/" target="_blank">{league}</a></td>'
+        f"<td>第{rng.randint(1, 38)}轮</td>"
+        f"<td>10-{rng.randint(10, 30)} {rng.randint(10, 23)}:{rng.choice(['00', '30', '45'])}</td>"
+        f'<td><span class="red">{rng.choice(["未", "上", "中", "下", "完"])}</span></td>'
+        f'<td class="p_lr01" align="right"><span class="yellowcard"></span><a href="https://liansai.500.com/team/{home_id}/" target="_blank">{home}</a></td>'
+        f'<td class="p_lr03"><div class="pk"><a class="clt1">{rng.randint(0, 4)}</a><a class="fgreen">-</a><a class="clt3">{rng.randint(0, 4)}</a></div></td>'
+        f'<td class="p_lr02" align="left"><a href="https://liansai.500.com/team/{away_id}/" target="_blank">{away}</a></td>'
+        f'<td class="red">{rng.randint(0, 2)} - {rng.randint(0, 2)}</td>'
+        f'<td><a href="https://odds.500.com/fenxi/shuju-{fid}.shtml" target="_blank">析</a> <a href="https://odds.500.com/fenxi/yazhi-{fid}.shtml">亚</a> <a href="https://odds.500.com/fenxi/ouzhi-{fid}.shtml">欧</a></td>'
+        f'<td class="bf_op">{rng.uniform(1.2, 9):.2f}</td><td class="bf_op">{rng.uniform(2.5, 5):.2f}</td><td class="bf_op">{rng.uniform(1.2, 9):.2f}</td>'
+        "</tr>"
+    )
+
+
+def _history_row(rng, i):
+    """
+    历史页面(wanchang.php)的一行比赛
+    """
+    fid = 1000000 + i
+    league = rng.choice(LEAGUES)
+    (home, home_id), (away, away_id) = _team(rng), _team(rng)
+    return (
+        f'<tr status="4" gy="{league},{home},{away}" fid="{fid}" sid="{rng.randint(1, 9000)}">'
+        f'<td class="ssbox_01" bgcolor="#{rng.randint(0, 0xFFFFFF):06X}"><a href="#">{league}</a></td>'
+        f"<td>第{rng.randint(1, 38)}轮</td>"
+        f"<td>10-{rng.randint(10, 30)} {rng.randint(10, 23)}:00</td>"
+        "<td>完</td>"
+        f'<td align="right"><a href="https://liansai.500.com/team/{home_id}/">{home}</a></td>'
+        f'<td><a class="red">{rng.randint(0, 4)} - {rng.randint(0, 4)}</a></td>'
+        f'<td align="left"><a href="https://liansai.500.com/team/{away_id}/">{away}</a></td>'
+        f"<td>{rng.randint(0, 2)} - {rng.randint(0, 2)}</td>"
+        '<td><a href="#">析</a></td>'
+        "</tr>"
+    )
+
+
+def live_list_page(rows=300, jc_ratio=0.4, seed=1):
+    """
+    生成直播比赛列表页面，返回gbk编码的字节
+    """
+    rng = random.Random(seed)
+    body = "".join(_live_row(rng, i, rng.random() < jc_ratio) for i in range(rows))
+    html = (
+        '<html><head><meta charset="gb2312"><title>足球比分直播</title></head><body>'
+        f"{_PAGE_FILLER}"
+        f'<table id="table_match" class="bf_tablelist01"><thead><tr><th>赛事</th></tr></thead><tbody>{body}</tbody></table>'
+        f"{_PAGE_FILLER}</body></html>"
+    )
+    return html.encode("gbk")
+
+
+def history_list_page(rows=600, seed=2):
+    """
+    生成历史比赛列表页面，返回gbk编码的字节
+    """
+    rng = random.Random(seed)
+    body = "".join(_history_row(rng, i) for i in range(rows))
+    html = (
+        '<html><head><meta charset="gb2312"><title>完场比分</title></head><body>'
+        f"{_PAGE_FILLER}"
+        f'<table id="table_match"><tbody>{body}</tbody></table>'
+        "</body></html>"
+    )
+    return html.encode("gbk")
+
+
+COMPANIES = [
+    "威廉希尔", "立博", "Bet365", "澳门", "易胜博", "伟德", "明陞", "10BET", "金宝博", "12BET",
+    "利记", "平博", "必发", "香港马会", "bwin", "Interwetten", "SNAI", "Coral", "Betfair", "竞彩官方",
+]
+
+# 比赛详情页的事件图标
+_EVENT_ICONS = ["jq.gif", "hp.gif", "hrp.gif", "wl.gif", "hs.gif"]
+
+
+def _odds_triplet(rng):
+    return [f"{rng.uniform(1.1, 12):.2f}", f"{rng.uniform(2.6, 6):.2f}", f"{rng.uniform(1.1, 12):.2f}"]
+
+
+def _odds_cell(rng, value):
+    trend = rng.choice(["tips_up", "tips_down", ""])
+    return f'<td class="{trend}">{value}</td>'
+
+
+def ouzhi_page(companies=200, seed=3):
+    """
+    生成百家欧赔页面(ouzhi-{fid}.shtml)，返回gb18030编码的字节
+
+    每家公司一行，行内嵌套初盘和即时盘两行赔率
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(companies):
+        name = f"{COMPANIES[i % len(COMPANIES)]}{i // len(COMPANIES) or ''}"
+        initial, instant = _odds_triplet(rng), _odds_triplet(rng)
+        rows.append(
+            f'<tr id="{1000 + i}" ttl="zy" class="{"tr1" if i % 2 else "tr2"}">'
+            f'<td><input type="checkbox" name="chkall" value="{1000 + i}"></td>'
+            f'<td class="tb_plgs" title="{name}"><p><a href="#" class="quancheng">{name[:6]}</a></p></td>'
+            '<td><table class="pl_table_data" width="100%" cellspacing="0" cellpadding="0">'
+            f"<tr>{''.join(f'<td>{v}</td>' for v in initial)}</tr>"
+            f"<tr>{''.join(_odds_cell(rng, v) for v in instant)}</tr>"
+            "</table></td>"
+            '<td><table class="pl_table_data"><tr><td>62.3%</td><td>21.1%</td><td>16.6%</td></tr>'
+            "<tr><td>63.0%</td><td>20.5%</td><td>16.5%</td></tr></table></td>"
+            f'<td class="tb_tdul_pl"><a href="#">{rng.uniform(90, 97):.2f}%</a></td>'
+            "</tr>"
+        )
+    html = (
+        '<html><head><meta charset="gb2312"><title>百家欧赔</title></head><body>'
+        f"{_PAGE_FILLER}"
+        '<div class="table_cont"><h2>百家欧赔</h2>'
+        f'<table id="datatb" class="pub_table" width="100%">{"".join(rows)}</table></div>'
+        f"{_PAGE_FILLER}</body></html>"
+    )
+    return html.encode("gb18030")
+
+
+def _record_row(rng, cells):
+    """
+    交战历史和近期战绩表格中的一行比赛
+    """
+    (home, _), (away, _) = _team(rng), _team(rng)
+    hs, as_ = rng.randint(0, 4), rng.randint(0, 4)
+    row = [
+        f'<td><a href="#" style="background:#{rng.randint(0, 0xFFFFFF):06X}">{rng.choice(LEAGUES)}</a></td>',
+        f"<td>20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}</td>",
+        f'<td><a href="#"><span class="dz-l">[{rng.randint(1, 20)}]{home}</span><em>{hs}:{as_}</em>'
+        f'<span class="dz-r">{away}[{rng.randint(1, 20)}]</span></a></td>',
+    ]
+    if cells == 10:
+        row += [
+            f"<td>{rng.randint(0, hs)}:{rng.randint(0, as_)}</td>",
+            f'<td><span class="{rng.choice(["ying", "ping", "shu"])}">{rng.choice(["胜", "平", "负"])}</span></td>',
+            f'<td><p class="pub_table_pl">{"".join(f"<span>{v}</span>" for v in _odds_triplet(rng))}</p></td>',
+            f'<td><p class="pub_table_pl"><span>{rng.uniform(0.7, 1.2):.2f}</span><span>{rng.choice(["平手", "半球", "一球"])}</span><span>{rng.uniform(0.7, 1.2):.2f}</span></p></td>',
+            f"<td>{rng.choice(['赢', '走', '输'])}</td>",
+            f"<td>{rng.choice(['大', '小'])}</td>",
+            "<td></td>",
+        ]
+    else:
+        row += [
+            f"<td>{rng.choice(['平手', '半球', '受让半球', '一球'])}</td>",
+            f"<td>{rng.randint(0, hs)}:{rng.randint(0, as_)}</td>",
+            f"<td>{rng.choice(['胜', '平', '负'])}</td>",
+            f"<td>{rng.choice(['赢', '走', '输'])}</td>",
+            f"<td>{rng.choice(['大', '小'])}</td>",
+        ]
+    return f"<tr>{''.join(row)}</tr>"
+
+
+def _record_table(rng, rows, cells, stats_row=False):
+    header = "".join(f"<th>列{i}</th>" for i in range(cells))
+    body = "".join(_record_row(rng, cells) for _ in range(rows))
+    if stats_row:
+        body += (
+            f'<tr><td colspan="{cells}"><p class="record_msg">近{rows}场，胜{rows // 2}平{rows // 4}负{rows - rows // 2 - rows // 4}，'
+            "胜率50%，赢盘率48%</p></td></tr>"
+        )
+    return f'<table class="pub_table" width="100%"><tbody><tr>{header}</tr>{body}</tbody></table>'
+
+
+def _team_block(rng, div_attrs, rows, stats_row, extra=""):
+    team, _ = _team(rng)
+    return (
+        f"<div {div_attrs}>"
+        f'<div class="team_name_box"><strong class="team_name">{team}</strong>{extra}</div>'
+        f"{_record_table(rng, rows, 8, stats_row)}"
+        f'<div class="bottom_info"><p>近{rows}场，胜{rows // 2}平{rows // 4}负{rows - rows // 2 - rows // 4}</p></div>'
+        "</div>"
+    )
+
+
+def shuju_page(h2h_rows=60, recent_rows=20, home_away_rows=20, seed=4):
+    """
+    生成数据分析页面(shuju-{fid}.shtml)，返回gb18030编码的字节
+
+    包含交战历史、近期战绩和主客场战绩三个部分
+    """
+    rng = random.Random(seed)
+    h2h = (
+        '<div class="M_box"><div class="M_title"><h4>交战历史</h4>'
+        f'<span class="his_info">近{h2h_rows}次交战，胜{h2h_rows // 3}平{h2h_rows // 3}负{h2h_rows - 2 * (h2h_rows // 3)}</span></div>'
+        f'<div class="M_content">{_record_table(rng, h2h_rows, 10)}</div></div>'
+    )
+    team_a = _team_block(rng, 'class="team_a"', recent_rows, True)
+    team_b = _team_block(rng, 'class="team_b"', recent_rows, True)
+    recent = (
+        '<div class="M_box"><div class="M_title"><h4>近期战绩</h4></div>'
+        f'<div class="M_content">{team_a}{team_b}</div></div>'
+    )
+    home = _team_block(rng, 'id="team_zhanji2_1"', home_away_rows, False, '<em id="home_zj2_1">主场</em>')
+    away = _team_block(rng, 'id="team_zhanji2_0"', home_away_rows, False, '<em id="home_zj2_0">客场</em>')
+    home_away = (
+        '<div class="M_box"><div class="M_title"><h4>主客场战绩</h4></div>'
+        f'<div class="M_content">{home}{away}</div></div>'
+    )
+    other = "".join(
+        f'<div class="M_box"><div class="M_title"><h4>{title}</h4></div><div class="M_content"><p>{title}</p></div></div>'
+        for title in ("联赛积分", "伤停情况", "未来赛事")
+    )
+    html = (
+        '<html><head><meta charset="gb2312"><title>数据分析</title></head><body>'
+        f"{_PAGE_FILLER}{other}{h2h}{recent}{home_away}{_PAGE_FILLER}</body></html>"
+    )
+    return html.encode("gb18030")
+
+
+def _player_table(rng, players):
+    rows = "".join(
+        f'<tr><td><img src="shirt.png"></td><td>{rng.randint(1, 99)} {rng.choice(TEAMS)[:3]}{i}({rng.choice(["门将", "后卫", "中场", "前锋"])})</td></tr>'
+        for i in range(players)
+    )
+    return f"<table>{rows}</table>"
+
+
+def _event_row(rng, home_side):
+    """
+    比赛进程表格中的一行事件，主队事件在左侧，客队事件在右侧
+    """
+    icon = f'<img src="/images/{rng.choice(_EVENT_ICONS)}">'
+    player = rng.choice(TEAMS)
+    cells = [icon, player, f"{rng.randint(1, 90)}'", "", ""] if home_side else ["", "", f"{rng.randint(1, 90)}'", player, icon]
+    return "<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>"
+
+
+def detail_page(events=40, seed=5):
+    """
+    生成比赛详情页面(detail.php)，返回gbk编码的字节
+
+    包含双方首发和替补名单、比赛进程和技术统计
+    """
+    rng = random.Random(seed)
+    sides = "".join(
+        f'<div class="box_side"><div class="title">{title}</div><div class="content">{_player_table(rng, players)}</div></div>'
+        for title, players in (("预计首发阵容", 11), ("后备", 9), ("预计首发阵容", 11), ("后备", 9))
+    )
+    event_rows = "".join(_event_row(rng, i % 2 == 1) for i in range(events))
+    stat_rows = "".join(
+        "<tr>"
+        f'<td><div class="bar_bg"><span style="width:{rng.randint(10, 200)}px"></span></div></td>'
+        f"<td>{rng.randint(0, 30)}</td><td>{label}</td><td>{rng.randint(0, 30)}</td>"
+        f'<td><div class="bar_bg"><span style="width:{rng.randint(10, 200)}px"></span></div></td>'
+        "</tr>"
+        for label in ("射门", "射正", "角球", "任意球", "犯规", "越位", "黄牌", "红牌", "控球率", "传球")
+    )
+    html = (
+        '<html><head><meta charset="gb2312"><title>比赛详情</title></head><body>'
+        f"{_PAGE_FILLER}{sides}"
+        f'<table class="mtable"><tr><th>主队</th><th></th><th>时间</th><th></th><th>客队</th></tr>{event_rows}</table>'
+        f'<div class="t2"><div style="padding:0 50px 30px 50px;"><table>{stat_rows}</table></div></div>'
+        "</body></html>"
+    )
+    return html.encode("gbk")
@@ -0,0 +1,287 @@
+# 旧版比赛列表解析实现
+# 原MatchScraper.fetch_live_matches中使用html.parser构建整棵文档树、再用CSS选择器逐行解析的代码，
+# 仅供基准测试对比耗时，并校验新解析器输出的比赛字典与旧实现完全一致
+
+import re
+
+from bs4 import BeautifulSoup
+
+from config import BASE_URL
+
+
+def legacy_parse_jc_fid_map(html):
+    """
+    旧版竞彩标识映射解析
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    jc_fid_map = {}
+    for row in soup.select("tr[gy]"):
+        fid = row.get("fid", "")
+        if not fid:
+            continue
+        tds = row.select("td")
+        if not tds:
+            continue
+        jc_td = tds[0]
+        if "checkbox" in str(jc_td):
+            jc_mark = jc_td.text.strip()
+            if jc_mark:
+                jc_fid_map[fid] = jc_mark
+    return jc_fid_map
+
+
+def legacy_parse_match_list(html, date=None, is_future_match=False, jc_fid_map=None):
+    """
+    旧版比赛列表解析
+    """
+    jc_fid_map = jc_fid_map or {}
+    soup = BeautifulSoup(html, "html.parser")
+    match_list = []
+    for row in soup.select("tr[gy]"):
+        match_list.append(_legacy_parse_match_row(row, date, is_future_match, jc_fid_map))
+    return match_list
+
+
+def _legacy_parse_match_row(row, date, is_future_match, jc_fid_map):
+    # 解析比赛信息
+    league_td = row.select_one(".ssbox_01")
+    league = league_td.select_one("a") if league_td else None
+
+    # 通过fid获取竞彩标识
+    fid = row.get("fid", "")
+    jc_mark = jc_fid_map.get(fid, "")
+
+    # 获取所有td元素
+    tds = row.select("td")
+
+    # 初始化变量
+    round_info = ""
+    match_time = ""
+    status_text = ""
+    home_team = ""
+    home_team_id = ""
+    away_team = ""
+    away_team_id = ""
+    home_score = ""
+    away_score = ""
+    half_score = ""
+
+    # 根据是否为历史比赛或未来比赛使用不同的列索引
+    if date:
+        if is_future_match:
+            # 未来比赛页面的列索引
+            # 确保所有字段都有默认值，避免None值导致的问题
+            round_info = tds[1].text.strip() if len(tds) > 1 else ""  # 轮数在第1列
+            match_time = tds[2].text.strip() if len(tds) > 2 else ""  # 时间在第2列
+            status_text = "未开始"  # 未来比赛状态默认为"未开始"
+
+            # 主队信息 - 未来比赛
+            if len(tds) > 3:
+                home_team_td = tds[3]  # 主队在第3列
+                home_team_a = home_team_td.select_one("a")
+                if home_team_a:
+                    home_team = home_team_a.text.strip()
+                    # 提取主队ID
+                    home_team_href = home_team_a.get("href", "")
+                    home_team_match = re.search(r"team/(\d+)", home_team_href)
+                    if home_team_match:
+                        home_team_id = home_team_match.group(1)
+                else:
+                    # 如果没有链接，直接取文本
+                    home_team = home_team_td.text.strip()
+
+            # 客队信息 - 未来比赛
+            if len(tds) > 5:
+                away_team_td = tds[5]  # 客队在第5列
+                away_team_a = away_team_td.select_one("a")
+                if away_team_a:
+                    away_team = away_team_a.text.strip()
+                    # 提取客队ID
+                    away_team_href = away_team_a.get("href", "")
+                    away_team_match = re.search(r"team/(\d+)", away_team_href)
+                    if away_team_match:
+                        away_team_id = away_team_match.group(1)
+                else:
+                    # 如果没有链接，直接取文本
+                    away_team = away_team_td.text.strip()
+
+            # 未来比赛还未开始，比分和半场比分都为空
+            home_score = ""
+            away_score = ""
+            half_score = ""
+            # 确保未来比赛状态被正确设置为"0"（未开始）
+            tr_status = "0"
+        else:
+            # 历史比赛页面的列索引（根据测试结果最终调整）
+            # 确保所有字段都有默认值，避免None值导致的问题
+            round_info = tds[1].text.strip() if len(tds) > 1 else ""  # 轮数在第1列
+            match_time = tds[2].text.strip() if len(tds) > 2 else ""  # 时间在第2列
+            status_text = tds[3].text.strip() if len(tds) > 3 else ""  # 状态在第3列
+
+            # 主队信息 - 历史比赛
+            if len(tds) > 4:
+                home_team_td = tds[4]  # 主队在第4列
+                home_team_a = home_team_td.select_one("a")
+                if home_team_a:
+                    home_team = home_team_a.text.strip()
+                    # 提取主队ID
+                    home_team_href = home_team_a.get("href", "")
+                    home_team_match = re.search(r"team/(\d+)", home_team_href)
+                    if home_team_match:
+                        home_team_id = home_team_match.group(1)
+                else:
+                    # 如果没有链接，直接取文本
+                    home_team = home_team_td.text.strip()
+
+            # 客队信息 - 历史比赛
+            if len(tds) > 6:
+                away_team_td = tds[6]  # 客队在第6列
+                away_team_a = away_team_td.select_one("a")
+                if away_team_a:
+                    away_team = away_team_a.text.strip()
+                    # 提取客队ID
+                    away_team_href = away_team_a.get("href", "")
+                    away_team_match = re.search(r"team/(\d+)", away_team_href)
+                    if away_team_match:
+                        away_team_id = away_team_match.group(1)
+                else:
+                    # 如果没有链接，直接取文本
+                    away_team = away_team_td.text.strip()
+
+            # 抓取比分信息 - 历史比赛
+            if len(tds) > 5:
+                score_td = tds[5]  # 全场比分在第5列
+                # 查找包含比分的元素
+                score_text = score_td.text.strip()
+                # 尝试从文本中提取比分，使用更宽松的正则表达式
+                score_match = re.search(r"(\d+)\s*[-:]\s*(\d+)", score_text)
+                if score_match:
+                    home_score = score_match.group(1)
+                    away_score = score_match.group(2)
+                else:
+                    # 如果没有找到正常比分，尝试查找可能的特殊格式
+                    home_score_match = re.search(r"^(\d+)\s*", score_text)
+                    away_score_match = re.search(r"\s*(\d+)$", score_text)
+                    if home_score_match and away_score_match:
+                        home_score = home_score_match.group(1)
+                        away_score = away_score_match.group(1)
+
+            # 半场比分 - 历史比赛
+            half_score = ""
+            if len(tds) > 7:
+                half_score_td = tds[7]  # 半场比分在第7列
+                half_score_text = half_score_td.text.strip()
+                # 尝试从文本中提取半场比分，使用更宽松的正则表达式
+                half_match = re.search(r"(\d+)\s*[-:]\s*(\d+)", half_score_text)
+                if half_match:
+                    half_score = f"{half_match.group(1)}-{half_match.group(2)}"
+    else:
+        # 直播比赛页面的列索引
+        if len(tds) > 2:
+            round_info = tds[2].text.strip()
+        if len(tds) > 3:
+            match_time = tds[3].text.strip()
+        if len(tds) > 4:
+            status_text = tds[4].text.strip()
+
+        # 主队信息 - 直播比赛
+        if len(tds) > 5:
+            home_team_td = tds[5]
+            home_team_a = home_team_td.select_one("a")
+            if home_team_a:
+                home_team = home_team_a.text.strip()
+                # 提取主队ID
+                home_team_href = home_team_a.get("href", "")
+                home_team_match = re.search(r"team/(\d+)", home_team_href)
+                if home_team_match:
+                    home_team_id = home_team_match.group(1)
+
+        # 客队信息 - 直播比赛
+        if len(tds) > 7:
+            away_team_td = tds[7]
+            away_team_a = away_team_td.select_one("a")
+            if away_team_a:
+                away_team = away_team_a.text.strip()
+                # 提取客队ID
+                away_team_href = away_team_a.get("href", "")
+                away_team_match = re.search(r"team/(\d+)", away_team_href)
+                if away_team_match:
+                    away_team_id = away_team_match.group(1)
+
+        # 抓取比分信息 - 直播比赛
+        pk_div = row.select_one(".pk")
+        if pk_div:
+            # 主队全场比分
+            clt1 = pk_div.select_one(".clt1")
+            if clt1:
+                home_score = clt1.text.strip()
+
+            # 客队全场比分
+            clt3 = pk_div.select_one(".clt3")
+            if clt3:
+                away_score = clt3.text.strip()
+
+        # 半场比分 - 直播比赛
+        if len(tds) > 8:
+            half_score = tds[8].text.strip()
+
+    # 获取tr标签的属性
+    tr_status = row.get("status", "")
+    fid = row.get("fid", "")
+    sid = row.get("sid", "")
+
+    # 统一的状态映射
+    status_map = {
+        "未开始": "0",
+        "上半场": "1",
+        "中场结束": "2",
+        "下半场": "3",
+        "已结束": "4",
+        "完": "4",
+        "改期": "6",
+        "待定": "9",
+        "加时赛开始": "10"
+    }
+
+    # 对于历史和未来比赛，如果tr_status为空或无效，根据status_text设置合适的status值
+    if date:
+        if not tr_status or tr_status not in status_map.values():
+            tr_status = status_map.get(status_text, "")
+
+    # 获取联赛td的背景色
+    league_bgcolor = league_td.get("bgcolor", "") if league_td else ""
+
+    # 构造logo链接
+    home_team_logo = (
+        BASE_URL["TEAM_LOGO_BASE"].format(team_id=home_team_id)
+        if home_team_id
+        else ""
+    )
+    away_team_logo = (
+        BASE_URL["TEAM_LOGO_BASE"].format(team_id=away_team_id)
+        if away_team_id
+        else ""
+    )
+
+    # 创建比赛字典
+    match = {
+        "league": league.text.strip() if league else "",
+        "league_bgcolor": league_bgcolor,
+        "round": round_info,
+        "match_time": match_time,
+        "status_text": status_text,
+        "status": tr_status,
+        "fid": fid,
+        "sid": sid,
+        "jc_mark": jc_mark,
+        "home_team": home_team,
+        "home_team_id": home_team_id,
+        "home_team_logo": home_team_logo,
+        "away_team": away_team,
+        "away_team_id": away_team_id,
+        "away_team_logo": away_team_logo,
+        "home_score": home_score,
+        "away_score": away_score,
+        "half_score": half_score,
+    }
+    return match
@@ -0,0 +1,540 @@
+# 缓存模块
+# 提供带有效期(TTL)和LRU淘汰策略的线程安全缓存，用于复用上游页面的下载和解析结果
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config import (JC_FID_MAP_STALE_TTL, JC_FID_MAP_TTL,
+                    PAGE_CACHE_MAX_ENTRIES, PAGE_CACHE_STALE_TTL,
+                    PAGE_CACHE_TTL, SERIALIZED_CACHE_MAX_ENTRIES,
+                    SINGLE_FLIGHT_MEMO_SECONDS)
+from metrics import page_decode_seconds, page_parse_seconds, page_type_of
+
+
+class TTLCache:
+    """带有效期和LRU淘汰的线程安全缓存"""
+
+    def __init__(self, max_entries, default_ttl, stale_ttl=0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl  # 过期后继续保留的时间，供get_stale使用
+        self._data = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, min_remaining=0):
+        """
+        获取未过期的缓存值，不存在或已过期时返回None
+
+        :param min_remaining: 剩余有效时间不足该秒数的值也按已过期处理
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= now + min_remaining:
+                if expires_at + self.stale_ttl <= now:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            # 命中后移动到末尾，表示最近使用
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        写入缓存值，超出容量时淘汰最久未使用的条目
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return value
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_stale(self, key):
+        """
+        获取缓存值，已过期但仍在stale_ttl保留期内的值也会返回，不计入命中统计
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] + self.stale_ttl <= now:
+                return None
+            return item[1]
+
+    def export(self, limit=None):
+        """
+        导出仍在保留期内的条目，最近使用的在最后
+
+        :param limit: 只导出最近使用的limit个条目
+        :return: [(key, 值, 剩余有效时间)]，已过期但仍在保留期内的条目剩余时间为负数
+        """
+        now = time.monotonic()
+        with self._lock:
+            items = [
+                (key, value, expires_at - now)
+                for key, (expires_at, value) in self._data.items()
+                if expires_at + self.stale_ttl > now
+            ]
+        return items[-limit:] if limit else items
+
+    def restore(self, key, value, remaining):
+        """
+        写入export导出的条目，remaining为负数时条目按已过期处理，只能通过get_stale获取
+        """
+        if remaining + self.stale_ttl <= 0:
+            return
+        with self._lock:
+            if key in self._data:
+                return
+            self._data[key] = (time.monotonic() + remaining, value)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        删除指定的缓存条目
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        清空缓存和统计数据
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        获取缓存统计信息
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class CachedPage:
+    """缓存的上游页面，同时保存原始字节、解码文本和解析后的文档树"""
+
+    def __init__(self, url, content, status_code=200, headers=None, encoding=None):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.encoding = encoding
+        self._content_hash = None
+        self._texts = {}
+        self._trees = {}
+        self._derived = {}
+        self._serializable = set()  # 登记为可预先序列化的计算结果的key，这些结果是纯JSON数据，可以写入启动快照
+        self._lock = threading.Lock()
+        self._derived_lock = threading.Lock()
+
+    @classmethod
+    def from_response(cls, response, url=None):
+        """
+        从requests的响应对象创建缓存页面
+        """
+        return cls(
+            url or response.url,
+            response.content,
+            response.status_code,
+            response.headers,
+            response.encoding,
+        )
+
+    @property
+    def content_hash(self):
+        """
+        页面内容的摘要，用于在上游不提供验证器时判断页面是否变化
+        """
+        if self._content_hash is None:
+            self._content_hash = hashlib.blake2b(self.content, digest_size=16).hexdigest()
+        return self._content_hash
+
+    def validator_headers(self):
+        """
+        根据上游返回的ETag和Last-Modified生成条件请求头
+        """
+        headers = {}
+        etag = self.headers.get("ETag")
+        if etag:
+            headers["If-None-Match"] = etag
+        last_modified = self.headers.get("Last-Modified")
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def get_text(self, encoding=None):
+        """
+        获取按指定编码解码后的页面文本，同一编码只解码一次
+        """
+        encoding = encoding or self.encoding or "utf-8"
+        text = self._texts.get(encoding)
+        if text is None:
+            with page_decode_seconds.time(page_type=page_type_of(self.url), encoding=encoding):
+                text = self.content.decode(encoding, errors="replace")
+            self._texts[encoding] = text
+        return text
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    def soup(self, parser="lxml", encoding=None):
+        """
+        获取页面的BeautifulSoup文档树，同一解析器和编码只解析一次
+
+        返回的文档树由所有调用方共享，只能读取，不能修改
+        """
+        from bs4 import BeautifulSoup
+
+        key = (parser, encoding or self.encoding)
+        tree = self._trees.get(key)
+        if tree is not None:
+            page_cache.count_parse(hit=True)
+            return tree
+        with self._lock:
+            # 等待锁期间其他线程可能已经完成解析
+            tree = self._trees.get(key)
+            if tree is None:
+                text = self.get_text(encoding)
+                with page_parse_seconds.time(page_type=page_type_of(self.url), parser=parser):
+                    tree = BeautifulSoup(text, parser)
+                self._trees[key] = tree
+                page_cache.count_parse(hit=False)
+            else:
+                page_cache.count_parse(hit=True)
+        return tree
+
+    def derived(self, key, build, serialize=False):
+        """
+        获取从页面计算出的数据（如解析结果和统计数据），同一key只计算一次
+
+        页面内容未变化时缓存沿用旧页面，计算结果也随之复用；返回值由所有调用方共享，只能读取
+        :param serialize: 为True时把结果登记到serialized_cache，接口直接返回它时JSON只编码一次
+        """
+        if key in self._derived:
+            return self._derived[key]
+        with self._derived_lock:
+            if key not in self._derived:
+                value = build()
+                if serialize:
+                    serialized_cache.register(value)
+                    self._serializable.add(key)
+                self._derived[key] = value
+            return self._derived[key]
+
+    def export_derived(self):
+        """
+        导出登记为可预先序列化的计算结果：{key: 值}
+        """
+        with self._derived_lock:
+            return {key: self._derived[key] for key in self._serializable if key in self._derived}
+
+    def restore_derived(self, values):
+        """
+        写入export_derived导出的计算结果，页面不需要重新解析
+        """
+        with self._derived_lock:
+            for key, value in values.items():
+                if key not in self._derived:
+                    serialized_cache.register(value)
+                    self._serializable.add(key)
+                    self._derived[key] = value
+
+    def to_response(self):
+        """
+        构造一个新的requests响应对象，调用方修改编码不会影响缓存
+        """
+        response = requests.Response()
+        response._content = self.content
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response.url = self.url
+        return response
+
+
+class PageCache(TTLCache):
+    """按URL缓存上游页面的原始字节和解析结果"""
+
+    def __init__(
+        self,
+        max_entries=PAGE_CACHE_MAX_ENTRIES,
+        default_ttl=PAGE_CACHE_TTL,
+        stale_ttl=PAGE_CACHE_STALE_TTL,
+    ):
+        super().__init__(max_entries, default_ttl, stale_ttl)
+        self.parse_hits = 0
+        self.parse_misses = 0
+        self.revalidated = 0
+        self.unchanged = 0
+
+    def count_parse(self, hit):
+        """
+        记录一次文档树的复用或解析，多个线程同时解析页面时计数不会丢失
+        """
+        with self._lock:
+            if hit:
+                self.parse_hits += 1
+            else:
+                self.parse_misses += 1
+
+    def revalidation_headers(self, url):
+        """
+        为已过期的缓存页面生成条件请求头，没有可用的旧页面时返回(None, {})
+
+        :return: (旧页面, 条件请求头)
+        """
+        stale = self.get_stale(url)
+        if stale is None:
+            return None, {}
+        return stale, stale.validator_headers()
+
+    def store(self, url, page, ttl=None, stale=None, status_code=None):
+        """
+        写入新下载的页面
+
+        上游返回304时直接续期旧页面；返回200但内容摘要与旧页面相同时也沿用旧页面，
+        这样旧页面上已解析的文档树可以继续复用，不必重新解析
+
+        :param status_code: 本次请求的状态码，为304时page可以为None
+        :return: 最终写入缓存的页面
+        """
+        if stale is not None:
+            if status_code == 304:
+                self.revalidated += 1
+                return self.set(url, stale, ttl)
+            if page is not None and page.content_hash == stale.content_hash:
+                self.unchanged += 1
+                # 更新验证器，下次条件请求使用最新的ETag和Last-Modified
+                stale.headers.update(
+                    {k: v for k, v in page.headers.items() if k.lower() in ("etag", "last-modified")}
+                )
+                return self.set(url, stale, ttl)
+        if page is None:
+            return None
+        return self.set(url, page, ttl)
+
+    def clear(self):
+        super().clear()
+        self.parse_hits = 0
+        self.parse_misses = 0
+        self.revalidated = 0
+        self.unchanged = 0
+
+    def stats(self):
+        stats = super().stats()
+        stats["parse_hits"] = self.parse_hits
+        stats["parse_misses"] = self.parse_misses
+        stats["revalidated"] = self.revalidated
+        stats["unchanged"] = self.unchanged
+        return stats
+
+
+class _Call:
+    """SingleFlight中正在执行的一次调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    合并同一key的并发调用：同一时刻只有一个调用真正执行，其余调用等待并共享其结果
+
+    调用成功后结果会在memo_seconds内继续复用，避免紧随其后的请求再次触发上游抓取
+    """
+
+    def __init__(self, memo_seconds=0):
+        self.memo_seconds = memo_seconds
+        self._calls = {}  # key -> _Call
+        self._memo = {}  # key -> (过期时间, 结果)
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        执行fn(*args, **kwargs)，同一key的并发调用只执行一次
+        """
+        with self._lock:
+            memo = self._memo.get(key)
+            if memo is not None and memo[0] > time.monotonic():
+                self.shared += 1
+                return memo[1]
+
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if self.memo_seconds > 0 and call.error is None and call.result is not None:
+                    now = time.monotonic()
+                    # 顺便清理已过期的结果，避免memo无限增长
+                    for expired_key in [k for k, (exp, _) in self._memo.items() if exp <= now]:
+                        del self._memo[expired_key]
+                    self._memo[key] = (now + self.memo_seconds, call.result)
+            call.event.set()
+
+    def forget(self, key):
+        """
+        丢弃指定key的复用结果
+        """
+        with self._lock:
+            self._memo.pop(key, None)
+
+    def stats(self):
+        """
+        获取合并统计信息
+        """
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "shared": self.shared,
+                "in_flight": len(self._calls),
+            }
+
+
+class SerializedCache:
+    """
+    缓存结果的JSON序列化字节，按对象身份查找
+
+    只登记随页面缓存、不再修改的计算结果；JSON提供者第一次输出时保存编码后的字节和摘要，
+    之后同一对象直接复用。条目持有对象本身的引用，条目存在期间对象的id不会被其他对象复用
+    """
+
+    def __init__(self, max_entries=SERIALIZED_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id(对象) -> [对象, 字节, 摘要]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def register(self, value):
+        """
+        登记一个可以预先序列化的对象，None和空数据不登记
+        """
+        if not value or not isinstance(value, (dict, list)):
+            return
+        with self._lock:
+            if id(value) in self._entries:
+                return
+            self._entries[id(value)] = [value, None, None]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def lookup(self, value):
+        """
+        查找对象的序列化结果
+
+        :return: (是否已登记, 字节, 摘要)，尚未序列化时字节和摘要为None
+        """
+        with self._lock:
+            entry = self._entries.get(id(value))
+            if entry is None or entry[0] is not value:
+                return False, None, None
+            self._entries.move_to_end(id(value))
+            if entry[1] is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return True, entry[1], entry[2]
+
+    def store(self, value, data, digest):
+        """
+        保存已登记对象的序列化字节和摘要
+        """
+        with self._lock:
+            entry = self._entries.get(id(value))
+            if entry is not None and entry[0] is value:
+                entry[1] = data
+                entry[2] = digest
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "serialized": sum(1 for entry in self._entries.values() if entry[1] is not None),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# 全局页面缓存
+page_cache = PageCache()
+
+# 页面下载合并：缓存未命中时同一URL的并发请求只下载一次
+page_flight = SingleFlight()
+
+# 比赛详情合并：detail.php的下载和解析在并发调用间共享
+match_details_flight = SingleFlight(SINGLE_FLIGHT_MEMO_SECONDS)
+
+# 竞彩标识映射缓存：过期后先返回旧映射，再在后台刷新
+jc_fid_map_cache = TTLCache(1, JC_FID_MAP_TTL, JC_FID_MAP_STALE_TTL)
+
+# 竞彩标识映射合并：缓存未命中时并发请求只下载和解析一次
+jc_fid_map_flight = SingleFlight()
+
+# 缓存结果的JSON序列化字节：接口直接返回缓存中的解析结果时跳过编码
+serialized_cache = SerializedCache()
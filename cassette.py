@@ -0,0 +1,129 @@
+# 录制回放模块
+# 在请求层录制上游响应（URL、状态码、响应头和原始字节），并在回放模式下直接返回录制的响应，
+# 用于在不访问500.com的情况下压测Flask应用和分析抓取器性能
+#
+# 通过环境变量切换模式:
+#   SCRAPER_CASSETTE_MODE=record  请求照常发出，成功的响应写入录制目录
+#   SCRAPER_CASSETTE_MODE=replay  不访问网络，只返回录制的响应，没有录制的URL按404处理
+#   SCRAPER_CASSETTE_DIR=目录      录制目录，默认cassettes
+
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+from cache import CachedPage
+from config import CASSETTE_DIR, CASSETTE_MODE
+from logger import get_logger
+
+# 创建日志记录器
+logger = get_logger("cassette")
+
+
+class CassetteStore:
+    """
+    按URL保存上游响应的录制目录
+
+    每个URL对应两个文件：<主机>/<URL摘要>.json保存URL、状态码和响应头，
+    <主机>/<URL摘要>.body保存原始字节，同一URL重复录制时保留最新的响应
+    """
+
+    def __init__(self, directory=CASSETTE_DIR, mode=CASSETTE_MODE):
+        self.directory = directory
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _paths(self, url):
+        host = urlsplit(url).hostname or "unknown"
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+        base = os.path.join(self.directory, host, digest)
+        return base + ".json", base + ".body"
+
+    def record(self, url, status_code, headers, content, encoding=None):
+        """
+        录制一个响应，先写临时文件再替换，并发录制同一URL时不会读到不完整的文件
+
+        只录制带内容的200响应：条件请求返回的304没有内容，回放时没有旧页面可以续期，
+        覆盖之前录制的完整响应会让回放失败
+
+        :return: 是否已录制
+        """
+        if status_code != 200 or not content:
+            logger.debug("跳过录制非200或空内容的响应: %s, 状态码: %s", url, status_code)
+            return False
+        meta_path, body_path = self._paths(url)
+        meta = {
+            "url": url,
+            "status_code": status_code,
+            "headers": dict(headers),
+            "encoding": encoding,
+            "size": len(content),
+        }
+        suffix = f".{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            with open(body_path + suffix, "wb") as f:
+                f.write(content)
+            with open(meta_path + suffix, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.replace(body_path + suffix, body_path)
+            os.replace(meta_path + suffix, meta_path)
+        except OSError as e:
+            # 录制失败不影响正常请求
+            logger.error("录制响应失败: %s, 错误: %s", url, e)
+            return False
+        with self._lock:
+            self.recorded += 1
+        logger.debug("已录制响应: %s, 大小: %s字节", url, len(content))
+        return True
+
+    def replay(self, url):
+        """
+        获取录制的响应
+
+        :return: CachedPage，没有录制时返回None
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.missed += 1
+            logger.warning("回放模式下没有录制的响应: %s", url)
+            return None
+
+        with self._lock:
+            self.replayed += 1
+        return CachedPage(url, content, meta["status_code"], meta["headers"], meta.get("encoding"))
+
+    def stats(self):
+        """
+        获取录制回放统计信息
+        """
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "directory": self.directory,
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "missed": self.missed,
+            }
+
+
+# 全局录制目录
+cassette = CassetteStore()
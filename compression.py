@@ -0,0 +1,119 @@
+# 响应压缩模块
+# 为api_bp的JSON响应设置强ETag，支持If-None-Match条件请求返回304，并按Accept-Encoding使用brotli或gzip压缩。
+# ETag由响应内容的哈希值和压缩方式组成；压缩结果按同一个哈希值缓存，
+# 多个客户端请求相同内容（例如缓存中的同一份欧赔数据）时只压缩一次，304响应不做任何压缩
+#
+# brotli为可选依赖，没有安装时只使用gzip
+
+import gzip
+import hashlib
+import threading
+
+from cache import TTLCache
+from config import (COMPRESSION_BROTLI_QUALITY, COMPRESSION_CACHE_MAX_ENTRIES,
+                    COMPRESSION_CACHE_TTL, COMPRESSION_GZIP_LEVEL,
+                    COMPRESSION_MIN_SIZE)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 支持的压缩方式，按优先级排列：(Content-Encoding, ETag后缀, 压缩函数)
+ENCODINGS = [("gzip", "gz", lambda body: gzip.compress(body, COMPRESSION_GZIP_LEVEL, mtime=0))]
+if brotli is not None:
+    ENCODINGS.insert(0, ("br", "br", lambda body: brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)))
+
+
+def body_digest(body):
+    """
+    响应内容的哈希值，用作ETag和压缩缓存的键
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseEncoder:
+    """
+    JSON响应的ETag和压缩处理，压缩结果按(内容哈希, 压缩方式)缓存
+    """
+
+    def __init__(self, min_size=COMPRESSION_MIN_SIZE):
+        self.min_size = min_size
+        self.cache = TTLCache(COMPRESSION_CACHE_MAX_ENTRIES, COMPRESSION_CACHE_TTL)
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @staticmethod
+    def _choose_encoding(request):
+        for encoding in ENCODINGS:
+            if request.accept_encodings[encoding[0]] > 0:
+                return encoding
+        return None
+
+    def process(self, request, response):
+        """
+        为响应设置ETag，客户端缓存仍然有效时改为304，否则按客户端支持的方式压缩
+
+        只处理GET/HEAD请求的200 JSON响应，流式响应（SSE、NDJSON）保持原样
+        """
+        if (
+            request.method not in ("GET", "HEAD")
+            or response.status_code != 200
+            or response.mimetype != "application/json"
+            or response.is_streamed
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        body = response.get_data()
+        # JSON提供者复用预先序列化的字节时同时带有摘要
+        digest = getattr(response, "body_digest", None) or body_digest(body)
+        encoding = self._choose_encoding(request) if len(body) >= self.min_size else None
+        response.vary.add("Accept-Encoding")
+        # 压缩后的内容是不同的表示，强ETag需要区分
+        response.set_etag(f"{digest}-{encoding[1]}" if encoding else digest)
+        if "Cache-Control" not in response.headers:
+            # 允许浏览器缓存，但每次使用前都用ETag向服务器确认
+            response.headers["Cache-Control"] = "no-cache"
+
+        response.make_conditional(request)
+        if response.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+            return response
+        if encoding is None:
+            return response
+
+        name, suffix, compress = encoding
+        key = (digest, suffix)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.cache.set(key, compress(body))
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = name
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        return response
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "encodings": [encoding[0] for encoding in ENCODINGS],
+                "not_modified": self.not_modified,
+                "compressed": self.compressed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+            }
+        stats["cache"] = self.cache.stats()
+        return stats
+
+
+# 全局响应压缩处理
+response_encoder = ResponseEncoder()
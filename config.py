@@ -1,10 +1,113 @@
 # 配置文件
 # 存放应用程序的全局配置信息
 
+import os
+import tempfile
+
 # 请求配置
 MAX_RETRIES = 5  # 增加重试次数，配合指数退避策略
 REQUEST_TIMEOUT = 20  # 增加超时时间，应对网络波动
 
+# 页面缓存配置
+PAGE_CACHE_MAX_ENTRIES = 128  # 页面缓存最大条目数，超出后按LRU淘汰
+PAGE_CACHE_TTL = 60  # 页面缓存有效期（秒）
+LIVE_PAGE_CACHE_TTL = 10  # live.500.com的页面变化较快，缓存时间较短
+PAGE_CACHE_STALE_TTL = 600  # 过期页面继续保留的时间（秒），用于ETag/Last-Modified条件请求和内容比对
+SINGLE_FLIGHT_MEMO_SECONDS = 3  # 合并请求完成后结果的复用时间（秒）
+JC_FID_MAP_TTL = 600  # 竞彩标识映射的缓存有效期（秒），过期后在后台刷新
+JC_FID_MAP_STALE_TTL = 86400  # 竞彩标识映射一天内变化很少，过期后仍可继续使用的时间（秒）
+SERIALIZED_CACHE_MAX_ENTRIES = 512  # 保存JSON序列化字节的缓存结果数
+
+# 接口响应压缩配置
+COMPRESSION_MIN_SIZE = 1024  # 小于该字节数的响应不压缩
+COMPRESSION_GZIP_LEVEL = 6  # gzip压缩级别
+COMPRESSION_BROTLI_QUALITY = 5  # brotli压缩质量，动态内容取中等质量兼顾速度
+COMPRESSION_CACHE_MAX_ENTRIES = 256  # 缓存的压缩结果数，相同响应内容只压缩一次
+COMPRESSION_CACHE_TTL = 600  # 压缩结果的缓存时间（秒）
+
+# JSON序列化配置
+# orjson: 使用orjson（未安装时回退到标准库）；default: 使用Flask默认的标准库json
+JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "orjson")
+
+# 启动快照配置，用于阿里云函数计算、Vercel等按需启动的部署
+# 定期把最近的页面缓存、竞彩标识映射、直播比分快照和上游会话设置写入本地文件，新实例初始化时恢复；为空时不使用
+WARM_STATE_PATH = os.environ.get("WARM_STATE_PATH", "")
+WARM_STATE_MAX_PAGES = 32  # 快照中保存的最近使用的页面数
+WARM_STATE_SAVE_INTERVAL = 30  # 两次保存快照的最短间隔（秒）
+WARM_STATE_MAX_AGE = 1800  # 超过该时间（秒）的快照不再恢复
+WARM_STATE_LIVE_MAX_AGE = 120  # 直播比赛列表只在保存后该时间（秒）内恢复，更早的比分需要重新轮询
+
+# 并发抓取配置
+FANOUT_MAX_WORKERS = 16  # 并发抓取线程池大小
+FANOUT_PAGE_TIMEOUT = 15  # 并发抓取时每个页面的时间预算（秒），超时的部分返回错误标记
+ODDS_BATCH_MAX_IDS = 1000  # 批量赔率接口单次请求的最大比赛数
+ODDS_BATCH_MAX_IN_FLIGHT = 2  # 每个批量赔率请求同时抓取的比赛数，每场比赛4个页面
+ODDS_BATCH_WORKERS = 4  # 所有批量请求共用的专用线程数，远小于FANOUT_MAX_WORKERS，不影响交互请求
+STREAM_CHUNK_SIZE = 4096  # 流式响应把小片段合并到该字符数后再输出，减少写入次数
+
+# 上游限流配置
+# max_concurrent: 同一主机同时进行的请求数上限（包括重试期间）
+# rate: 每秒请求数上限，burst: 允许的瞬时突发请求数
+UPSTREAM_LIMITS = {
+    "live.500.com": {"max_concurrent": 4, "rate": 4.0, "burst": 8},
+    "odds.500.com": {"max_concurrent": 6, "rate": 6.0, "burst": 12},
+    "liansai.500.com": {"max_concurrent": 2, "rate": 2.0, "burst": 4},
+}
+DEFAULT_UPSTREAM_LIMIT = {"max_concurrent": 3, "rate": 3.0, "burst": 6}
+
+# 会话连接池配置（按上游主机分别维护）
+SESSION_POOL = {
+    "max_sessions": 6,  # 每个主机保留的空闲会话数上限
+    "pool_connections": 4,  # 每个会话缓存的连接池数量
+    "pool_maxsize": 8,  # 每个连接池保持的keep-alive连接数上限
+    "idle_timeout": 60,  # 会话空闲超过该时间（秒）后关闭，避免复用已被服务器断开的连接
+}
+
+# 异步抓取配置
+ASYNC_MAX_CONNECTIONS = 200  # 异步连接池的最大连接数
+ASYNC_MAX_CONNECTIONS_PER_HOST = 20  # 异步连接池对单个上游主机的最大连接数
+
+# 直播比分推送配置
+LIVE_FEED_INTERVAL = 10  # 后台轮询直播比赛列表的间隔（秒），与live.500.com的页面缓存时间一致
+LIVE_FEED_IDLE_TIMEOUT = 300  # 超过该时间（秒）没有客户端访问时停止轮询，避免无人观看时持续请求上游
+LIVE_FEED_TOMBSTONE_TTL = 3600  # 已从列表移除的比赛保留删除记录的时间（秒），更早的版本号需要重新获取完整列表
+LIVE_STREAM_BUFFER_SIZE = 1000  # SSE事件环形缓冲区大小，落后超过该数量的慢客户端收到resync事件后重新获取完整列表
+# SSE推送需要边生成边发送响应的WSGI服务器（gunicorn、waitress等），函数计算和Vercel的入口会缓冲整个响应，
+# 推送连接永远不会返回，这些部署中设为0关闭推送，客户端改用/api/live/changes轮询
+LIVE_STREAM_ENABLED = os.environ.get("LIVE_STREAM_ENABLED", "1") != "0"
+LIVE_STREAM_MAX_SUBSCRIBERS = 200  # 单个进程允许的SSE连接数上限，每个连接在等待事件时占用一个线程，发布事件时唤醒所有连接
+LIVE_STREAM_HEARTBEAT = 15  # 没有事件时发送心跳注释的间隔（秒），用于检测断开的连接和防止代理超时
+LIVE_STREAM_MAX_WATCH = 20  # 单个SSE连接最多关注的比赛数（推送即时欧赔变化）
+LIVE_STREAM_MAX_WATCHED = 200  # 所有连接关注的比赛总数上限，超出后新关注的比赛不推送欧赔，即时欧赔轮询的上游请求量不随客户端增长
+LIVE_ODDS_INTERVAL = 30  # 后台轮询被关注比赛即时欧赔的间隔（秒）
+LIVE_ODDS_WORKERS = 2  # 即时欧赔轮询的专用线程数，不占用交互请求的并发抓取线程池
+
+# 预取配置
+# 首页渲染比赛列表后，在后台按优先级预先下载比赛弹窗需要的页面，首次点击比赛时直接命中页面缓存
+PREFETCH_MAX_MATCHES = 12  # 每次预取的比赛数上限，每场4个页面，避免挤占页面缓存中交互请求的条目
+PREFETCH_REFRESH = 60  # 同一场比赛两次预取的最小间隔（秒），剩余有效期不足该时间的页面在预取时提前刷新
+PREFETCH_PAGE_TTL = 90  # 预取页面的缓存有效期（秒），长于PREFETCH_REFRESH，下一轮预取前页面不会过期
+PREFETCH_RESERVE = 1  # 给交互请求保留的并发名额和令牌数，不足时预取暂停
+PREFETCH_YIELD_DELAY = 0.5  # 上游繁忙时预取暂停的时间（秒）
+
+# 赔率历史配置
+# 后台定时记录比赛各公司的欧赔、亚盘和大小球即时赔率，赔率走势直接从数据库读取
+# SQLite数据库文件，默认放在临时目录：函数计算、Vercel等部署中只有/tmp可写；设置为空时不记录赔率历史
+ODDS_STORE_PATH = os.environ.get("ODDS_STORE_PATH", os.path.join(tempfile.gettempdir(), "wulong_odds_history.sqlite3"))
+ODDS_RECORD_INTERVAL = 300  # 记录赔率快照的间隔（秒）
+ODDS_RECORD_MAX_MATCHES = 12  # 每轮记录的比赛数上限，按预取优先级选择未结束的比赛
+ODDS_STORE_RETENTION_DAYS = 30  # 赔率历史保留的天数
+
+# 泊松比分模型配置
+POISSON_LAMBDA_DECIMALS = 2  # 预期进球四舍五入的小数位数，相同λ的请求共享缓存结果
+POISSON_CACHE_SIZE = 4096  # 缓存的λ组合数
+POISSON_MAX_LAMBDA = 10  # 接口允许的最大预期进球
+
+# 录制回放配置，用于离线压测和性能分析
+# off: 正常请求；record: 正常请求并录制响应；replay: 只返回录制的响应，不访问网络
+CASSETTE_MODE = os.environ.get("SCRAPER_CASSETTE_MODE", "off")
+CASSETTE_DIR = os.environ.get("SCRAPER_CASSETTE_DIR", "cassettes")  # 录制目录
+
 # 废弃的配置参数
 # RETRY_DELAY_SECONDS = 2  # 已被指数退避策略取代
 
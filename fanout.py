@@ -0,0 +1,136 @@
+# 并发抓取模块
+# 使用有界线程池并发执行相互独立的上游抓取任务，并为每个任务设置时间预算
+
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from config import FANOUT_MAX_WORKERS, FANOUT_PAGE_TIMEOUT, ODDS_BATCH_WORKERS
+from logger import get_logger
+
+# 创建日志记录器
+logger = get_logger("fanout")
+
+# 全局有界线程池，所有并发抓取共享，避免线程数随请求量无限增长
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+# 批量抓取专用的有界线程池，批量接口不会占满共享线程池，交互请求不必在它后面排队
+batch_executor = ThreadPoolExecutor(max_workers=ODDS_BATCH_WORKERS, thread_name_prefix="fanout-batch")
+
+
+def submit(fn, *args, **kwargs):
+    """
+    向共享线程池提交一个任务
+
+    :return: concurrent.futures.Future
+    """
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def run_parallel(tasks, timeout=FANOUT_PAGE_TIMEOUT):
+    """
+    并发执行多个任务，超过时间预算的任务返回None并记录错误标记
+
+    超时的任务不会被取消，它会在后台继续执行并写入页面缓存，下一次请求可以直接命中
+
+    :param tasks: 字典，{名称: (函数, 参数1, 参数2, ...)}
+    :param timeout: 时间预算（秒），所有任务同时开始，因此同时也是每个页面的时间预算
+    :return: (结果字典, 错误字典)，错误字典只包含失败或超时的任务
+    """
+    futures = {name: submit(fn, *args) for name, (fn, *args) in tasks.items()}
+    deadline = time.monotonic() + timeout
+
+    results = {}
+    errors = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            logger.warning(f"任务 {name} 超过时间预算 {timeout} 秒")
+            results[name] = None
+            errors[name] = "timeout"
+        except Exception as e:
+            logger.error(f"任务 {name} 执行失败: {e}")
+            results[name] = None
+            errors[name] = str(e)
+    return results, errors
+
+
+# iter_parallel中表示项目已取完的标记
+_END = object()
+
+
+def iter_parallel(items, make_tasks, max_in_flight, timeout=FANOUT_PAGE_TIMEOUT, executor=None):
+    """
+    分批并发执行大量项目的任务，每个项目的所有任务完成后立即产出结果
+
+    同时执行任务的项目不超过max_in_flight个，一个项目的任务全部结束后才开始下一个，
+    内存占用和线程池队列长度都与项目总数无关；结果按完成顺序产出，不保证与items的顺序一致。
+    超过时间预算的项目先产出部分结果，但它的任务仍占用名额，直到真正结束后才开始新的项目。
+    生成器被提前关闭（例如客户端断开）时不再开始新的项目，已开始的任务在后台完成并写入页面缓存
+
+    :param items: 项目的可迭代对象
+    :param make_tasks: 函数，接收一个项目，返回与run_parallel相同格式的任务字典
+    :param max_in_flight: 同时执行任务的最大项目数
+    :param timeout: 每个项目的时间预算（秒），从该项目开始执行时计算
+    :param executor: 执行任务的线程池，默认使用共享线程池
+    :return: 生成器，产出(项目, 结果字典, 错误字典)
+    """
+    executor = executor or _executor
+    items = iter(items)
+    done = queue.Queue()
+    running = {}  # 序号 -> [项目, {名称: Future}, 截止时间, 是否已产出]
+    next_id = 0
+
+    def start_next():
+        nonlocal next_id
+        item = next(items, _END)
+        if item is _END:
+            return False
+        futures = {}
+        for name, (fn, *args) in make_tasks(item).items():
+            future = executor.submit(fn, *args)
+            futures[name] = future
+            future.add_done_callback(lambda _, item_id=next_id: done.put(item_id))
+        running[next_id] = [item, futures, time.monotonic() + timeout, False]
+        next_id += 1
+        return True
+
+    def collect(item, futures):
+        results = {}
+        errors = {}
+        for name, future in futures.items():
+            if not future.done():
+                logger.warning(f"任务 {item}/{name} 超过时间预算 {timeout} 秒")
+                results[name] = None
+                errors[name] = "timeout"
+            elif future.exception() is not None:
+                logger.error(f"任务 {item}/{name} 执行失败: {future.exception()}")
+                results[name] = None
+                errors[name] = str(future.exception())
+            else:
+                results[name] = future.result()
+        return results, errors
+
+    while len(running) < max_in_flight and start_next():
+        pass
+
+    while running:
+        # 只剩已产出、等待任务结束的项目时不设超时
+        deadlines = [entry[2] for entry in running.values() if not entry[3]]
+        try:
+            done.get(timeout=max(0, min(deadlines) - time.monotonic()) if deadlines else None)
+        except queue.Empty:
+            pass
+
+        now = time.monotonic()
+        for i, entry in list(running.items()):
+            item, futures, deadline, reported = entry
+            if not reported and (deadline <= now or all(f.done() for f in futures.values())):
+                entry[3] = True
+                yield (item, *collect(item, futures))
+            if entry[3] and all(f.done() for f in futures.values()):
+                # 任务全部结束、释放了线程后才开始下一个项目
+                del running[i]
+                start_next()
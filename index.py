@@ -1,8 +1,17 @@
 # Aliyun Function Compute entry file
 # This file contains the handler function that FC will invoke
 
+import base64
 import json
+import os
 from urllib.parse import parse_qs
+
+# Keep a warm-state snapshot in /tmp so a re-initialized instance starts with recent caches
+os.environ.setdefault('WARM_STATE_PATH', '/tmp/wulong_warm_state.json')
+# The handler buffers the whole response body, so an SSE stream would never complete;
+# /api/live/stream answers 501 and clients poll /api/live/changes instead
+os.environ.setdefault('LIVE_STREAM_ENABLED', '0')
+
 from main import app
 
 def handler(event, context):
@@ -66,10 +75,21 @@ def handler(event, context):
     # Convert to FC response format
     response_status = int(captured_status.split(' ')[0]) if captured_status else 500
     response_headers = {k: v for k, v in captured_headers} if captured_headers else {}
-    response_body = b''.join(response_data).decode('utf-8')
+    response_body = b''.join(response_data)
+    
+    # Compressed (br/gzip) and other binary bodies must be passed base64-encoded
+    is_base64 = 'Content-Encoding' in response_headers
+    if not is_base64:
+        try:
+            body_text = response_body.decode('utf-8')
+        except UnicodeDecodeError:
+            is_base64 = True
+    if is_base64:
+        body_text = base64.b64encode(response_body).decode('ascii')
     
     return {
         'statusCode': response_status,
         'headers': response_headers,
-        'body': response_body
+        'body': body_text,
+        'isBase64Encoded': is_base64
     }
\ No newline at end of file
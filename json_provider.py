@@ -0,0 +1,95 @@
+# JSON序列化模块
+# 提供Flask应用的JSON提供者：接口响应优先复用serialized_cache中已编码的字节，
+# 缓存命中时完全跳过编码；编码使用orjson（可选依赖，未安装时使用标准库json）。
+#
+# orjson的输出与标准库在语义上相同，键同样排序，但中文直接以UTF-8输出而不是\uXXXX转义，响应体更小
+
+import time
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from cache import serialized_cache
+from compression import body_digest
+from config import JSON_PROVIDER
+from logger import get_logger
+from metrics import TimedJSONProvider, http_json_seconds
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 创建日志记录器
+logger = get_logger("json_provider")
+
+
+class CachedJSONProvider(TimedJSONProvider):
+    """
+    复用预先序列化字节的JSON提供者，编码使用标准库json
+
+    接口返回登记在serialized_cache中的对象（随页面缓存的解析结果）时，第一次输出保存编码后的字节和摘要，
+    之后直接复用；摘要挂在响应对象上，压缩模块生成ETag时不需要再计算哈希
+    """
+
+    def encode(self, obj):
+        """
+        按紧凑格式编码为UTF-8字节，与Flask默认响应的输出相同
+        """
+        return (DefaultJSONProvider.dumps(self, obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            # 调试模式输出缩进格式，不使用缓存
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        start = time.perf_counter()
+        registered, body, digest = serialized_cache.lookup(obj)
+        if body is None:
+            body = self.encode(obj)
+            if registered:
+                digest = body_digest(body)
+                serialized_cache.store(obj, body, digest)
+        endpoint = request.url_rule.rule if has_request_context() and request.url_rule else ""
+        http_json_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
+
+        response = self._app.response_class(body, mimetype=self.mimetype)
+        response.body_digest = digest
+        return response
+
+
+class OrjsonProvider(CachedJSONProvider):
+    """使用orjson编码和解码的JSON提供者"""
+
+    def _options(self):
+        # 日期和dataclass交给Flask的default处理，输出格式与标准库一致
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def encode(self, obj):
+        return orjson.dumps(obj, default=self.default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # indent等orjson不支持的参数使用标准库
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def create_json_provider(app, name=JSON_PROVIDER):
+    """
+    根据配置创建JSON提供者
+
+    :param name: orjson或default，orjson未安装时回退到标准库
+    """
+    if name == "orjson":
+        if orjson is not None:
+            return OrjsonProvider(app)
+        logger.warning("未安装orjson，JSON序列化使用标准库")
+    return CachedJSONProvider(app)
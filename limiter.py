@@ -0,0 +1,219 @@
+# 限流模块
+# 为每个上游主机提供并发数上限和令牌桶请求速率限制，
+# 并发名额在整个请求（包括重试和退避）期间一直持有
+
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+
+from config import DEFAULT_UPSTREAM_LIMIT, UPSTREAM_LIMITS
+
+
+class TokenBucket:
+    """令牌桶：平均每秒最多rate个请求，允许瞬时突发burst个"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        预约一个令牌，返回需要等待的秒数
+
+        令牌数允许为负，表示已被预约的未来令牌，调用方按返回值等待即可，
+        同步代码用time.sleep，异步代码用asyncio.sleep
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def available(self):
+        """
+        当前可用的令牌数，不预约令牌
+        """
+        with self._lock:
+            return min(self.burst, self._tokens + (time.monotonic() - self._updated_at) * self.rate)
+
+
+class HostLimiter:
+    """单个上游主机的并发和速率限制器"""
+
+    def __init__(self, host, max_concurrent, rate, burst):
+        self.host = host
+        self.max_concurrent = max_concurrent
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._bucket = TokenBucket(rate, burst)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.rate_wait_total = 0.0
+        self.throttled = 0
+
+    def _enter(self, waited):
+        with self._lock:
+            self.waiting -= 1
+            self.in_flight += 1
+            self.acquired += 1
+            self.queue_wait_total += waited
+            self.queue_wait_max = max(self.queue_wait_max, waited)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+    def _record_rate_wait(self, wait):
+        with self._lock:
+            self.throttled += 1
+            self.rate_wait_total += wait
+
+    @contextmanager
+    def slot(self):
+        """
+        占用一个并发名额，直到整个请求（包括重试）结束
+        """
+        start = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        self._semaphore.acquire()
+        self._enter(time.monotonic() - start)
+        try:
+            yield self
+        finally:
+            self._exit()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """
+        slot的异步版本，与同步请求共享同一个并发上限，等待期间不阻塞事件循环
+        """
+        # 只有异步抓取会用到asyncio，此时事件循环已经加载了它；同步部署不需要在启动时导入
+        import asyncio
+
+        start = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        delay = 0.005
+        try:
+            while not self._semaphore.acquire(blocking=False):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        except BaseException:
+            # 等待时被取消（例如客户端断开），没有拿到名额，不再计入排队数
+            with self._lock:
+                self.waiting -= 1
+            raise
+        self._enter(time.monotonic() - start)
+        try:
+            yield self
+        finally:
+            self._exit()
+
+    def throttle(self):
+        """
+        每次发出HTTP请求前调用，按令牌桶速率等待
+        """
+        wait = self._bucket.reserve()
+        if wait > 0:
+            self._record_rate_wait(wait)
+            time.sleep(wait)
+
+    async def throttle_async(self):
+        """
+        throttle的异步版本
+        """
+        import asyncio
+
+        wait = self._bucket.reserve()
+        if wait > 0:
+            self._record_rate_wait(wait)
+            await asyncio.sleep(wait)
+
+    def has_spare_capacity(self, reserve=1):
+        """
+        后台任务（如预取）是否可以发出请求：没有请求在排队，至少给交互请求留出reserve个
+        并发名额，并且令牌桶中还有reserve个以上的令牌，保证后台任务不会让交互请求等待
+        """
+        with self._lock:
+            if self.waiting > 0 or self.in_flight + reserve >= self.max_concurrent:
+                return False
+        return self._bucket.available() >= reserve + 1
+
+    def wait_for_spare_capacity(self, reserve=1, delay=0.5):
+        """
+        阻塞直到has_spare_capacity为True，供后台任务在每次请求前调用
+
+        :return: 等待的次数
+        """
+        waits = 0
+        while not self.has_spare_capacity(reserve):
+            waits += 1
+            time.sleep(delay)
+        return waits
+
+    def stats(self):
+        """
+        获取限流统计信息
+        """
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "rate": self._bucket.rate,
+                "burst": self._bucket.burst,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "acquired": self.acquired,
+                "queue_wait_avg": round(self.queue_wait_total / self.acquired, 4) if self.acquired else 0.0,
+                "queue_wait_max": round(self.queue_wait_max, 4),
+                "throttled": self.throttled,
+                "rate_wait_total": round(self.rate_wait_total, 4),
+            }
+
+
+class UpstreamLimiter:
+    """按上游主机分配限流器"""
+
+    def __init__(self, limits=UPSTREAM_LIMITS, default_limit=DEFAULT_UPSTREAM_LIMIT):
+        self._limits = limits
+        self._default_limit = default_limit
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        """
+        获取URL所属主机的限流器
+        """
+        host = urlsplit(url).hostname or ""
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            with self._lock:
+                limiter = self._hosts.get(host)
+                if limiter is None:
+                    limit = self._limits.get(host, self._default_limit)
+                    limiter = HostLimiter(host, **limit)
+                    self._hosts[host] = limiter
+        return limiter
+
+    def stats(self):
+        """
+        获取所有主机的限流统计信息
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: limiter.stats() for host, limiter in hosts.items()}
+
+
+# 全局上游限流器
+upstream_limiter = UpstreamLimiter()
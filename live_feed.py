@@ -0,0 +1,230 @@
+# 直播比分推送模块
+# 由一个后台线程轮询直播比赛列表，维护按fid索引、带版本号的内存快照。
+# 客户端带上一次拿到的版本号来获取变化，只返回比分、状态或半场比分变化过的比赛，
+# 上游请求量只取决于轮询间隔，不再随观看人数增长
+
+import threading
+import time
+
+from config import LIVE_FEED_IDLE_TIMEOUT, LIVE_FEED_INTERVAL, LIVE_FEED_TOMBSTONE_TTL
+from logger import get_logger
+from scraper import MatchScraper
+
+# 创建日志记录器
+logger = get_logger("live_feed")
+
+# 判断比赛是否变化的字段，status_text在直播页面中是比赛进行的分钟数
+TRACKED_FIELDS = ("home_score", "away_score", "half_score", "status", "status_text")
+
+
+class LiveFeed:
+    """
+    直播比赛列表的版本化快照
+
+    每次轮询后，比分、状态或半场比分变化的比赛和新出现的比赛记为新版本，
+    从列表中消失的比赛留下删除记录，客户端据此增量更新本地列表
+    """
+
+    def __init__(self, interval=LIVE_FEED_INTERVAL, idle_timeout=LIVE_FEED_IDLE_TIMEOUT,
+                 tombstone_ttl=LIVE_FEED_TOMBSTONE_TTL, fetch=None):
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.tombstone_ttl = tombstone_ttl
+        self._fetch = fetch or MatchScraper.fetch_live_matches
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.version = 0
+        self._matches = {}  # fid -> 比赛字典
+        self._order = []  # 上游页面中的比赛顺序
+        self._changed_at = {}  # fid -> 最后一次变化的版本号
+        self._removed = {}  # fid -> (删除时的版本号, 删除时间)
+        self._oldest_version = 0  # 删除记录完整保留的最早版本号，更早的版本需要完整列表
+        self._last_access = time.monotonic()
+        self.updated_at = None  # 最近一次成功轮询的时间戳
+        self.polls = 0
+        self.poll_errors = 0
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """
+        注册快照更新回调，每产生一个新版本调用一次，参数为该版本的changes()结果
+
+        回调在轮询线程中执行，应尽快返回
+        """
+        self._listeners.append(callback)
+
+    def ensure_running(self):
+        """
+        记录一次客户端访问，轮询线程没有运行时启动它
+        """
+        with self._cond:
+            self._last_access = time.monotonic()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+            self._thread.start()
+        logger.info("直播比分轮询已启动，间隔 %s 秒", self.interval)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                idle = time.monotonic() - self._last_access
+                if self._stopping or idle > self.idle_timeout:
+                    self._thread = None
+                    break
+            started_at = time.monotonic()
+            self.poll()
+            with self._cond:
+                self._cond.wait(max(0.0, self.interval - (time.monotonic() - started_at)))
+        logger.info("直播比分轮询已停止")
+
+    def poll(self):
+        """
+        下载一次直播比赛列表并更新快照
+
+        :return: 本次产生新版本时返回True
+        """
+        try:
+            match_list = self._fetch()
+        except Exception as e:
+            match_list = None
+            logger.error("轮询直播比赛列表失败: %s", e)
+
+        with self._cond:
+            self.polls += 1
+            # fetch_live_matches失败时返回空列表，已有快照时不把它当作所有比赛都结束了
+            if not match_list and self._matches:
+                self.poll_errors += 1
+                logger.warning("直播比赛列表为空，保留上一次的快照")
+                return False
+            updated = self._apply(match_list or [])
+            version = self.version
+
+        if updated:
+            changes = self.changes(version - 1)
+            for callback in self._listeners:
+                try:
+                    callback(changes)
+                except Exception as e:
+                    logger.error("直播比分快照更新回调失败: %s", e)
+        return updated
+
+    def _apply(self, match_list):
+        """
+        把新的比赛列表合并进快照，调用方持有锁
+        """
+        now = time.time()
+        version = self.version + 1
+        matches = {}
+        order = []
+        changed = 0
+        for match in match_list:
+            fid = match.get("fid")
+            if not fid or fid in matches:
+                continue
+            matches[fid] = match
+            order.append(fid)
+            old = self._matches.get(fid)
+            if old is None or any(old.get(field) != match.get(field) for field in TRACKED_FIELDS):
+                self._changed_at[fid] = version
+                self._removed.pop(fid, None)
+                changed += 1
+
+        removed = [fid for fid in self._matches if fid not in matches]
+        for fid in removed:
+            self._changed_at.pop(fid, None)
+            self._removed[fid] = (version, now)
+
+        # 清理过期的删除记录，并记下删除记录仍然完整的最早版本号
+        for fid, (removed_version, removed_at) in list(self._removed.items()):
+            if now - removed_at > self.tombstone_ttl:
+                del self._removed[fid]
+                self._oldest_version = max(self._oldest_version, removed_version)
+
+        self._matches = matches
+        self._order = order
+        self.updated_at = now
+        if changed or removed:
+            self.version = version
+            self._cond.notify_all()
+            logger.info("直播比分快照更新到版本 %s，变化 %s 场，移除 %s 场", version, changed, len(removed))
+            return True
+        return False
+
+    def matches(self):
+        """
+        获取当前快照中的全部比赛，顺序与上游页面一致
+        """
+        with self._cond:
+            return [self._matches[fid] for fid in self._order]
+
+    def known(self, fids):
+        """
+        筛选出当前快照中存在的比赛
+
+        :return: 在快照中的fid列表，保持传入的顺序
+        """
+        with self._cond:
+            return [fid for fid in fids if fid in self._matches]
+
+    def restore(self, match_list, updated_at):
+        """
+        用启动快照中的比赛列表初始化快照，只在还没有轮询结果时生效
+
+        恢复的列表作为第一个版本，轮询线程随后按正常流程更新
+        :return: 是否已恢复
+        """
+        with self._cond:
+            if self.updated_at is not None or not match_list:
+                return False
+            self._apply(match_list)
+            self.updated_at = updated_at
+            return True
+
+    def changes(self, since=0):
+        """
+        获取某个版本之后变化的比赛
+
+        :param since: 客户端上一次拿到的版本号，0表示获取完整列表
+        :return: {"version", "full", "matches", "removed"}；since太旧（删除记录已清理）
+                 或大于当前版本（服务重启过）时full为True，matches为完整列表
+        """
+        with self._cond:
+            full = since <= 0 or since < self._oldest_version or since > self.version
+            if full:
+                matches = [self._matches[fid] for fid in self._order]
+                removed = []
+            else:
+                matches = [self._matches[fid] for fid in self._order if self._changed_at.get(fid, 0) > since]
+                removed = [fid for fid, (version, _) in self._removed.items() if version > since]
+            return {
+                "version": self.version,
+                "full": full,
+                "updated_at": self.updated_at,
+                "matches": matches,
+                "removed": removed,
+            }
+
+    def stats(self):
+        with self._cond:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "version": self.version,
+                "matches": len(self._matches),
+                "tombstones": len(self._removed),
+                "polls": self.polls,
+                "poll_errors": self.poll_errors,
+                "updated_at": self.updated_at,
+                "interval": self.interval,
+            }
+
+
+# 全局直播比分快照
+live_feed = LiveFeed()
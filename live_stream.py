@@ -0,0 +1,310 @@
+# 实时推送模块
+# 通过Server-Sent Events向浏览器推送比分变化和被关注比赛的即时欧赔变化。
+# 比分来自live_feed的共享轮询，欧赔由一个后台线程统一轮询所有连接关注的比赛，
+# 上游请求量与连接数无关
+#
+# 所有连接共享一个有界的事件环形缓冲区，每个连接只保存读取位置：
+# 发布事件不会因为慢客户端而阻塞，也不会为每个连接复制事件；
+# 落后超过缓冲区大小的连接收到resync事件，由客户端通过/api/live/changes重新获取完整列表。
+# 每个连接在等待事件时占用一个线程，连接数上限LIVE_STREAM_MAX_SUBSCRIBERS按线程数设置；
+# 推送需要流式发送响应，函数计算和Vercel的入口缓冲整个响应，这些部署中关闭推送（LIVE_STREAM_ENABLED=0）
+
+import json
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from config import (BASE_URL, LIVE_ODDS_INTERVAL, LIVE_ODDS_WORKERS,
+                    LIVE_STREAM_BUFFER_SIZE, LIVE_STREAM_MAX_SUBSCRIBERS,
+                    LIVE_STREAM_MAX_WATCHED, PREFETCH_RESERVE,
+                    PREFETCH_YIELD_DELAY)
+from limiter import upstream_limiter
+from live_feed import TRACKED_FIELDS, live_feed
+from logger import get_logger
+from odds_store import odds_store
+from scraper import OddsScraper
+
+# 创建日志记录器
+logger = get_logger("live_stream")
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class Subscription:
+    """一个SSE连接的读取位置和关注的比赛"""
+
+    def __init__(self, cursor, watch, resumed=False):
+        self.cursor = cursor  # 已读取的最后一个事件序号
+        self.watch = frozenset(watch)
+        self.resumed = resumed  # 是否从Last-Event-ID继续，否则客户端需要先收到完整快照
+        self.delivered = 0
+        self.resyncs = 0
+
+
+class EventHub:
+    """
+    所有SSE连接共享的事件环形缓冲区
+
+    事件为(序号, 事件类型, fid, 序列化后的数据)，fid为None的事件发给所有连接，
+    否则只发给关注了该比赛的连接
+    """
+
+    def __init__(self, buffer_size=LIVE_STREAM_BUFFER_SIZE, max_subscribers=LIVE_STREAM_MAX_SUBSCRIBERS,
+                 max_watched=LIVE_STREAM_MAX_WATCHED):
+        self.max_subscribers = max_subscribers
+        self.max_watched = max_watched
+        self._events = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._subscribers = set()
+        self._watch_counts = Counter()  # fid -> 关注该比赛的连接数
+        self.published = 0
+        self.rejected = 0
+        self.watch_rejected = 0
+        self.resyncs = 0
+
+    def publish(self, event, data, fid=None):
+        payload = _dumps(data)
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, event, fid, payload))
+            self.published += 1
+            self._cond.notify_all()
+        return self._seq
+
+    def subscribe(self, watch=(), last_event_id=None):
+        """
+        注册一个连接
+
+        所有连接关注的比赛总数达到max_watched后，只能关注已被其他连接关注的比赛，其余的比赛忽略
+
+        :param last_event_id: 浏览器重连时带上的Last-Event-ID，之后的事件仍在缓冲区内时从该位置继续；
+                              不是本进程发出的序号（例如进程重启后）或之后的事件已被丢弃时从最新位置开始
+        :return: Subscription，连接数已满时返回None；subscription.watch为实际关注的比赛，
+                 subscription.resumed为False时调用方应先发送完整快照
+        """
+        with self._cond:
+            if len(self._subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            cursor = self._seq
+            resumed = last_event_id is not None and self._can_resume(last_event_id)
+            if resumed:
+                cursor = last_event_id
+            watch = set(watch)
+            new = sorted(watch.difference(self._watch_counts))
+            accepted = new[: max(0, self.max_watched - len(self._watch_counts))]
+            self.watch_rejected += len(new) - len(accepted)
+            subscription = Subscription(cursor, watch.intersection(self._watch_counts).union(accepted), resumed)
+            self._subscribers.add(subscription)
+            self._watch_counts.update(subscription.watch)
+        return subscription
+
+    def _can_resume(self, last_event_id):
+        """
+        last_event_id之后的事件是否都还在缓冲区内，调用时需持有self._cond
+        """
+        if not 0 <= last_event_id <= self._seq:
+            return False
+        return last_event_id == self._seq or last_event_id + 1 >= self._events[0][0]
+
+    def unsubscribe(self, subscription):
+        with self._cond:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.discard(subscription)
+            self._watch_counts.subtract(subscription.watch)
+            self._watch_counts += Counter()  # 去掉计数为0的比赛
+
+    def watched(self):
+        """
+        获取当前至少有一个连接关注的比赛
+        """
+        with self._cond:
+            return set(self._watch_counts)
+
+    def read(self, subscription, timeout):
+        """
+        等待并读取连接尚未收到的事件
+
+        :return: (事件列表, 是否需要重新同步)，超时没有新事件时返回空列表
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > subscription.cursor, timeout)
+            if self._seq <= subscription.cursor:
+                return [], False
+
+            oldest = self._events[0][0]
+            if subscription.cursor + 1 < oldest:
+                # 连接落后太多，缓冲区中已经没有它需要的事件
+                subscription.cursor = self._seq
+                subscription.resyncs += 1
+                self.resyncs += 1
+                return [], True
+
+            pending = islice(self._events, subscription.cursor + 1 - oldest, None)
+            events = [
+                (seq, event, payload)
+                for seq, event, fid, payload in pending
+                if fid is None or fid in subscription.watch
+            ]
+            subscription.cursor = self._seq
+            subscription.delivered += len(events)
+            return events, False
+
+    def stats(self):
+        with self._cond:
+            return {
+                "subscribers": len(self._subscribers),
+                "watched_matches": len(self._watch_counts),
+                "buffered_events": len(self._events),
+                "last_event_id": self._seq,
+                "published": self.published,
+                "rejected": self.rejected,
+                "max_watched": self.max_watched,
+                "watch_rejected": self.watch_rejected,
+                "resyncs": self.resyncs,
+            }
+
+
+class OddsWatcher:
+    """
+    轮询被关注比赛即时欧赔的后台线程，所有连接共享
+
+    只在至少有一个连接关注比赛时运行，每轮用专用的小线程池下载所有被关注比赛的欧赔页面，
+    与上一轮比较后发布各公司即时赔率的变化。下载不占用交互请求的并发抓取线程池，
+    每次请求前和预取一样检查上游限流器，有交互请求排队时暂停；一轮全部完成后才开始下一轮
+    """
+
+    def __init__(self, hub, interval=LIVE_ODDS_INTERVAL, workers=LIVE_ODDS_WORKERS):
+        self.hub = hub
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="live-odds-fetch")
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._instant = {}  # fid -> {公司: 即时赔率}
+        self.polls = 0
+        self.errors = 0
+
+    def ensure_running(self):
+        """
+        轮询线程没有运行时启动它；已在运行时提前开始下一轮，尽快为新关注的比赛记录基准
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._wakeup.set()
+                return
+            self._thread = threading.Thread(target=self._run, name="live-odds", daemon=True)
+            self._thread.start()
+        logger.info("即时欧赔轮询已启动，间隔 %s 秒", self.interval)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                fids = self.hub.watched()
+                if not fids:
+                    self._thread = None
+                    self._instant.clear()
+                    break
+            started_at = time.monotonic()
+            self.poll(fids)
+            self._wakeup.wait(max(0.0, self.interval - (time.monotonic() - started_at)))
+            self._wakeup.clear()
+        logger.info("即时欧赔轮询已停止")
+
+    def _fetch(self, fid):
+        """
+        等待上游空闲后下载一场比赛的欧赔，失败时返回None
+        """
+        try:
+            upstream_limiter.for_url(BASE_URL["ODDS_BASE"]).wait_for_spare_capacity(
+                PREFETCH_RESERVE, PREFETCH_YIELD_DELAY
+            )
+            return OddsScraper.fetch_oupei_data(fid)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("获取比赛 %s 的即时欧赔失败: %s", fid, e)
+            return None
+
+    def poll(self, fids):
+        """
+        下载一轮被关注比赛的欧赔并发布变化
+        """
+        fids = sorted(fids)
+        results = dict(zip(fids, self._executor.map(self._fetch, fids)))
+        self.polls += 1
+        for fid in list(self._instant):
+            if fid not in results:
+                del self._instant[fid]
+
+        for fid, data in results.items():
+            if not data:
+                continue
+            try:
+                # 关注比赛的即时欧赔同时写入赔率历史，不需要额外的上游请求
+                odds_store.record(fid, "oupei", data)
+            except Exception as e:
+                logger.warning("保存比赛 %s 的欧赔历史失败: %s", fid, e)
+            try:
+                self._publish_changes(fid, data)
+            except Exception as e:
+                # 单场比赛的数据异常不影响其他比赛，也不能让轮询线程退出
+                self.errors += 1
+                logger.warning("比较比赛 %s 的即时欧赔失败: %s", fid, e)
+
+    def _publish_changes(self, fid, data):
+        """
+        与上一轮的即时赔率比较，发布变化的公司
+        """
+        instant = {company: odds["instant"] for company, odds in data.items()}
+        previous = self._instant.get(fid)
+        self._instant[fid] = instant
+        if previous is None:
+            # 第一次轮询只记录基准，客户端通过/api/odds/oupei获取完整数据
+            return
+        changed = {
+            company: odds for company, odds in instant.items() if previous.get(company) != odds
+        }
+        if changed:
+            self.hub.publish("odds", {"fid": fid, "instant": changed}, fid=fid)
+
+
+def compact_scores(changes):
+    """
+    把live_feed.changes()的结果压缩为比分事件，比赛只保留fid和判断变化的字段
+    """
+    return {
+        "version": changes["version"],
+        "full": changes["full"],
+        "matches": [
+            {"fid": match["fid"], **{field: match.get(field, "") for field in TRACKED_FIELDS}}
+            for match in changes["matches"]
+        ],
+        "removed": changes["removed"],
+    }
+
+
+def _publish_scores(changes):
+    """
+    live_feed产生新版本时发布比分事件
+    """
+    hub.publish("scores", compact_scores(changes))
+
+
+# 全局事件缓冲区和即时欧赔轮询
+hub = EventHub()
+odds_watcher = OddsWatcher(hub)
+live_feed.add_listener(_publish_scores)
+
+
+def format_event(seq, event, data):
+    """
+    按SSE格式输出一个事件，data为已序列化的JSON字符串或需要序列化的对象
+    """
+    payload = data if isinstance(data, str) else _dumps(data)
+    return f"id: {seq}\nevent: {event}\ndata: {payload}\n\n"
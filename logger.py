@@ -1,10 +1,56 @@
 # 日志配置模块
 # 提供统一的日志记录功能
+#
+# 日志先写入内存队列，由后台线程统一格式化并输出，请求线程不会阻塞在控制台写入上。
+# 通过环境变量调整:
+#   LOG_LEVEL=INFO            所有模块的默认级别
+#   LOG_LEVEL_SCRAPER=DEBUG   单个模块的级别，模块名大写，例如LOG_LEVEL_ASYNC_SCRAPER
+#   LOG_FORMAT=detailed       控制台格式，simple或detailed
+#   LOG_QUEUE=1               设为0时直接同步输出（例如函数计算实例冻结前需要立即输出日志）
+#   LOG_QUEUE_SIZE=10000      队列容量，队列满时丢弃新日志而不是阻塞请求
+#   LOG_SAMPLE_EVERY=100      逐行解析日志的采样间隔
 
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import os
+import queue
+import threading
 
-# 日志配置 - 适配FC环境，只使用控制台输出
+# 使用统一配置的模块日志记录器
+MODULE_LOGGERS = [
+    "scraper",
+    "standings_scraper",
+    "api",
+    "main",
+    "fanout",
+    "async_scraper",
+    "cassette",
+    "live_feed",
+    "live_stream",
+    "prefetch",
+    "odds_store",
+    "json_provider",
+    "warm_state",
+]
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "detailed")
+LOG_QUEUE = os.environ.get("LOG_QUEUE", "1") != "0"
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", "100"))
+
+
+def _module_level(name):
+    """
+    获取模块的日志级别，LOG_LEVEL_<模块名>优先于LOG_LEVEL
+    """
+    return os.environ.get(f"LOG_LEVEL_{name.upper()}", LOG_LEVEL).upper()
+
+
+# 日志配置 - 适配FC环境，只使用控制台输出；控制台处理器在下面显式创建，
+# 直接挂到各日志记录器上，或者挂到后台线程的QueueListener上
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -14,36 +60,104 @@ LOGGING_CONFIG = {
             "format": "%(asctime)s - %(name)s - %(levelname)s - %(module)s - %(funcName)s - %(lineno)d - %(message)s"
         },
     },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "level": "INFO",
-            "formatter": "detailed",
-        },
-    },
     "loggers": {
-        "scraper": {
-            "level": "INFO",
-            "handlers": ["console"],
-            "propagate": False,
-        },
-        "api": {
-            "level": "INFO",
-            "handlers": ["console"],
-            "propagate": False,
-        },
-        "main": {
-            "level": "INFO",
-            "handlers": ["console"],
+        name: {
+            "level": _module_level(name),
             "propagate": False,
-        },
+        }
+        for name in MODULE_LOGGERS
     },
-    "root": {"level": "ERROR", "handlers": ["console"]},
+    "root": {"level": "ERROR"},
 }
 
 # 配置日志
 logging.config.dictConfig(LOGGING_CONFIG)
 
+# 控制台处理器，基准测试等可以通过setStream改变输出位置
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.DEBUG)
+console_handler.setFormatter(logging.Formatter(LOGGING_CONFIG["formatters"][LOG_FORMAT]["format"]))
+
+
+def _attach_handler(handler):
+    """
+    把处理器挂到所有统一配置的日志记录器和根日志记录器上
+    """
+    for logger in [logging.getLogger(name) for name in MODULE_LOGGERS] + [logging.getLogger()]:
+        logger.addHandler(handler)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """写入有界队列的日志处理器，队列满时丢弃日志并计数，不阻塞调用方"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _start_queue_listener():
+    """
+    把控制台输出移到后台线程：各日志记录器改为写入队列，由QueueListener格式化并输出
+    """
+    queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _attach_handler(queue_handler)
+
+    listener = logging.handlers.QueueListener(queue_handler.queue, console_handler, respect_handler_level=True)
+    listener.start()
+    # 退出时输出队列中剩余的日志
+    atexit.register(listener.stop)
+    return queue_handler, listener
+
+
+if LOG_QUEUE:
+    queue_handler, queue_listener = _start_queue_listener()
+else:
+    queue_handler, queue_listener = None, None
+    _attach_handler(console_handler)
+
+
+class SampledLogger:
+    """
+    逐行解析等热点路径使用的采样日志记录器
+
+    按消息模板分别计数，每个模板先输出前burst条，之后每every条输出一条。
+    消息使用%占位符延迟格式化，级别未开启或被采样跳过时不会格式化参数
+    """
+
+    def __init__(self, logger, every=LOG_SAMPLE_EVERY, burst=3):
+        self.logger = logger
+        self.every = max(1, every)
+        self.burst = burst
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def _log(self, level, msg, args):
+        if not self.logger.isEnabledFor(level):
+            return
+        with self._lock:
+            count = self._counts.get(msg, 0) + 1
+            self._counts[msg] = count
+        if count <= self.burst or count % self.every == 0:
+            if count > self.burst:
+                msg = f"{msg} (采样: 第{count}条)"
+            # stacklevel=3让日志中的模块、函数和行号指向调用方
+            self.logger.log(level, msg, *args, stacklevel=3)
+
+    def debug(self, msg, *args):
+        self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        self._log(logging.INFO, msg, args)
+
+    def warning(self, msg, *args):
+        self._log(logging.WARNING, msg, args)
+
 
 # 创建日志记录器
 def get_logger(name):
@@ -57,3 +171,18 @@ def get_logger(name):
         logging.Logger: 日志记录器实例
     """
     return logging.getLogger(name)
+
+
+def get_sampled_logger(name, every=LOG_SAMPLE_EVERY, burst=3):
+    """
+    获取采样日志记录器，用于逐行解析等会产生大量重复日志的热点路径
+
+    Args:
+        name: 日志记录器名称
+        every: 超过burst条后，每every条输出一条
+        burst: 每个消息模板开始时完整输出的条数
+
+    Returns:
+        SampledLogger: 采样日志记录器实例
+    """
+    return SampledLogger(logging.getLogger(name), every, burst)
@@ -1,8 +1,12 @@
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, stream_template
 
-from api import api_bp
+from api import api_bp, buffered_chunks
+from json_provider import create_json_provider
+from live_feed import live_feed
 from logger import get_logger
+from prefetch import prefetcher
 from scraper import MatchScraper
+from warm_state import warm_state
 
 # 创建日志记录器
 logger = get_logger("main")
@@ -10,22 +14,60 @@ logger = get_logger("main")
 # 创建Flask应用实例
 app = Flask(__name__)
 
+# JSON提供者：记录各接口的序列化耗时，缓存结果只编码一次
+app.json = create_json_provider(app)
+
 # 注册API蓝图
 app.register_blueprint(api_bp)
 
+# 按需启动的部署中恢复上一个实例保存的缓存和会话设置，没有配置WARM_STATE_PATH时不做任何事
+warm_state.restore()
+
+
+@app.after_request
+def _save_warm_state(response):
+    """
+    请求结束后按间隔在后台保存启动快照
+    """
+    warm_state.maybe_save()
+    return response
+
+
+def _schedule_prefetch(matches):
+    """
+    边输出边收集比赛，全部输出后在后台预取列表中优先级最高的比赛的弹窗数据
+    """
+    match_list = []
+    for match in matches:
+        match_list.append(match)
+        yield match
+    prefetcher.schedule(match_list)
+
 
 @app.route("/")
 def index():
     """
-    主页路由：获取直播比赛列表或历史比赛列表并渲染模板
+    主页路由：获取直播比赛列表或历史比赛列表并以流式渲染模板
+
+    页面头部先输出；历史比赛边解析边渲染，长的比赛列表在解析完之前就开始返回
     """
     try:
         # 获取日期参数
         date = request.args.get("date")
         
-        # 使用MatchScraper类获取比赛数据
-        match_list = MatchScraper.fetch_live_matches(date)
-        return render_template("index.html", matches=match_list, current_date=date)
+        if date:
+            # 使用MatchScraper类逐行获取比赛数据
+            matches = MatchScraper.iter_live_matches(date)
+        else:
+            # 直播比赛使用后台轮询的共享快照，刷新页面不再重新下载和解析比赛列表
+            live_feed.ensure_running()
+            if live_feed.updated_at is None:
+                live_feed.poll()
+            matches = live_feed.matches()
+
+        return app.response_class(
+            buffered_chunks(stream_template("index.html", matches=_schedule_prefetch(matches), current_date=date))
+        )
     except Exception as e:
         logger.error(f"获取比赛列表失败: {e}")
         return render_template("index.html", matches=[])
@@ -0,0 +1,294 @@
+# 指标模块
+# 记录上游请求各阶段、页面解码解析、抓取方法和API接口的耗时直方图与计数器，
+# 并按Prometheus文本格式输出
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+# 默认直方图分桶（秒），覆盖从毫秒级的缓存命中到数十秒的上游重试
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    """
+    按Prometheus文本格式转义标签值中的反斜杠、双引号和换行
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """按分桶统计观测值分布的直方图"""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # 标签值 -> [各分桶计数..., 总数, 总和]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        统计with代码块的耗时，代码块抛出异常时同样记录
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(float(bound))))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+            yield f"{self.name}_bucket{labels} {state[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-2]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(round(state[-1], 6))}"
+
+
+class Registry:
+    """指标注册表，负责输出Prometheus文本格式"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        注册输出时才计算的指标，例如缓存命中率和当前并发数
+
+        collector返回[(名称, 说明, 类型, 标签字典, 数值), ...]
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """
+        生成Prometheus文本格式的指标
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+
+        described = set()
+        for collector in collectors:
+            for name, documentation, metric_type, labels, value in collector():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                labelnames = tuple(labels)
+                lines.append(
+                    f"{name}{_format_labels(labelnames, [labels[n] for n in labelnames])} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+registry = Registry()
+
+# 上游请求：各阶段耗时（limiter_wait/session_checkout/rate_wait/network/backoff）
+upstream_stage_seconds = registry.histogram(
+    "upstream_stage_seconds", "上游请求各阶段耗时（秒）", ("host", "stage")
+)
+upstream_request_seconds = registry.histogram(
+    "upstream_request_seconds", "上游请求总耗时，包括排队、重试和退避（秒）", ("host", "page_type")
+)
+upstream_requests = registry.counter(
+    "upstream_requests", "上游请求次数，按最终结果统计", ("host", "page_type", "result")
+)
+upstream_retries = registry.counter("upstream_retries", "上游请求失败后的重试次数", ("host", "reason"))
+
+# 页面解码和解析
+page_decode_seconds = registry.histogram("page_decode_seconds", "页面解码耗时（秒）", ("page_type", "encoding"))
+page_parse_seconds = registry.histogram("page_parse_seconds", "页面解析耗时（秒）", ("page_type", "parser"))
+
+# 抓取方法
+fetcher_seconds = registry.histogram("scraper_fetch_seconds", "抓取方法耗时，包括下载和解析（秒）", ("fetcher",))
+fetcher_calls = registry.counter("scraper_fetch", "抓取方法调用次数", ("fetcher", "result"))
+
+# API接口
+http_request_seconds = registry.histogram(
+    "http_request_seconds", "API接口耗时（秒）", ("endpoint", "method", "status")
+)
+http_json_seconds = registry.histogram(
+    "http_json_serialize_seconds", "API接口JSON序列化耗时（秒）", ("endpoint",)
+)
+
+
+def host_of(url):
+    return urlsplit(url).hostname or ""
+
+
+def page_type_of(url):
+    """
+    根据URL得到页面类型，用作指标标签，避免把比赛ID等高基数值放进标签
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    path = parts.path
+    if host == "live.500.com":
+        if path in ("", "/"):
+            return "live_index"
+        return path.strip("/").split(".")[0] or "live_index"
+    if host == "odds.500.com":
+        # /fenxi/ouzhi-123.shtml -> ouzhi
+        return path.rsplit("/", 1)[-1].split("-")[0] or "odds"
+    if host == "liansai.500.com":
+        return "liansai"
+    return host or "unknown"
+
+
+def observe_upstream_request(url, status_code, seconds):
+    """
+    记录一次上游请求（包括排队、重试和退避）的总耗时和结果
+
+    :param status_code: 最终状态码，请求失败时为None
+    """
+    host = host_of(url)
+    page_type = page_type_of(url)
+    if status_code is None:
+        result = "failed"
+    elif status_code == 304:
+        result = "not_modified"
+    else:
+        result = "ok"
+    upstream_request_seconds.observe(seconds, host=host, page_type=page_type)
+    upstream_requests.inc(host=host, page_type=page_type, result=result)
+
+
+def instrument_fetchers(cls, skip=()):
+    """
+    为类中所有fetch_开头的方法记录耗时和调用结果
+
+    返回None或空数据记为empty，抛出异常记为error
+    """
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith("fetch_") or name in skip:
+            continue
+        if isinstance(attr, (staticmethod, classmethod)):
+            wrapper_type = type(attr)
+            func = attr.__func__
+        else:
+            wrapper_type = None
+            func = attr
+        if not callable(func):
+            continue
+        setattr(cls, name, _wrap_fetcher(f"{cls.__name__}.{name}", func, wrapper_type))
+    return cls
+
+
+def _wrap_fetcher(label, func, wrapper_type):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = "error"
+        try:
+            value = func(*args, **kwargs)
+            result = "ok" if value else "empty"
+            return value
+        finally:
+            fetcher_seconds.observe(time.perf_counter() - start, fetcher=label)
+            fetcher_calls.inc(fetcher=label, result=result)
+
+    return wrapper_type(wrapper) if wrapper_type else wrapper
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """记录每个接口JSON序列化耗时的JSON提供者"""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            endpoint = request.url_rule.rule if has_request_context() and request.url_rule else ""
+            http_json_seconds.observe(time.perf_counter() - start, endpoint=endpoint)
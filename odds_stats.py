@@ -0,0 +1,164 @@
+# 赔率统计模块
+# 把赔率抓取结果中的字符串转换为浮点数组，并用NumPy一次计算所有公司的统计数据，
+# 取代前端逐个单元格parseFloat的计算（add_odds_stats.js、script.js中的extractOupeiData）
+#
+# 欧赔为含本金的小数赔率，隐含概率为1/赔率；
+# 亚盘和大小球的水位不含本金，隐含概率为1/(水位+1)，与modal.js的calculateTwoOptionMargin一致
+
+import re
+import warnings
+
+import numpy as np
+
+# 各类赔率三列的含义
+ODDS_COLUMNS = {
+    "oupei": ("home", "draw", "away"),
+    "yapan": ("home_water", "handicap", "away_water"),
+    "daxiao": ("over_water", "line", "under_water"),
+}
+
+# 汉字盘口对应的让球数，与modal.js的convertChineseHandicap一致
+HANDICAP_VALUES = {
+    "平手": 0.0,
+    "平/半": 0.25,
+    "平手/半球": 0.25,
+    "半球": 0.5,
+    "半/一": 0.75,
+    "半球/一球": 0.75,
+    "一球": 1.0,
+    "一/球半": 1.25,
+    "一球/球半": 1.25,
+    "球半": 1.5,
+    "球半/两球": 1.75,
+    "两球": 2.0,
+    "两球/两球半": 2.25,
+    "两球半": 2.5,
+    "两球半/三球": 2.75,
+    "三球": 3.0,
+    "三球/三球半": 3.25,
+    "三球半": 3.5,
+    "三球半/四球": 3.75,
+    "四球": 4.0,
+    "四球/四球半": 4.25,
+    "四球半": 4.5,
+    "四球半/五球": 4.75,
+    "五球": 5.0,
+}
+
+_ARROWS = re.compile(r"[↑↓升降\s]")
+
+
+def parse_odds(value):
+    """
+    把赔率字符串转换为浮点数，去掉升降箭头，无法转换时返回NaN
+    """
+    try:
+        return float(_ARROWS.sub("", value))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def parse_line(value):
+    """
+    把盘口转换为数值：大小球的"2.5/3"取平均值2.75；亚盘汉字盘口按主队让球为负、受让为正
+    """
+    text = _ARROWS.sub("", value or "")
+    if "/" in text:
+        parts = text.split("/")
+        try:
+            return (float(parts[0]) + float(parts[1])) / 2
+        except (ValueError, IndexError):
+            pass
+    receiving = text.startswith("受")
+    text = text.lstrip("受")
+    if text in HANDICAP_VALUES:
+        handicap = HANDICAP_VALUES[text]
+        return handicap if receiving or handicap == 0 else -handicap
+    return parse_odds(text)
+
+
+def odds_arrays(kind, data):
+    """
+    把抓取结果转换为浮点数组
+
+    :param data: {公司: {"initial": [3个字符串], "instant": [3个字符串]}}
+    :return: (公司列表, 形状为(2, 公司数, 3)的数组，第一维依次为初始和即时)
+    """
+    companies = list(data)
+    values = np.full((2, len(companies), 3), np.nan)
+    line_column = kind != "oupei"
+    for i, company in enumerate(companies):
+        for phase, key in enumerate(("initial", "instant")):
+            row = data[company].get(key) or []
+            for j, value in enumerate(row[:3]):
+                values[phase, i, j] = parse_line(value) if line_column and j == 1 else parse_odds(value)
+    return companies, values
+
+
+def _to_list(array, digits=4):
+    """
+    转换为JSON可序列化的列表，NaN和无穷大转换为None
+    """
+    array = np.round(np.asarray(array, dtype=float), digits)
+    return np.where(np.isfinite(array), array, None).tolist()
+
+
+def compute_odds_stats(kind, data):
+    """
+    计算所有公司初始和即时赔率的统计数据，初始和即时两组数据在同一次数组运算中完成
+
+    :param kind: oupei、yapan或daxiao
+    :param data: fetch_oupei_data等抓取函数的返回值
+    :return: 统计数据字典，没有数据时返回None
+    """
+    if not data:
+        return None
+    companies, values = odds_arrays(kind, data)
+
+    if kind == "oupei":
+        decimal = values
+    else:
+        # 亚盘和大小球只有两个选项，第二列是盘口，水位加上本金换算为小数赔率
+        decimal = values[..., [0, 2]] + 1
+    # 赔率为0或水位为-1等无效数据不能换算为概率，与缺失数据一样按NaN处理
+    decimal = np.where(decimal > 0, decimal, np.nan)
+
+    with warnings.catch_warnings():
+        # 某一列所有公司都缺失时结果为NaN，不需要警告
+        warnings.simplefilter("ignore", RuntimeWarning)
+        implied = 1 / decimal
+        total = implied.sum(axis=2)
+        fair = implied / total[..., None]
+        fair_mean = np.nanmean(fair, axis=1)
+        # 凯利指数：公司赔率 × 所有公司的平均公平概率，大于1表示该公司的赔率高于市场平均
+        kelly = decimal * fair_mean[:, None, :]
+        summary = {
+            "mean": np.nanmean(values, axis=1),
+            "max": np.nanmax(values, axis=1),
+            "min": np.nanmin(values, axis=1),
+            "std": np.nanstd(values, axis=1),
+            "overround_mean": np.nanmean((total - 1) * 100, axis=1),
+            "payout_mean": np.nanmean(100 / total, axis=1),
+            "kelly_mean": np.nanmean(kelly, axis=1),
+            "kelly_std": np.nanstd(kelly, axis=1),
+        }
+
+    result = {"kind": kind, "columns": ODDS_COLUMNS[kind], "companies": companies, "count": len(companies)}
+    for phase, key in enumerate(("initial", "instant")):
+        result[key] = {
+            "odds": _to_list(values[phase]),
+            "mean": _to_list(summary["mean"][phase]),
+            "max": _to_list(summary["max"][phase]),
+            "min": _to_list(summary["min"][phase]),
+            "std": _to_list(summary["std"][phase]),
+            "implied_probability": _to_list(implied[phase]),
+            "fair_probability": _to_list(fair_mean[phase]),
+            "overround": _to_list((total[phase] - 1) * 100, 2),
+            "payout": _to_list(100 / total[phase], 2),
+            "overround_mean": _to_list(summary["overround_mean"][phase], 2),
+            "payout_mean": _to_list(summary["payout_mean"][phase], 2),
+            "kelly": _to_list(kelly[phase]),
+            "kelly_mean": _to_list(summary["kelly_mean"][phase]),
+            "kelly_std": _to_list(summary["kelly_std"][phase]),
+        }
+    return result
@@ -0,0 +1,366 @@
+# 赔率历史模块
+# 把各公司的欧赔、亚盘和大小球即时赔率按时间保存到SQLite，两次轮询之间的赔率变化不再丢失，
+# 赔率走势和历史直接从数据库读取，不需要重新抓取页面
+#
+# 表结构:
+#   odds_companies  公司名称字典，快照表中只保存整数ID
+#   odds_initial    每场比赛每家公司的初始赔率，只保存一次
+#   odds_snapshots  即时赔率的时间序列，只有赔率变化时才写入新行；
+#                   主键(match_id, kind, company_id, ts)且不使用rowid，
+#                   同一场比赛同一家公司的数据在磁盘上连续存放，按比赛和公司读取时间范围只需一次范围扫描
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from config import (BASE_URL, ODDS_RECORD_INTERVAL, ODDS_RECORD_MAX_MATCHES,
+                    ODDS_STORE_PATH, ODDS_STORE_RETENTION_DAYS,
+                    PREFETCH_RESERVE, PREFETCH_YIELD_DELAY)
+from limiter import upstream_limiter
+from live_feed import live_feed
+from logger import get_logger
+from prefetch import prioritize
+from scraper import OddsScraper
+
+# 创建日志记录器
+logger = get_logger("odds_store")
+
+# 赔率类型 -> (类型编号, 抓取函数)
+ODDS_KINDS = {
+    "oupei": (1, OddsScraper.fetch_oupei_data),
+    "yapan": (2, OddsScraper.fetch_yapan_data),
+    "daxiao": (3, OddsScraper.fetch_daxiao_data),
+}
+
+# 三个值的列使用NUMERIC类型亲和性：数字字符串按REAL保存，亚盘盘口（如"半球"）按TEXT保存
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS odds_companies (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS odds_initial (
+    match_id INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    company_id INTEGER NOT NULL,
+    v1 NUMERIC, v2 NUMERIC, v3 NUMERIC,
+    PRIMARY KEY (match_id, kind, company_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS odds_snapshots (
+    match_id INTEGER NOT NULL,
+    kind INTEGER NOT NULL,
+    company_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    v1 NUMERIC, v2 NUMERIC, v3 NUMERIC,
+    PRIMARY KEY (match_id, kind, company_id, ts)
+) WITHOUT ROWID;
+"""
+
+# 每场比赛最近一次写入的赔率在内存中保留的比赛数，用于判断赔率是否变化
+LAST_VALUES_MATCHES = 256
+
+
+def _clean(value):
+    """
+    去掉赔率中的升降箭头和空白
+    """
+    return value.replace("↑", "").replace("↓", "").strip()
+
+
+class OddsStore:
+    """
+    赔率时间序列存储
+
+    每个线程使用自己的SQLite连接，写入串行进行；数据库使用WAL模式，读取不会被写入阻塞。
+    path为空时不启用，record不写入任何数据
+    """
+
+    def __init__(self, path=ODDS_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._company_ids = {}
+        self._company_names = {}
+        self._last_values = OrderedDict()  # (match_id, kind) -> {company_id: (v1, v2, v3)}
+        self._initialized = False
+        self.snapshots_written = 0
+        self.snapshots_skipped = 0
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._write_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+        return conn
+
+    def _company_id(self, conn, name):
+        """
+        获取公司ID，不存在时插入，调用方持有写锁
+        """
+        company_id = self._company_ids.get(name)
+        if company_id is None:
+            conn.execute("INSERT OR IGNORE INTO odds_companies (name) VALUES (?)", (name,))
+            company_id = conn.execute("SELECT id FROM odds_companies WHERE name = ?", (name,)).fetchone()[0]
+            self._company_ids[name] = company_id
+            self._company_names[company_id] = name
+        return company_id
+
+    def _last_snapshot(self, conn, match_id, kind):
+        """
+        获取某场比赛某类赔率最近一次写入的各公司赔率，调用方持有写锁
+        """
+        key = (match_id, kind)
+        last = self._last_values.get(key)
+        if last is None:
+            rows = conn.execute(
+                "SELECT company_id, v1, v2, v3 FROM odds_snapshots AS s "
+                "WHERE match_id = ? AND kind = ? AND ts = ("
+                "  SELECT MAX(ts) FROM odds_snapshots"
+                "  WHERE match_id = s.match_id AND kind = s.kind AND company_id = s.company_id)",
+                (match_id, kind),
+            ).fetchall()
+            last = {company_id: tuple(values) for company_id, *values in rows}
+            self._last_values[key] = last
+            while len(self._last_values) > LAST_VALUES_MATCHES:
+                self._last_values.popitem(last=False)
+        else:
+            self._last_values.move_to_end(key)
+        return last
+
+    def record(self, match_id, kind, data, ts=None):
+        """
+        保存一次赔率快照，只有即时赔率与上一次不同的公司才写入新行
+
+        :param kind: oupei、yapan或daxiao
+        :param data: fetch_oupei_data等抓取函数的返回值，{公司: {"initial": [...], "instant": [...]}}
+        :return: 写入的行数
+        """
+        if not data or not self.enabled:
+            return 0
+        kind_id = ODDS_KINDS[kind][0]
+        match_id = int(match_id)
+        ts = int(ts if ts is not None else time.time())
+        conn = self._connect()
+
+        with self._write_lock:
+            try:
+                return self._record(conn, match_id, kind_id, data, ts)
+            except Exception:
+                # 事务已回滚，内存中的最近赔率和公司ID可能与数据库不一致，下次从数据库重新读取
+                self._last_values.pop((match_id, kind_id), None)
+                self._company_ids.clear()
+                raise
+
+    def _record(self, conn, match_id, kind_id, data, ts):
+        """
+        在一个事务中写入初始赔率和变化的即时赔率，调用方持有写锁
+        """
+        with conn:
+            last = self._last_snapshot(conn, match_id, kind_id)
+            initial_rows = []
+            snapshot_rows = []
+            for company, odds in data.items():
+                instant = tuple(_clean(v) for v in odds.get("instant", [])[:3])
+                if len(instant) != 3:
+                    continue
+                company_id = self._company_id(conn, company)
+                initial = tuple(_clean(v) for v in odds.get("initial", [])[:3])
+                if company_id not in last and len(initial) == 3:
+                    initial_rows.append((match_id, kind_id, company_id, *initial))
+                # NUMERIC列会把数字字符串转为REAL，这里按数据库中的形式比较
+                stored = tuple(_numeric(v) for v in instant)
+                if last.get(company_id) == stored:
+                    self.snapshots_skipped += 1
+                    continue
+                snapshot_rows.append((match_id, kind_id, company_id, ts, *instant))
+                last[company_id] = stored
+
+            conn.executemany("INSERT OR IGNORE INTO odds_initial VALUES (?, ?, ?, ?, ?, ?)", initial_rows)
+            conn.executemany("INSERT OR REPLACE INTO odds_snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", snapshot_rows)
+        self.snapshots_written += len(snapshot_rows)
+        return len(snapshot_rows)
+
+    def history(self, match_id, kind, company=None, since=None, until=None):
+        """
+        读取某场比赛某类赔率的历史
+
+        :param company: 公司名称，不传时返回所有公司
+        :param since: 开始时间戳（包含），不传表示不限
+        :param until: 结束时间戳（包含），不传表示不限
+        :return: {公司: {"initial": [v1, v2, v3], "series": [[ts, v1, v2, v3], ...]}}，按时间升序
+        """
+        kind_id = ODDS_KINDS[kind][0]
+        match_id = int(match_id)
+        conn = self._connect()
+
+        sql = "SELECT company_id, ts, v1, v2, v3 FROM odds_snapshots WHERE match_id = ? AND kind = ?"
+        params = [match_id, kind_id]
+        initial_sql = "SELECT company_id, v1, v2, v3 FROM odds_initial WHERE match_id = ? AND kind = ?"
+        initial_params = [match_id, kind_id]
+        if company is not None:
+            row = conn.execute("SELECT id FROM odds_companies WHERE name = ?", (company,)).fetchone()
+            if row is None:
+                return {}
+            sql += " AND company_id = ?"
+            params.append(row[0])
+            initial_sql += " AND company_id = ?"
+            initial_params.append(row[0])
+        if since is not None:
+            sql += " AND ts >= ?"
+            params.append(int(since))
+        if until is not None:
+            sql += " AND ts <= ?"
+            params.append(int(until))
+        sql += " ORDER BY company_id, ts"
+
+        names = self._names(conn)
+        result = {}
+        for company_id, *values in conn.execute(initial_sql, initial_params):
+            result[names[company_id]] = {"initial": values, "series": []}
+        for company_id, ts, *values in conn.execute(sql, params):
+            entry = result.setdefault(names[company_id], {"initial": None, "series": []})
+            entry["series"].append([ts, *values])
+        return result
+
+    def _names(self, conn):
+        """
+        公司ID到名称的映射，其他进程写入的新公司在这里补齐
+        """
+        names = dict(self._company_names)
+        if len(names) < conn.execute("SELECT COUNT(*) FROM odds_companies").fetchone()[0]:
+            names = dict(conn.execute("SELECT id, name FROM odds_companies"))
+        return names
+
+    def prune(self, before):
+        """
+        删除早于某个时间戳的快照，以及快照已全部删除的初始赔率
+
+        :return: 删除的快照行数
+        """
+        conn = self._connect()
+        with self._write_lock, conn:
+            deleted = conn.execute("DELETE FROM odds_snapshots WHERE ts < ?", (int(before),)).rowcount
+            # 初始赔率与快照按主键前缀对应，没有剩余快照的比赛和公司不会再被读取
+            orphaned = conn.execute(
+                "DELETE FROM odds_initial WHERE NOT EXISTS ("
+                "  SELECT 1 FROM odds_snapshots AS s"
+                "  WHERE s.match_id = odds_initial.match_id AND s.kind = odds_initial.kind"
+                "  AND s.company_id = odds_initial.company_id)"
+            ).rowcount
+            self._last_values.clear()
+        if deleted or orphaned:
+            logger.info("已删除 %s 条过期的赔率快照和 %s 条初始赔率", deleted, orphaned)
+        return deleted
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "snapshots_written": self.snapshots_written,
+            "snapshots_skipped": self.snapshots_skipped,
+        }
+
+
+def _numeric(value):
+    """
+    按SQLite NUMERIC类型亲和性转换值，用于与数据库中读出的值比较
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class OddsRecorder:
+    """
+    定时记录赔率快照的后台线程
+
+    直播比分轮询运行期间（即有人访问时）每隔interval秒，按预取优先级选取未结束的比赛，
+    抓取欧赔、亚盘和大小球并写入存储；每次请求前检查上游限流器，让出配额给交互请求
+    """
+
+    def __init__(self, store, interval=ODDS_RECORD_INTERVAL, max_matches=ODDS_RECORD_MAX_MATCHES,
+                 retention_days=ODDS_STORE_RETENTION_DAYS):
+        self.store = store
+        self.interval = interval
+        self.max_matches = max_matches
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pruned_at = 0.0
+        self.rounds = 0
+        self.errors = 0
+
+    def ensure_running(self, *_):
+        """
+        轮询线程没有运行时启动它，可以直接注册为live_feed的回调；存储未启用时不启动
+        """
+        if not self.store.enabled:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="odds-recorder", daemon=True)
+            self._thread.start()
+        logger.info("赔率历史记录已启动，间隔 %s 秒", self.interval)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not live_feed.stats()["running"]:
+                    self._thread = None
+                    break
+            started_at = time.monotonic()
+            self.record_round()
+            self._wakeup.wait(max(0.0, self.interval - (time.monotonic() - started_at)))
+        logger.info("赔率历史记录已停止")
+
+    def record_round(self):
+        """
+        记录一轮赔率快照
+        """
+        matches = prioritize([match for match in live_feed.matches() if match.get("status") != "4"])
+        written = 0
+        for match in matches[: self.max_matches]:
+            fid = match.get("fid")
+            for kind, (_, fetcher) in ODDS_KINDS.items():
+                upstream_limiter.for_url(BASE_URL["ODDS_BASE"]).wait_for_spare_capacity(
+                    PREFETCH_RESERVE, PREFETCH_YIELD_DELAY
+                )
+                try:
+                    written += self.store.record(fid, kind, fetcher(fid))
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning("记录比赛 %s 的%s赔率失败: %s", fid, kind, e)
+        self.rounds += 1
+        logger.debug("赔率历史记录完成一轮，写入 %s 行", written)
+
+        if time.monotonic() - self._pruned_at > 3600:
+            self._pruned_at = time.monotonic()
+            self.store.prune(time.time() - self.retention_days * 86400)
+
+    def stats(self):
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive()
+        return {"running": running, "rounds": self.rounds, "errors": self.errors, **self.store.stats()}
+
+
+# 全局赔率历史存储和定时记录
+odds_store = OddsStore()
+odds_recorder = OddsRecorder(odds_store)
+live_feed.add_listener(odds_recorder.ensure_running)
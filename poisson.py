@@ -0,0 +1,150 @@
+# 泊松比分模型模块
+# 根据主客队的预期进球（λ）计算胜平负、比分、进球数分布、大小球和半全场概率。
+# 比分矩阵由两队进球数概率的外积得到，一次数组运算取代前端Match_data.js中逐个比分调用
+# poissonProbability的嵌套循环；结果按四舍五入后的λ缓存，所有客户端共享
+#
+# 计算口径与Match_data.js一致：胜平负按0-8球统计，常见比分取0-4球中概率大于0.1%的前10个，
+# 单队进球数0-6球，总进球数0-12球，半全场按半场和全场比分相互独立计算
+
+from functools import lru_cache
+
+import numpy as np
+
+from config import POISSON_CACHE_SIZE, POISSON_LAMBDA_DECIMALS
+
+# 胜平负统计的最大进球数
+MAX_GOALS = 8
+# 常见比分的最大进球数、最小概率和数量
+SCORE_MAX_GOALS = 4
+SCORE_MIN_PROBABILITY = 0.001
+SCORE_TOP = 10
+# 单队进球数和总进球数分布的最大进球数
+TEAM_GOALS_MAX = 6
+TOTAL_GOALS_MAX = 12
+# 大小球盘口
+TOTAL_LINES = (0.5, 1.5, 2.5, 3.5, 4.5)
+# 半全场结果，依次为胜、平、负
+RESULTS = ("胜", "平", "负")
+
+
+def poisson_pmf(lam, max_goals):
+    """
+    0到max_goals球的泊松概率，用累乘代替阶乘：P(k) = P(k-1) * λ / k
+    """
+    ratios = np.empty(max_goals + 1)
+    ratios[0] = np.exp(-lam)
+    ratios[1:] = lam / np.arange(1, max_goals + 1)
+    return np.cumprod(ratios)
+
+
+def score_matrix(home_lambda, away_lambda, max_goals=MAX_GOALS):
+    """
+    比分概率矩阵，matrix[i, j]为主队i球、客队j球的概率
+    """
+    return np.outer(poisson_pmf(home_lambda, max_goals), poisson_pmf(away_lambda, max_goals))
+
+
+def outcome_probabilities(matrix):
+    """
+    由比分矩阵计算胜平负概率：对角线以下为主胜，对角线为平局，对角线以上为客胜
+    """
+    return np.array([np.tril(matrix, -1).sum(), np.trace(matrix), np.triu(matrix, 1).sum()])
+
+
+def _round_lambda(value):
+    return round(float(value), POISSON_LAMBDA_DECIMALS)
+
+
+@lru_cache(maxsize=POISSON_CACHE_SIZE)
+def _period_model(home_lambda, away_lambda):
+    """
+    单个时段（全场或半场）的概率，结果按λ缓存，由所有调用方共享，只能读取
+    """
+    home_pmf = poisson_pmf(home_lambda, TOTAL_GOALS_MAX)
+    away_pmf = poisson_pmf(away_lambda, TOTAL_GOALS_MAX)
+    matrix = np.outer(home_pmf[: MAX_GOALS + 1], away_pmf[: MAX_GOALS + 1])
+    outcomes = outcome_probabilities(matrix)
+
+    scores = matrix[: SCORE_MAX_GOALS + 1, : SCORE_MAX_GOALS + 1]
+    # 稳定排序，概率相同的比分保持主队进球数从小到大的顺序，与前端一致
+    order = np.argsort(-scores, axis=None, kind="stable")
+    top = [
+        {"home_goals": int(i), "away_goals": int(j), "probability": float(scores[i, j])}
+        for i, j in zip(*np.unravel_index(order, scores.shape))
+        if scores[i, j] > SCORE_MIN_PROBABILITY
+    ][:SCORE_TOP]
+
+    # 总进球数分布是两队进球数分布的卷积
+    total_pmf = np.convolve(home_pmf, away_pmf)[: TOTAL_GOALS_MAX + 1]
+    under = np.cumsum(total_pmf)
+    totals = [
+        {"line": line, "over": float(1 - under[int(line)]), "under": float(under[int(line)])}
+        for line in TOTAL_LINES
+    ]
+
+    return {
+        "home_lambda": home_lambda,
+        "away_lambda": away_lambda,
+        "win_draw_loss": {"home_win": float(outcomes[0]), "draw": float(outcomes[1]), "away_win": float(outcomes[2])},
+        "score_matrix": matrix.tolist(),
+        "scores": top,
+        "home_goals": home_pmf[: TEAM_GOALS_MAX + 1].tolist(),
+        "away_goals": away_pmf[: TEAM_GOALS_MAX + 1].tolist(),
+        "total_goals": total_pmf.tolist(),
+        "totals": totals,
+        "_outcomes": outcomes,
+    }
+
+
+def _public(period):
+    return {key: value for key, value in period.items() if not key.startswith("_")}
+
+
+@lru_cache(maxsize=POISSON_CACHE_SIZE)
+def _match_model(home_full, away_full, home_half, away_half):
+    full = _period_model(home_full, away_full)
+    result = {"full_time": _public(full)}
+    if home_half is not None and away_half is not None:
+        half = _period_model(home_half, away_half)
+        # 半场和全场相互独立时，半全场概率是两者胜平负概率的外积
+        ht_ft = np.outer(half["_outcomes"], full["_outcomes"])
+        result["half_time"] = _public(half)
+        result["half_full"] = {
+            f"{RESULTS[i]}{RESULTS[j]}": float(ht_ft[i, j]) for i in range(3) for j in range(3)
+        }
+    return result
+
+
+def scoreline_model(home_full, away_full, home_half=None, away_half=None):
+    """
+    计算一场比赛的泊松比分模型
+
+    λ按POISSON_LAMBDA_DECIMALS位小数四舍五入后缓存，相同λ的请求直接返回缓存结果
+
+    :param home_full: 主队全场预期进球
+    :param away_full: 客队全场预期进球
+    :param home_half: 主队半场预期进球，与away_half同时传入时计算半场和半全场
+    :param away_half: 客队半场预期进球
+    :return: {"full_time": {...}, "half_time": {...}, "half_full": {...}}
+    """
+    return _match_model(
+        _round_lambda(home_full),
+        _round_lambda(away_full),
+        _round_lambda(home_half) if home_half is not None else None,
+        _round_lambda(away_half) if away_half is not None else None,
+    )
+
+
+def cache_stats():
+    """
+    获取模型缓存的命中统计
+    """
+    info = _match_model.cache_info()
+    period = _period_model.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "period_hits": period.hits,
+        "period_misses": period.misses,
+    }
@@ -0,0 +1,212 @@
+# 连接池模块
+# 按上游主机管理requests会话，会话之间复用keep-alive连接，
+# 并清理长时间空闲或出错的会话
+
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import BASE_HEADERS, SESSION_POOL, USER_AGENTS
+
+
+def create_initial_cookies():
+    """
+    生成初始Cookie，用于模拟真实用户访问
+    """
+    return {
+        'Hm_lvt_f805f7762a9a04ccf3a8463c590e1e06': str(int(time.time())),
+        'Hm_lpvt_f805f7762a9a04ccf3a8463c590e1e06': str(int(time.time())),
+        'ASP.NET_SessionId': ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789', k=24)),
+    }
+
+
+class HostSessionPool:
+    """单个上游主机的会话池，会话按后进先出复用，保证常用会话的连接保持活跃"""
+
+    def __init__(self, host, max_sessions, pool_connections, pool_maxsize, idle_timeout):
+        self.host = host
+        self.max_sessions = max_sessions
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = deque()  # (会话, 最后使用时间)
+        self._sessions = set()  # 所有未关闭的会话，用于统计连接复用
+        self._seed = None  # 从启动快照恢复的User-Agent和Cookie，下一个新建的会话沿用
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted_idle = 0
+        self.evicted_broken = 0
+
+    def _create_session(self):
+        """
+        创建新会话，并按配置设置连接池大小
+        """
+        session = requests.Session()
+        session.headers.update(BASE_HEADERS)
+        seed, self._seed = self._seed, None
+        if seed:
+            # 沿用上一个实例的会话设置，上游看到的仍是同一个访客
+            session.headers['User-Agent'] = seed["user_agent"]
+            session.cookies.update(seed["cookies"])
+        else:
+            # 为每个会话设置随机User-Agent
+            session.headers['User-Agent'] = random.choice(USER_AGENTS)
+            # 初始化Cookie容器
+            session.cookies.update(create_initial_cookies())
+        # 重试由调用方的指数退避处理，适配器本身不重试
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _close(self, session):
+        self._sessions.discard(session)
+        session.close()
+
+    def checkout(self):
+        """
+        取出一个会话，优先复用最近使用过的会话
+        """
+        now = time.monotonic()
+        with self._lock:
+            # 最久未使用的会话在左侧，空闲超时的会话其连接多半已被服务器关闭
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                session, _ = self._idle.popleft()
+                self._close(session)
+                self.evicted_idle += 1
+            if self._idle:
+                session, _ = self._idle.pop()
+                self.reused += 1
+                return session
+            session = self._create_session()
+            self._sessions.add(session)
+            self.created += 1
+            return session
+
+    def checkin(self, session, broken=False):
+        """
+        归还会话；出错的会话或超出容量的会话直接关闭
+        """
+        with self._lock:
+            if broken:
+                self._close(session)
+                self.evicted_broken += 1
+            elif len(self._idle) >= self.max_sessions:
+                self._close(session)
+            else:
+                self._idle.append((session, time.monotonic()))
+
+    def export_settings(self):
+        """
+        导出最近使用的会话的User-Agent和Cookie，没有空闲会话时返回None
+        """
+        with self._lock:
+            if not self._idle:
+                return None
+            session = self._idle[-1][0]
+            return {
+                "user_agent": session.headers.get("User-Agent", ""),
+                "cookies": session.cookies.get_dict(),
+            }
+
+    def seed(self, settings):
+        """
+        设置下一个新建会话使用的User-Agent和Cookie
+        """
+        with self._lock:
+            self._seed = settings
+
+    def stats(self):
+        """
+        获取会话和连接复用统计信息
+
+        connections为实际建立的TCP/TLS连接数，requests为通过这些连接发出的请求数，
+        两者之差即复用keep-alive连接节省的握手次数
+        """
+        with self._lock:
+            sessions = list(self._sessions)
+            stats = {
+                "sessions": len(sessions),
+                "idle_sessions": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted_idle": self.evicted_idle,
+                "evicted_broken": self.evicted_broken,
+            }
+        connections = 0
+        requests_sent = 0
+        for session in sessions:
+            for adapter in set(session.adapters.values()):
+                for key in list(adapter.poolmanager.pools.keys()):
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is None:
+                        continue
+                    connections += pool.num_connections
+                    requests_sent += pool.num_requests
+        stats["connections"] = connections
+        stats["requests"] = requests_sent
+        stats["connection_reuse_ratio"] = (
+            round(1 - connections / requests_sent, 4) if requests_sent else 0.0
+        )
+        return stats
+
+
+class SessionPoolManager:
+    """按上游主机分别维护会话池"""
+
+    def __init__(self, config=SESSION_POOL):
+        self._config = config
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        """
+        获取URL所属主机的会话池
+        """
+        host = urlsplit(url).hostname or ""
+        pool = self._pools.get(host)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(host)
+                if pool is None:
+                    pool = HostSessionPool(host, **self._config)
+                    self._pools[host] = pool
+        return pool
+
+    def export_settings(self):
+        """
+        导出各主机会话的User-Agent和Cookie：{主机: 设置}
+        """
+        with self._lock:
+            pools = dict(self._pools)
+        settings = {host: pool.export_settings() for host, pool in pools.items()}
+        return {host: value for host, value in settings.items() if value}
+
+    def seed(self, settings):
+        """
+        恢复export_settings导出的会话设置
+        """
+        for host, value in settings.items():
+            self.for_url(f"https://{host}/").seed(value)
+
+    def stats(self):
+        """
+        获取所有主机的会话池统计信息
+        """
+        with self._lock:
+            pools = dict(self._pools)
+        return {host: pool.stats() for host, pool in pools.items()}
+
+
+# 全局会话池管理器
+session_pools = SessionPoolManager()
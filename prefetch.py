@@ -0,0 +1,172 @@
+# 预取模块
+# 首页渲染比赛列表后，在后台按优先级预先下载比赛弹窗需要的页面（shuju、欧赔、亚盘和大小球），
+# 首次点击比赛时直接命中页面缓存。预取的页面缓存时间长于预取间隔，下一轮预取时提前刷新即将过期的页面，
+# 两轮之间的点击不会落在页面刚过期的时刻。
+# detail.php变化很快（缓存10秒），预取的页面在点击前几乎总是已经过期，因此不预取。
+# 竞彩比赛和临近开赛（或正在进行）的比赛优先；预取逐个页面串行进行，每次请求前检查上游限流器，
+# 有交互请求排队或并发名额、令牌不足时暂停，让出上游配额
+
+import datetime
+import threading
+import time
+
+from config import (BASE_URL, PREFETCH_MAX_MATCHES, PREFETCH_PAGE_TTL,
+                    PREFETCH_REFRESH, PREFETCH_RESERVE, PREFETCH_YIELD_DELAY)
+from limiter import upstream_limiter
+from logger import get_logger
+from scraper import MatchScraper, OddsScraper
+
+# 创建日志记录器
+logger = get_logger("prefetch")
+
+# 预取任务：(名称, 抓取函数, 用于检查限流的URL)
+# 直接调用弹窗使用的抓取函数，请求头与交互请求一致，同时预先解析并缓存文档树
+PREFETCH_TASKS = (
+    ("shuju", OddsScraper.fetch_match_name, BASE_URL["ODDS_BASE"]),
+    ("oupei", OddsScraper.fetch_oupei_data, BASE_URL["ODDS_BASE"]),
+    ("yapan", OddsScraper.fetch_yapan_data, BASE_URL["ODDS_BASE"]),
+    ("daxiao", OddsScraper.fetch_daxiao_data, BASE_URL["ODDS_BASE"]),
+)
+
+
+def _kickoff(match_time, now):
+    """
+    把比赛列表中的时间（MM-DD HH:MM）转换为datetime，跨年时取离当前最近的年份
+
+    :return: datetime，无法解析时返回None
+    """
+    try:
+        kickoff = datetime.datetime.strptime(f"{now.year}-{match_time.strip()}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+    if (kickoff - now).days > 180:
+        kickoff = kickoff.replace(year=now.year - 1)
+    elif (now - kickoff).days > 180:
+        kickoff = kickoff.replace(year=now.year + 1)
+    return kickoff
+
+
+def prioritize(match_list, now=None):
+    """
+    按预取优先级排序比赛：竞彩比赛优先，其次是未结束的比赛，同类中离开赛时间越近越优先
+
+    :return: 排序后的比赛列表
+    """
+    now = now or datetime.datetime.now()
+
+    def priority(match):
+        kickoff = _kickoff(match.get("match_time", ""), now)
+        distance = abs((kickoff - now).total_seconds()) if kickoff else float("inf")
+        return (not match.get("jc_mark"), match.get("status") == "4", distance)
+
+    return sorted(match_list, key=priority)
+
+
+class Prefetcher:
+    """
+    比赛弹窗数据的后台预取调度器
+
+    每次调度用新的比赛列表替换尚未执行的计划，单个后台线程按顺序执行，计划执行完后线程退出
+    """
+
+    def __init__(self, max_matches=PREFETCH_MAX_MATCHES, refresh=PREFETCH_REFRESH, page_ttl=PREFETCH_PAGE_TTL,
+                 reserve=PREFETCH_RESERVE, yield_delay=PREFETCH_YIELD_DELAY, tasks=PREFETCH_TASKS):
+        self.max_matches = max_matches
+        self.refresh = refresh
+        self.page_ttl = page_ttl
+        self.reserve = reserve
+        self.yield_delay = yield_delay
+        self.tasks = tasks
+        self._lock = threading.Lock()
+        self._plan = []  # 待预取的fid，按优先级排列
+        self._warmed_at = {}  # fid -> 最近一次预取完成的时间
+        self._current = None  # 正在预取的fid
+        self._thread = None
+        self.scheduled = 0
+        self.warmed = 0
+        self.fetched = 0
+        self.yields = 0
+        self.errors = 0
+
+    def schedule(self, match_list):
+        """
+        根据比赛列表生成预取计划，替换尚未执行的旧计划
+
+        :return: 计划预取的比赛数
+        """
+        now = time.monotonic()
+        plan = []
+        with self._lock:
+            for fid, warmed_at in list(self._warmed_at.items()):
+                if now - warmed_at >= self.refresh:
+                    del self._warmed_at[fid]
+            for match in prioritize(match_list):
+                fid = match.get("fid")
+                if not fid or fid in self._warmed_at or fid == self._current or fid in plan:
+                    continue
+                plan.append(fid)
+                if len(plan) >= self.max_matches:
+                    break
+            self._plan = plan
+            self.scheduled += len(plan)
+            if plan and (self._thread is None or not self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._thread.start()
+        if plan:
+            logger.debug("已安排预取 %s 场比赛", len(plan))
+        return len(plan)
+
+    def _next(self):
+        with self._lock:
+            if not self._plan:
+                self._thread = None
+                self._current = None
+                return None
+            self._current = self._plan.pop(0)
+            return self._current
+
+    def _wait_for_capacity(self, url):
+        """
+        等待上游主机空闲，有交互请求排队或名额不足时暂停
+        """
+        waits = upstream_limiter.for_url(url).wait_for_spare_capacity(self.reserve, self.yield_delay)
+        if waits:
+            with self._lock:
+                self.yields += waits
+
+    def _run(self):
+        while True:
+            fid = self._next()
+            if fid is None:
+                break
+            for name, fetcher, url in self.tasks:
+                self._wait_for_capacity(url)
+                try:
+                    # 剩余有效期撑不到下一轮预取的页面重新下载，新页面的有效期长于预取间隔
+                    with MatchScraper.page_policy(self.page_ttl, self.refresh):
+                        fetcher(fid)
+                    with self._lock:
+                        self.fetched += 1
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                    logger.warning("预取比赛 %s 的%s数据失败: %s", fid, name, e)
+            with self._lock:
+                self._warmed_at[fid] = time.monotonic()
+                self.warmed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "pending": len(self._plan),
+                "scheduled": self.scheduled,
+                "warmed": self.warmed,
+                "fetched": self.fetched,
+                "yields": self.yields,
+                "errors": self.errors,
+            }
+
+
+# 全局预取调度器
+prefetcher = Prefetcher()
@@ -3,78 +3,199 @@
 
 import random
 import re
-import time
 import threading
+import time
 import traceback
+from contextlib import contextmanager
+from io import BytesIO
 
 import requests
-from bs4 import BeautifulSoup
-
-from config import (BASE_HEADERS, BASE_URL, ENCODING, MAX_DELAY, MAX_RETRIES,
-                    MIN_DELAY, REQUEST_TIMEOUT, USER_AGENTS)
-from logger import get_logger
+from lxml import etree
+
+from cache import (CachedPage, jc_fid_map_cache, jc_fid_map_flight,
+                   match_details_flight, page_cache, page_flight)
+from cassette import cassette
+from config import (BASE_HEADERS, BASE_URL, ENCODING, FANOUT_PAGE_TIMEOUT,
+                    LIVE_PAGE_CACHE_TTL, MAX_DELAY, MAX_RETRIES, MIN_DELAY,
+                    PAGE_CACHE_TTL, REQUEST_TIMEOUT, USER_AGENTS)
+from fanout import submit
+from limiter import upstream_limiter
+from metrics import (instrument_fetchers, observe_upstream_request,
+                     upstream_retries, upstream_stage_seconds)
+from pool import create_initial_cookies, session_pools
+from logger import get_logger, get_sampled_logger
 
 # 创建日志记录器
 logger = get_logger("scraper")
+# 逐行解析的日志采样输出
+row_logger = get_sampled_logger("scraper")
 
 # 兼容旧代码的HEADERS定义
 HEADERS = BASE_HEADERS
 
+# 赔率页面：类型 -> (页面名称, 页面完整时包含的文字, 日志中的名称)
+ODDS_PAGES = {
+    "oupei": ("ouzhi", "百家欧赔", "欧赔"),
+    "yapan": ("yazhi", "亚盘对比", "亚盘"),
+    "daxiao": ("daxiao", "大小指数", "大小球"),
+}
+
+# 竞彩标识映射在缓存中的key
+JC_FID_MAP_KEY = "jc_fid_map"
+
+# 当前线程的页面缓存策略(ttl, min_remaining)，由MatchScraper.page_policy设置
+_page_policy = threading.local()
+
+
+# 比赛列表行的lxml查询，预先编译避免每行重复解析XPath
+_find_tds = etree.XPath(".//td")
+_first_link = etree.XPath("(.//a)[1]")
+_find_by_class = etree.XPath(
+    "(.//*[contains(concat(' ', normalize-space(@class), ' '), concat(' ', $name, ' '))])[1]"
+)
+_string = etree.XPath("string()")
+
+
+def _text(element):
+    """
+    获取元素及其所有子元素的文本，并去掉首尾空白
+    """
+    return _string(element).strip()
+
+
+def _find_link(element):
+    """
+    查找第一个链接子元素，找不到时返回None
+    """
+    found = _first_link(element)
+    return found[0] if found else None
+
+
+def _find_class(element, name):
+    """
+    查找第一个class包含name的子元素，找不到时返回None
+    """
+    found = _find_by_class(element, name=name)
+    return found[0] if found else None
+
 
 class MatchScraper:
     """比赛数据抓取器"""
-    
-    # 会话对象池
-    _session_pool = []
-    _max_sessions = 5
-    
-    # 并发控制信号量
-    _semaphore = None
-    _max_concurrent_requests = 3
+
+    # 竞彩标识映射的后台刷新锁，避免过期后每个请求都提交刷新任务
+    _jc_refresh_lock = threading.Lock()
     
     @classmethod
-    def _get_semaphore(cls):
+    def _get_session(cls, url):
         """
-        获取或创建信号量
+        从URL所属主机的会话池取出会话对象
         """
-        if cls._semaphore is None:
-            cls._semaphore = threading.Semaphore(cls._max_concurrent_requests)
-        return cls._semaphore
-    
-    @classmethod
-    def _get_session(cls):
-        """
-        获取或创建会话对象
-        """
-        if not cls._session_pool:
-            # 创建新会话
-            session = requests.Session()
-            session.headers.update(BASE_HEADERS)
-            # 为每个会话设置随机User-Agent
-            session.headers['User-Agent'] = random.choice(USER_AGENTS)
-            # 初始化Cookie容器
-            session.cookies.update(cls._get_initial_cookies())
-            return session
-        return cls._session_pool.pop()
+        return session_pools.for_url(url).checkout()
     
     @classmethod
     def _get_initial_cookies(cls):
         """
         获取初始Cookie，用于模拟真实用户访问
         """
-        return {
-            'Hm_lvt_f805f7762a9a04ccf3a8463c590e1e06': str(int(time.time())),
-            'Hm_lpvt_f805f7762a9a04ccf3a8463c590e1e06': str(int(time.time())),
-            'ASP.NET_SessionId': ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789', k=24)),
-        }
+        return create_initial_cookies()
     
     @classmethod
-    def _release_session(cls, session):
+    def _release_session(cls, url, session, broken=False):
+        """
+        释放会话对象到会话池，出错的会话会被关闭
+        """
+        session_pools.for_url(url).checkin(session, broken)
+
+    @staticmethod
+    def _cache_ttl_for(url):
+        """
+        根据URL选择页面缓存有效期
+        """
+        if "live.500.com" in url:
+            return LIVE_PAGE_CACHE_TTL
+        return PAGE_CACHE_TTL
+
+    @staticmethod
+    def _encoding_for(url):
+        """
+        根据URL选择页面编码
+        """
+        if "live.500.com" in url:
+            return ENCODING["LIVE_MATCHES"]
+        return ENCODING["ODDS_PAGES"]
+
+    @classmethod
+    def fetch_page(
+        cls,
+        url,
+        headers=None,
+        retries=MAX_RETRIES,
+        timeout=REQUEST_TIMEOUT,
+        use_cache=True,
+    ):
+        """
+        获取页面并返回CachedPage，缓存有效期内同一URL只下载一次，
+        各解析方法通过CachedPage.soup()共享同一棵文档树
+        """
+        if use_cache:
+            ttl, min_remaining = getattr(_page_policy, "value", None) or (None, 0)
+            page = page_cache.get(url, min_remaining)
+            if page is not None:
+                logger.debug("页面缓存命中: %s", url)
+                return page
+
+            # 同一URL的并发未命中只下载一次
+            return page_flight.do(url, cls._download_page, url, headers, retries, timeout, ttl=ttl)
+
+        return cls._download_page(url, headers, retries, timeout, use_cache=False)
+
+    @staticmethod
+    @contextmanager
+    def page_policy(ttl=None, min_remaining=0):
+        """
+        在当前线程内调整fetch_page的页面缓存策略，供后台预取使用
+
+        :param ttl: 新下载页面的缓存有效期（秒），默认按URL选择
+        :param min_remaining: 剩余有效期不足该秒数的缓存页面重新下载（有旧页面时为条件请求）
+        """
+        previous = getattr(_page_policy, "value", None)
+        _page_policy.value = (ttl, min_remaining)
+        try:
+            yield
+        finally:
+            _page_policy.value = previous
+
+    @classmethod
+    def _download_page(cls, url, headers, retries, timeout, use_cache=True, ttl=None):
+        """
+        下载页面并写入页面缓存，缓存中有过期页面时先做条件请求
+        """
+        if not use_cache:
+            response = cls._timed_request(url, headers, retries, timeout)
+            return CachedPage.from_response(response, url) if response is not None else None
+
+        # 有过期的旧页面时发送条件请求，页面未变化时上游返回304，无需下载完整页面
+        stale, validators = page_cache.revalidation_headers(url)
+        if validators:
+            headers = {**(headers or {}), **validators}
+
+        response = cls._timed_request(url, headers, retries, timeout)
+        if response is None:
+            return None
+
+        page = None if response.status_code == 304 else CachedPage.from_response(response, url)
+        return page_cache.store(url, page, ttl or cls._cache_ttl_for(url), stale, response.status_code)
+
+    @classmethod
+    def _timed_request(cls, url, headers, retries, timeout):
         """
-        释放会话对象到会话池
+        发出上游请求，并记录包括排队、重试和退避在内的总耗时
         """
-        if len(cls._session_pool) < cls._max_sessions:
-            cls._session_pool.append(session)
+        start = time.perf_counter()
+        response = cls._request_with_retries(url, headers, retries, timeout)
+        status_code = response.status_code if response is not None else None
+        observe_upstream_request(url, status_code, time.perf_counter() - start)
+        return response
 
     @staticmethod
     def make_request_with_retries(
@@ -82,96 +203,500 @@ class MatchScraper:
         headers=None,
         retries=MAX_RETRIES,
         timeout=REQUEST_TIMEOUT,
+        use_cache=True,
     ):
         """
-        带有指数退避策略的同步请求函数
+        带有指数退避策略和页面缓存的同步请求函数
         """
+        page = MatchScraper.fetch_page(url, headers, retries, timeout, use_cache)
+        return page.to_response() if page else None
+
+    @staticmethod
+    def _request_with_retries(
+        url,
+        headers=None,
+        retries=MAX_RETRIES,
+        timeout=REQUEST_TIMEOUT,
+    ):
+        """
+        带有指数退避策略的同步请求函数，不经过页面缓存
+        """
+        # 回放模式下直接返回录制的响应，不访问网络，也不占用限流名额
+        if cassette.replaying:
+            page = cassette.replay(url)
+            if page is None:
+                return None
+            response = page.to_response()
+            response.encoding = MatchScraper._encoding_for(url)
+            return response
+
         session = None
-        semaphore = MatchScraper._get_semaphore()
-        try:
-            # 获取信号量，限制并发请求
-            with semaphore:
-                logger.debug(f"获取到信号量，当前并发请求数: {MatchScraper._max_concurrent_requests - semaphore._value}")
-                
+        broken = False
+        last_error = ""
+        host_limiter = upstream_limiter.for_url(url)
+        host = host_limiter.host
+        queued_at = time.perf_counter()
+        # 占用上游主机的并发名额，直到请求和所有重试结束
+        with host_limiter.slot():
+            upstream_stage_seconds.observe(time.perf_counter() - queued_at, host=host, stage="limiter_wait")
+            logger.debug("获取到并发名额: %s, 当前并发请求数: %s", host_limiter.host, host_limiter.in_flight)
+            try:
                 # 获取会话对象
-                session = MatchScraper._get_session()
-            
-            # 构建请求头
-            final_headers = dict(session.headers)
-            final_headers["User-Agent"] = random.choice(USER_AGENTS)
+                with upstream_stage_seconds.time(host=host, stage="session_checkout"):
+                    session = MatchScraper._get_session(url)
+
+                # 构建请求头
+                final_headers = dict(session.headers)
+                final_headers["User-Agent"] = random.choice(USER_AGENTS)
+
+                # 添加自定义请求头
+                if headers:
+                    final_headers.update(headers)
+
+                for attempt in range(retries):
+                    try:
+                        # 指数退避策略
+                        if attempt > 0:
+                            upstream_retries.inc(host=host, reason=last_error)
+                            # 延迟时间 = 基础延迟 * 2^(尝试次数-1) + 随机抖动
+                            base_delay = 0.5 * (2 ** (attempt - 1))
+                            jitter = random.uniform(0, 0.5)
+                            delay_time = min(base_delay + jitter, MAX_DELAY)
+                            with upstream_stage_seconds.time(host=host, stage="backoff"):
+                                time.sleep(delay_time)
+                            logger.debug("第%s次重试请求: %s, 延迟: %.2f秒", attempt+1, url, delay_time)
+
+                        # 按令牌桶速率发出请求，每次重试都计入速率
+                        with upstream_stage_seconds.time(host=host, stage="rate_wait"):
+                            host_limiter.throttle()
+                        with upstream_stage_seconds.time(host=host, stage="network"):
+                            response = session.get(url, headers=final_headers, timeout=timeout)
+                        response.raise_for_status()
+
+                        # 根据URL选择合适的编码
+                        response.encoding = MatchScraper._encoding_for(url)
+
+                        if cassette.recording:
+                            cassette.record(url, response.status_code, response.headers, response.content, response.encoding)
+
+                        logger.debug("请求成功: %s, 状态码: %s", url, response.status_code)
+                        return response
+                    except requests.exceptions.ConnectionError as e:
+                        # 连接出错的会话归还时关闭，不再复用
+                        broken = True
+                        last_error = "connection"
+                        logger.warning("连接错误 (尝试%s/%s): %s, 错误: %s", attempt+1, retries, url, e)
+                        if attempt == retries - 1:
+                            logger.error("连接错误达到最大重试次数: %s", url)
+                            return None
+                    except requests.exceptions.Timeout as e:
+                        last_error = "timeout"
+                        logger.warning("请求超时 (尝试%s/%s): %s, 错误: %s", attempt+1, retries, url, e)
+                        if attempt == retries - 1:
+                            logger.error("请求超时达到最大重试次数: %s", url)
+                            return None
+                    except requests.exceptions.HTTPError as e:
+                        last_error = "http"
+                        logger.warning("HTTP错误 (尝试%s/%s): %s, 状态码: %s, 错误: %s", attempt+1, retries, url, e.response.status_code, e)
+                        # 对于4xx错误，通常不需要重试
+                        if 400 <= e.response.status_code < 500:
+                            logger.error("HTTP客户端错误，停止重试: %s, 状态码: %s", url, e.response.status_code)
+                            return None
+                        if attempt == retries - 1:
+                            logger.error("HTTP错误达到最大重试次数: %s", url)
+                            return None
+                    except requests.exceptions.RequestException as e:
+                        last_error = "other"
+                        logger.warning("请求异常 (尝试%s/%s): %s, 错误: %s", attempt+1, retries, url, e)
+                        if attempt == retries - 1:
+                            logger.error("请求异常达到最大重试次数: %s", url)
+                            return None
+            finally:
+                # 释放会话对象
+                if session:
+                    MatchScraper._release_session(url, session, broken)
+        return None
 
-            # 添加自定义请求头
-            if headers:
-                final_headers.update(headers)
+    @staticmethod
+    def _match_rows(html):
+        """
+        逐行解析页面中的比赛行（带gy属性的tr），返回生成器
 
-            for attempt in range(retries):
-                try:
-                    # 指数退避策略
-                    if attempt > 0:
-                        # 延迟时间 = 基础延迟 * 2^(尝试次数-1) + 随机抖动
-                        base_delay = 0.5 * (2 ** (attempt - 1))
-                        jitter = random.uniform(0, 0.5)
-                        delay_time = min(base_delay + jitter, MAX_DELAY)
-                        time.sleep(delay_time)
-                        logger.debug(f"第{attempt+1}次重试请求: {url}, 延迟: {delay_time:.2f}秒")
-
-                    response = session.get(url, headers=final_headers, timeout=timeout)
-                    response.raise_for_status()
-
-                    # 根据URL选择合适的编码
-                    if "live.500.com" in url:
-                        response.encoding = ENCODING["LIVE_MATCHES"]
+        使用lxml的iterparse按tr流式解析，每处理完一行就清理已解析的部分，
+        不构建整棵文档树，也不需要再做CSS选择
+        """
+        source = BytesIO(html.encode("utf-8"))
+        for _, row in etree.iterparse(source, events=("end",), tag="tr", html=True, encoding="utf-8"):
+            if row.get("gy") is None:
+                continue
+            yield row
+            # 清理已处理的比赛行和之前的兄弟节点，解析过程中只保留很小的一部分文档
+            row.clear(keep_tail=True)
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+    @classmethod
+    def parse_match_list(cls, html, date=None, is_future_match=False, jc_fid_map=None):
+        """
+        解析比赛列表页面
+        :param html: 页面文本
+        :param date: 日期字符串，不传表示直播页面
+        :param is_future_match: 是否为未来比赛页面
+        :param jc_fid_map: fid到竞彩标识的映射
+        :return: 比赛列表
+        """
+        return list(cls.iter_match_list(html, date, is_future_match, jc_fid_map))
+
+    @classmethod
+    def iter_match_list(cls, html, date=None, is_future_match=False, jc_fid_map=None):
+        """
+        解析比赛列表页面，每解析完一行就产出一场比赛，参数与parse_match_list相同
+
+        :return: 生成器，产出比赛字典
+        """
+        jc_fid_map = jc_fid_map or {}
+
+        # 比赛行边解析边处理
+        row_count = 0
+        for idx, row in enumerate(cls._match_rows(html)):
+            row_count += 1
+            try:
+                match = cls._parse_match_row(row, date, is_future_match, jc_fid_map)
+            except Exception as e:
+                row_html = etree.tostring(row, encoding="unicode", with_tail=False)
+                logger.error("解析第%s个比赛行失败: %s, 行数据: %s", idx+1, e, row_html)
+                logger.debug(traceback.format_exc())
+                # 跳过当前行，继续解析下一个比赛
+                continue
+            yield match
+        logger.info("找到 %s 个比赛行", row_count)
+
+    @staticmethod
+    def _parse_match_row(row, date, is_future_match, jc_fid_map):
+        """
+        解析比赛列表中的一行（带gy属性的tr），返回比赛字典
+
+        row为lxml元素，各字段按单元格位置读取，单元格只查找一次
+        """
+        # 解析比赛信息
+        league_td = _find_class(row, "ssbox_01")
+        league = _find_link(league_td) if league_td is not None else None
+
+        # 通过fid获取竞彩标识
+        fid = row.get("fid", "")
+        jc_mark = jc_fid_map.get(fid, "")
+
+        # 获取所有td元素
+        tds = _find_tds(row)
+        
+        # 初始化变量
+        round_info = ""
+        match_time = ""
+        status_text = ""
+        home_team = ""
+        home_team_id = ""
+        away_team = ""
+        away_team_id = ""
+        home_score = ""
+        away_score = ""
+        half_score = ""
+        
+        # 根据是否为历史比赛或未来比赛使用不同的列索引
+        if date:
+            if is_future_match:
+                # 未来比赛页面的列索引
+                # 确保所有字段都有默认值，避免None值导致的问题
+                round_info = _text(tds[1]) if len(tds) > 1 else ""  # 轮数在第1列
+                match_time = _text(tds[2]) if len(tds) > 2 else ""  # 时间在第2列
+                status_text = "未开始"  # 未来比赛状态默认为"未开始"
+                
+                # 主队信息 - 未来比赛
+                if len(tds) > 3:
+                    home_team_td = tds[3]  # 主队在第3列
+                    home_team_a = _find_link(home_team_td)
+                    if home_team_a is not None:
+                        home_team = _text(home_team_a)
+                        # 提取主队ID
+                        home_team_href = home_team_a.get("href", "")
+                        home_team_match = re.search(r"team/(\d+)", home_team_href)
+                        if home_team_match:
+                            home_team_id = home_team_match.group(1)
                     else:
-                        response.encoding = ENCODING["ODDS_PAGES"]
-
-                    logger.debug(f"请求成功: {url}, 状态码: {response.status_code}")
-                    return response
-                except requests.exceptions.ConnectionError as e:
-                    logger.warning(f"连接错误 (尝试{attempt+1}/{retries}): {url}, 错误: {e}")
-                    if attempt == retries - 1:
-                        logger.error(f"连接错误达到最大重试次数: {url}")
-                        return None
-                except requests.exceptions.Timeout as e:
-                    logger.warning(f"请求超时 (尝试{attempt+1}/{retries}): {url}, 错误: {e}")
-                    if attempt == retries - 1:
-                        logger.error(f"请求超时达到最大重试次数: {url}")
-                        return None
-                except requests.exceptions.HTTPError as e:
-                    logger.warning(f"HTTP错误 (尝试{attempt+1}/{retries}): {url}, 状态码: {e.response.status_code}, 错误: {e}")
-                    # 对于4xx错误，通常不需要重试
-                    if 400 <= e.response.status_code < 500:
-                        logger.error(f"HTTP客户端错误，停止重试: {url}, 状态码: {e.response.status_code}")
-                        return None
-                    if attempt == retries - 1:
-                        logger.error(f"HTTP错误达到最大重试次数: {url}")
-                        return None
-                except requests.exceptions.RequestException as e:
-                    logger.warning(f"请求异常 (尝试{attempt+1}/{retries}): {url}, 错误: {e}")
-                    if attempt == retries - 1:
-                        logger.error(f"请求异常达到最大重试次数: {url}")
-                        return None
-        finally:
-            # 释放会话对象
-            if session:
-                MatchScraper._release_session(session)
-        return None
+                        # 如果没有链接，直接取文本
+                        home_team = _text(home_team_td)
+                
+                # 客队信息 - 未来比赛
+                if len(tds) > 5:
+                    away_team_td = tds[5]  # 客队在第5列
+                    away_team_a = _find_link(away_team_td)
+                    if away_team_a is not None:
+                        away_team = _text(away_team_a)
+                        # 提取客队ID
+                        away_team_href = away_team_a.get("href", "")
+                        away_team_match = re.search(r"team/(\d+)", away_team_href)
+                        if away_team_match:
+                            away_team_id = away_team_match.group(1)
+                    else:
+                        # 如果没有链接，直接取文本
+                        away_team = _text(away_team_td)
+                
+                # 未来比赛还未开始，比分和半场比分都为空
+                home_score = ""
+                away_score = ""
+                half_score = ""
+                # 确保未来比赛状态被正确设置为"0"（未开始）
+                tr_status = "0"
+            else:
+                # 历史比赛页面的列索引（根据测试结果最终调整）
+                # 确保所有字段都有默认值，避免None值导致的问题
+                round_info = _text(tds[1]) if len(tds) > 1 else ""  # 轮数在第1列
+                match_time = _text(tds[2]) if len(tds) > 2 else ""  # 时间在第2列
+                status_text = _text(tds[3]) if len(tds) > 3 else ""  # 状态在第3列
+                
+                # 主队信息 - 历史比赛
+                if len(tds) > 4:
+                    home_team_td = tds[4]  # 主队在第4列
+                    home_team_a = _find_link(home_team_td)
+                    if home_team_a is not None:
+                        home_team = _text(home_team_a)
+                        # 提取主队ID
+                        home_team_href = home_team_a.get("href", "")
+                        home_team_match = re.search(r"team/(\d+)", home_team_href)
+                        if home_team_match:
+                            home_team_id = home_team_match.group(1)
+                    else:
+                        # 如果没有链接，直接取文本
+                        home_team = _text(home_team_td)
+                
+                # 客队信息 - 历史比赛
+                if len(tds) > 6:
+                    away_team_td = tds[6]  # 客队在第6列
+                    away_team_a = _find_link(away_team_td)
+                    if away_team_a is not None:
+                        away_team = _text(away_team_a)
+                        # 提取客队ID
+                        away_team_href = away_team_a.get("href", "")
+                        away_team_match = re.search(r"team/(\d+)", away_team_href)
+                        if away_team_match:
+                            away_team_id = away_team_match.group(1)
+                    else:
+                        # 如果没有链接，直接取文本
+                        away_team = _text(away_team_td)
+                
+                # 抓取比分信息 - 历史比赛
+                if len(tds) > 5:
+                    score_td = tds[5]  # 全场比分在第5列
+                    # 查找包含比分的元素
+                    score_text = _text(score_td)
+                    # 尝试从文本中提取比分，使用更宽松的正则表达式
+                    score_match = re.search(r"(\d+)\s*[-:]\s*(\d+)", score_text)
+                    if score_match:
+                        home_score = score_match.group(1)
+                        away_score = score_match.group(2)
+                    else:
+                        # 如果没有找到正常比分，尝试查找可能的特殊格式
+                        home_score_match = re.search(r"^(\d+)\s*", score_text)
+                        away_score_match = re.search(r"\s*(\d+)$", score_text)
+                        if home_score_match and away_score_match:
+                            home_score = home_score_match.group(1)
+                            away_score = away_score_match.group(1)
+                
+                # 半场比分 - 历史比赛
+                half_score = ""
+                if len(tds) > 7:
+                    half_score_td = tds[7]  # 半场比分在第7列
+                    half_score_text = _text(half_score_td)
+                    # 尝试从文本中提取半场比分，使用更宽松的正则表达式
+                    half_match = re.search(r"(\d+)\s*[-:]\s*(\d+)", half_score_text)
+                    if half_match:
+                        half_score = f"{half_match.group(1)}-{half_match.group(2)}"
+        else:
+            # 直播比赛页面的列索引
+            if len(tds) > 2:
+                round_info = _text(tds[2])
+            if len(tds) > 3:
+                match_time = _text(tds[3])
+            if len(tds) > 4:
+                status_text = _text(tds[4])
+            
+            # 主队信息 - 直播比赛
+            if len(tds) > 5:
+                home_team_td = tds[5]
+                home_team_a = _find_link(home_team_td)
+                if home_team_a is not None:
+                    home_team = _text(home_team_a)
+                    # 提取主队ID
+                    home_team_href = home_team_a.get("href", "")
+                    home_team_match = re.search(r"team/(\d+)", home_team_href)
+                    if home_team_match:
+                        home_team_id = home_team_match.group(1)
+            
+            # 客队信息 - 直播比赛
+            if len(tds) > 7:
+                away_team_td = tds[7]
+                away_team_a = _find_link(away_team_td)
+                if away_team_a is not None:
+                    away_team = _text(away_team_a)
+                    # 提取客队ID
+                    away_team_href = away_team_a.get("href", "")
+                    away_team_match = re.search(r"team/(\d+)", away_team_href)
+                    if away_team_match:
+                        away_team_id = away_team_match.group(1)
+            
+            # 抓取比分信息 - 直播比赛
+            pk_div = _find_class(row, "pk")
+            if pk_div is not None:
+                # 主队全场比分
+                clt1 = _find_class(pk_div, "clt1")
+                if clt1 is not None:
+                    home_score = _text(clt1)
+
+                # 客队全场比分
+                clt3 = _find_class(pk_div, "clt3")
+                if clt3 is not None:
+                    away_score = _text(clt3)
+
+            # 半场比分 - 直播比赛
+            if len(tds) > 8:
+                half_score = _text(tds[8])
+
+        # 获取tr标签的属性
+        tr_status = row.get("status", "")
+        fid = row.get("fid", "")
+        sid = row.get("sid", "")
+        
+        # 统一的状态映射
+        status_map = {
+            "未开始": "0",
+            "上半场": "1",
+            "中场结束": "2",
+            "下半场": "3",
+            "已结束": "4",
+            "完": "4",
+            "改期": "6",
+            "待定": "9",
+            "加时赛开始": "10"
+        }
+        
+        # 对于历史和未来比赛，如果tr_status为空或无效，根据status_text设置合适的status值
+        if date:
+            if not tr_status or tr_status not in status_map.values():
+                tr_status = status_map.get(status_text, "")
+
+        # 获取联赛td的背景色
+        league_bgcolor = league_td.get("bgcolor", "") if league_td is not None else ""
+
+        # 构造logo链接
+        home_team_logo = (
+            BASE_URL["TEAM_LOGO_BASE"].format(team_id=home_team_id)
+            if home_team_id
+            else ""
+        )
+        away_team_logo = (
+            BASE_URL["TEAM_LOGO_BASE"].format(team_id=away_team_id)
+            if away_team_id
+            else ""
+        )
+
+        # 创建比赛字典
+        match = {
+            "league": _text(league) if league is not None else "",
+            "league_bgcolor": league_bgcolor,
+            "round": round_info,
+            "match_time": match_time,
+            "status_text": status_text,
+            "status": tr_status,
+            "fid": fid,
+            "sid": sid,
+            "jc_mark": jc_mark,
+            "home_team": home_team,
+            "home_team_id": home_team_id,
+            "home_team_logo": home_team_logo,
+            "away_team": away_team,
+            "away_team_id": away_team_id,
+            "away_team_logo": away_team_logo,
+            "home_score": home_score,
+            "away_score": away_score,
+            "half_score": half_score,
+        }
+
+        return match
 
     @classmethod
     def fetch_jc_fid_map(cls):
         """
-        从https://live.500.com/获取竞彩比赛的fid和标识映射
+        获取竞彩比赛的fid和标识映射，优先使用缓存
+
+        缓存过期后先返回旧映射并在后台刷新；没有任何缓存时同步下载，
+        并发调用只下载和解析一次
+        """
+        jc_fid_map = cls.cached_jc_fid_map()
+        if jc_fid_map is not None:
+            return jc_fid_map
+        return jc_fid_map_flight.do(JC_FID_MAP_KEY, cls._load_jc_fid_map)
+
+    @classmethod
+    def cached_jc_fid_map(cls):
+        """
+        从缓存获取竞彩标识映射，不发起同步请求
+
+        缓存已过期但仍在保留期内时返回旧映射，同时触发后台刷新
+        :return: 竞彩标识映射，没有可用缓存时返回None
+        """
+        jc_fid_map = jc_fid_map_cache.get(JC_FID_MAP_KEY)
+        if jc_fid_map is not None:
+            return jc_fid_map
+
+        jc_fid_map = jc_fid_map_cache.get_stale(JC_FID_MAP_KEY)
+        if jc_fid_map is not None:
+            cls._refresh_jc_fid_map_in_background()
+        return jc_fid_map
+
+    @classmethod
+    def _refresh_jc_fid_map_in_background(cls):
+        """
+        在共享线程池中刷新竞彩标识映射，同一时刻只有一个刷新任务
+        """
+        if not cls._jc_refresh_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                jc_fid_map_flight.do(JC_FID_MAP_KEY, cls._load_jc_fid_map)
+            except Exception as e:
+                logger.error("后台刷新竞彩标识映射失败: %s", e)
+            finally:
+                cls._jc_refresh_lock.release()
+
+        logger.debug("竞彩标识映射已过期，后台刷新")
+        submit(refresh)
+
+    @classmethod
+    def _load_jc_fid_map(cls):
+        """
+        从https://live.500.com/下载并解析竞彩比赛的fid和标识映射，成功后写入缓存
+
+        下载失败时不覆盖缓存，继续使用旧映射
         """
         url = "https://live.500.com/"
-        response = cls.make_request_with_retries(url)
-        if not response:
-            return {}
+        page = cls.fetch_page(url)
+        if not page:
+            stale = jc_fid_map_cache.get_stale(JC_FID_MAP_KEY)
+            return stale if stale is not None else {}
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        jc_fid_map = cls.parse_jc_fid_map(page.text)
+        logger.info("竞彩标识映射已更新，共 %s 场", len(jc_fid_map))
+        return jc_fid_map_cache.set(JC_FID_MAP_KEY, jc_fid_map)
 
+    @classmethod
+    def parse_jc_fid_map(cls, html):
+        """
+        从页面文本中解析竞彩比赛的fid和标识映射
+        """
         jc_fid_map = {}
 
         # 找到所有竞彩比赛行（带有gy属性的tr）
-        jc_rows = soup.select("tr[gy]")
+        jc_rows = cls._match_rows(html)
 
         for row in jc_rows:
             # 获取fid
@@ -180,15 +705,15 @@ class MatchScraper:
                 continue
 
             # 获取第一个td，包含复选框和竞彩标识
-            tds = row.select("td")
+            tds = _find_tds(row)
             if not tds:
                 continue
 
             jc_td = tds[0]
             # 检查是否包含复选框
-            if "checkbox" in str(jc_td):
+            if "checkbox" in etree.tostring(jc_td, encoding="unicode", with_tail=False):
                 # 直接获取td的文本内容作为竞彩标识
-                jc_mark = jc_td.text.strip()
+                jc_mark = _text(jc_td)
                 if jc_mark:
                     jc_fid_map[fid] = jc_mark
 
@@ -201,9 +726,23 @@ class MatchScraper:
         :param date: 日期字符串，格式为YYYY-MM-DD，不传则获取直播比赛
         :return: 比赛列表
         """
+        match_list = list(cls.iter_live_matches(date))
+        logger.info("成功解析 %s 场比赛", len(match_list))
+        return match_list
+
+    @classmethod
+    def iter_live_matches(cls, date=None):
+        """
+        获取比赛列表，每解析完一行就产出一场比赛，参数与fetch_live_matches相同
+
+        页面下载完成后边解析边产出，调用方可以在整个列表解析完之前开始输出；
+        下载或解析失败时记录错误并结束，不抛出异常
+        :return: 生成器，产出比赛字典
+        """
         try:
-            # 1. 先从https://live.500.com/获取竞彩比赛的fid和标识映射
-            jc_fid_map = cls.fetch_jc_fid_map()
+            # 1. 竞彩标识映射优先取缓存；没有缓存时与比赛列表页面并发下载
+            jc_fid_map = cls.cached_jc_fid_map()
+            jc_future = submit(cls.fetch_jc_fid_map) if jc_fid_map is None else None
 
             # 2. 根据是否传入日期选择不同的URL
             if date:
@@ -223,299 +762,54 @@ class MatchScraper:
                     # 如果请求的日期严格大于今天，则为未来比赛
                     is_future_match = requested_date > current_date
                 except Exception as e:
-                    logger.error(f"日期解析错误: {e}")
+                    logger.error("日期解析错误: %s", e)
                     is_future_match = False
                 
             response = cls.make_request_with_retries(url)
             # 确保响应存在
             if not response:
-                logger.error(f"获取比赛列表失败: 响应为空, URL: {url}")
-                return []
-
-            soup = BeautifulSoup(response.text, "html.parser")
+                logger.error("获取比赛列表失败: 响应为空, URL: %s", url)
+                return
 
-            # 查找比赛列表
-            match_list = []
-
-            # 找到所有比赛行
-            match_rows = soup.select("tr[gy]")
-            logger.info(f"找到 {len(match_rows)} 个比赛行")
-
-            for idx, row in enumerate(match_rows):
+            if jc_future is not None:
                 try:
-                    # 解析比赛信息
-                    league_td = row.select_one(".ssbox_01")
-                    league = league_td.select_one("a") if league_td else None
-
-                    # 通过fid获取竞彩标识
-                    fid = row.get("fid", "")
-                    jc_mark = jc_fid_map.get(fid, "")
-
-                    # 获取所有td元素
-                    tds = row.select("td")
-                    
-                    # 初始化变量
-                    round_info = ""
-                    match_time = ""
-                    status_text = ""
-                    home_team = ""
-                    home_team_id = ""
-                    away_team = ""
-                    away_team_id = ""
-                    home_score = ""
-                    away_score = ""
-                    half_score = ""
-                    
-                    # 根据是否为历史比赛或未来比赛使用不同的列索引
-                    if date:
-                        if is_future_match:
-                            # 未来比赛页面的列索引
-                            # 确保所有字段都有默认值，避免None值导致的问题
-                            round_info = tds[1].text.strip() if len(tds) > 1 else ""  # 轮数在第1列
-                            match_time = tds[2].text.strip() if len(tds) > 2 else ""  # 时间在第2列
-                            status_text = "未开始"  # 未来比赛状态默认为"未开始"
-                            
-                            # 主队信息 - 未来比赛
-                            if len(tds) > 3:
-                                home_team_td = tds[3]  # 主队在第3列
-                                home_team_a = home_team_td.select_one("a")
-                                if home_team_a:
-                                    home_team = home_team_a.text.strip()
-                                    # 提取主队ID
-                                    home_team_href = home_team_a.get("href", "")
-                                    home_team_match = re.search(r"team/(\d+)", home_team_href)
-                                    if home_team_match:
-                                        home_team_id = home_team_match.group(1)
-                                else:
-                                    # 如果没有链接，直接取文本
-                                    home_team = home_team_td.text.strip()
-                            
-                            # 客队信息 - 未来比赛
-                            if len(tds) > 5:
-                                away_team_td = tds[5]  # 客队在第5列
-                                away_team_a = away_team_td.select_one("a")
-                                if away_team_a:
-                                    away_team = away_team_a.text.strip()
-                                    # 提取客队ID
-                                    away_team_href = away_team_a.get("href", "")
-                                    away_team_match = re.search(r"team/(\d+)", away_team_href)
-                                    if away_team_match:
-                                        away_team_id = away_team_match.group(1)
-                                else:
-                                    # 如果没有链接，直接取文本
-                                    away_team = away_team_td.text.strip()
-                            
-                            # 未来比赛还未开始，比分和半场比分都为空
-                            home_score = ""
-                            away_score = ""
-                            half_score = ""
-                            # 确保未来比赛状态被正确设置为"0"（未开始）
-                            tr_status = "0"
-                        else:
-                            # 历史比赛页面的列索引（根据测试结果最终调整）
-                            # 确保所有字段都有默认值，避免None值导致的问题
-                            round_info = tds[1].text.strip() if len(tds) > 1 else ""  # 轮数在第1列
-                            match_time = tds[2].text.strip() if len(tds) > 2 else ""  # 时间在第2列
-                            status_text = tds[3].text.strip() if len(tds) > 3 else ""  # 状态在第3列
-                            
-                            # 主队信息 - 历史比赛
-                            if len(tds) > 4:
-                                home_team_td = tds[4]  # 主队在第4列
-                                home_team_a = home_team_td.select_one("a")
-                                if home_team_a:
-                                    home_team = home_team_a.text.strip()
-                                    # 提取主队ID
-                                    home_team_href = home_team_a.get("href", "")
-                                    home_team_match = re.search(r"team/(\d+)", home_team_href)
-                                    if home_team_match:
-                                        home_team_id = home_team_match.group(1)
-                                else:
-                                    # 如果没有链接，直接取文本
-                                    home_team = home_team_td.text.strip()
-                            
-                            # 客队信息 - 历史比赛
-                            if len(tds) > 6:
-                                away_team_td = tds[6]  # 客队在第6列
-                                away_team_a = away_team_td.select_one("a")
-                                if away_team_a:
-                                    away_team = away_team_a.text.strip()
-                                    # 提取客队ID
-                                    away_team_href = away_team_a.get("href", "")
-                                    away_team_match = re.search(r"team/(\d+)", away_team_href)
-                                    if away_team_match:
-                                        away_team_id = away_team_match.group(1)
-                                else:
-                                    # 如果没有链接，直接取文本
-                                    away_team = away_team_td.text.strip()
-                            
-                            # 抓取比分信息 - 历史比赛
-                            if len(tds) > 5:
-                                score_td = tds[5]  # 全场比分在第5列
-                                # 查找包含比分的元素
-                                score_text = score_td.text.strip()
-                                # 尝试从文本中提取比分，使用更宽松的正则表达式
-                                score_match = re.search(r"(\d+)\s*[-:]\s*(\d+)", score_text)
-                                if score_match:
-                                    home_score = score_match.group(1)
-                                    away_score = score_match.group(2)
-                                else:
-                                    # 如果没有找到正常比分，尝试查找可能的特殊格式
-                                    home_score_match = re.search(r"^(\d+)\s*", score_text)
-                                    away_score_match = re.search(r"\s*(\d+)$", score_text)
-                                    if home_score_match and away_score_match:
-                                        home_score = home_score_match.group(1)
-                                        away_score = away_score_match.group(1)
-                            
-                            # 半场比分 - 历史比赛
-                            half_score = ""
-                            if len(tds) > 7:
-                                half_score_td = tds[7]  # 半场比分在第7列
-                                half_score_text = half_score_td.text.strip()
-                                # 尝试从文本中提取半场比分，使用更宽松的正则表达式
-                                half_match = re.search(r"(\d+)\s*[-:]\s*(\d+)", half_score_text)
-                                if half_match:
-                                    half_score = f"{half_match.group(1)}-{half_match.group(2)}"
-                    else:
-                        # 直播比赛页面的列索引
-                        if len(tds) > 2:
-                            round_info = tds[2].text.strip()
-                        if len(tds) > 3:
-                            match_time = tds[3].text.strip()
-                        if len(tds) > 4:
-                            status_text = tds[4].text.strip()
-                        
-                        # 主队信息 - 直播比赛
-                        if len(tds) > 5:
-                            home_team_td = tds[5]
-                            home_team_a = home_team_td.select_one("a")
-                            if home_team_a:
-                                home_team = home_team_a.text.strip()
-                                # 提取主队ID
-                                home_team_href = home_team_a.get("href", "")
-                                home_team_match = re.search(r"team/(\d+)", home_team_href)
-                                if home_team_match:
-                                    home_team_id = home_team_match.group(1)
-                        
-                        # 客队信息 - 直播比赛
-                        if len(tds) > 7:
-                            away_team_td = tds[7]
-                            away_team_a = away_team_td.select_one("a")
-                            if away_team_a:
-                                away_team = away_team_a.text.strip()
-                                # 提取客队ID
-                                away_team_href = away_team_a.get("href", "")
-                                away_team_match = re.search(r"team/(\d+)", away_team_href)
-                                if away_team_match:
-                                    away_team_id = away_team_match.group(1)
-                        
-                        # 抓取比分信息 - 直播比赛
-                        pk_div = row.select_one(".pk")
-                        if pk_div:
-                            # 主队全场比分
-                            clt1 = pk_div.select_one(".clt1")
-                            if clt1:
-                                home_score = clt1.text.strip()
-
-                            # 客队全场比分
-                            clt3 = pk_div.select_one(".clt3")
-                            if clt3:
-                                away_score = clt3.text.strip()
-
-                        # 半场比分 - 直播比赛
-                        if len(tds) > 8:
-                            half_score = tds[8].text.strip()
-
-                    # 获取tr标签的属性
-                    tr_status = row.get("status", "")
-                    fid = row.get("fid", "")
-                    sid = row.get("sid", "")
-                    
-                    # 统一的状态映射
-                    status_map = {
-                        "未开始": "0",
-                        "上半场": "1",
-                        "中场结束": "2",
-                        "下半场": "3",
-                        "已结束": "4",
-                        "完": "4",
-                        "改期": "6",
-                        "待定": "9",
-                        "加时赛开始": "10"
-                    }
-                    
-                    # 对于历史和未来比赛，如果tr_status为空或无效，根据status_text设置合适的status值
-                    if date:
-                        if not tr_status or tr_status not in status_map.values():
-                            tr_status = status_map.get(status_text, "")
-
-                    # 获取联赛td的背景色
-                    league_bgcolor = league_td.get("bgcolor", "") if league_td else ""
-
-                    # 构造logo链接
-                    home_team_logo = (
-                        BASE_URL["TEAM_LOGO_BASE"].format(team_id=home_team_id)
-                        if home_team_id
-                        else ""
-                    )
-                    away_team_logo = (
-                        BASE_URL["TEAM_LOGO_BASE"].format(team_id=away_team_id)
-                        if away_team_id
-                        else ""
-                    )
-
-                    # 创建比赛字典
-                    match = {
-                        "league": league.text.strip() if league else "",
-                        "league_bgcolor": league_bgcolor,
-                        "round": round_info,
-                        "match_time": match_time,
-                        "status_text": status_text,
-                        "status": tr_status,
-                        "fid": fid,
-                        "sid": sid,
-                        "jc_mark": jc_mark,
-                        "home_team": home_team,
-                        "home_team_id": home_team_id,
-                        "home_team_logo": home_team_logo,
-                        "away_team": away_team,
-                        "away_team_id": away_team_id,
-                        "away_team_logo": away_team_logo,
-                        "home_score": home_score,
-                        "away_score": away_score,
-                        "half_score": half_score,
-                    }
-
-                    match_list.append(match)
+                    jc_fid_map = jc_future.result(timeout=FANOUT_PAGE_TIMEOUT)
                 except Exception as e:
-                    logger.error(f"解析第{idx+1}个比赛行失败: {e}, 行数据: {row}")
-                    logger.debug(traceback.format_exc())
-                    # 跳过当前行，继续解析下一个比赛
-                    continue
+                    # 竞彩标识缺失不影响比赛列表展示
+                    logger.warning("获取竞彩标识映射失败: %s", e)
+                    jc_fid_map = {}
 
-            logger.info(f"成功解析 {len(match_list)} 场比赛")
-            return match_list
+            yield from cls.iter_match_list(response.text, date, is_future_match, jc_fid_map)
         except Exception as e:
-            logger.error(f"获取直播比赛列表失败: {e}")
+            logger.error("获取直播比赛列表失败: %s", e)
             logger.debug(traceback.format_exc())
-            return []
     
     @classmethod
     def fetch_match_details(cls, fid):
         """
         获取指定fid的比赛详情，包括球员名单和比赛进程
+
+        比赛进程、球员名单和技术统计接口会同时请求同一场比赛的详情，
+        这里通过SingleFlight合并并发调用，detail.php只下载和解析一次
+        """
+        return match_details_flight.do(str(fid), cls._fetch_match_details, fid)
+
+    @classmethod
+    def _fetch_match_details(cls, fid):
+        """
+        下载并解析比赛详情页
         """
         try:
             url = f"https://live.500.com/detail.php?fid={fid}"
-            logger.info(f"正在获取比赛 {fid} 的详情，URL: {url}")
-            response = cls.make_request_with_retries(url)
-            if not response:
-                logger.error(f"获取比赛详情失败: 响应为空, URL: {url}")
+            logger.info("正在获取比赛 %s 的详情，URL: %s", fid, url)
+            page = cls.fetch_page(url)
+            if not page:
+                logger.error("获取比赛详情失败: 响应为空, URL: %s", url)
                 return None
 
-            logger.info(f"成功获取响应，状态码: {response.status_code}")
+            logger.info("成功获取响应，状态码: %s", page.status_code)
             # 设置正确的编码为gbk
-            response.encoding = 'gbk'
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = page.soup("html.parser", encoding='gbk')
             match_details = {
                 "home_team": {
                     "starting_lineup": [],
@@ -532,32 +826,32 @@ class MatchScraper:
             # 找到所有包含box_side类的div，这些包含首发和替补阵容
             logger.info("开始提取球员名单")
             box_sides = soup.select(".box_side")
-            logger.info(f"找到 {len(box_sides)} 个box_side元素")
+            logger.info("找到 %s 个box_side元素", len(box_sides))
             
             # 用于标记当前处理的是主队还是客队
             team_index = 0  # 0: 主队首发, 1: 主队替补, 2: 客队首发, 3: 客队替补
             
             for i, box_side in enumerate(box_sides):
-                logger.info(f"处理第 {i+1} 个box_side元素")
+                logger.info("处理第 %s 个box_side元素", i+1)
                 title = box_side.select_one(".title")
                 if not title:
-                    logger.warning(f"第 {i+1} 个box_side元素没有title")
+                    logger.warning("第 %s 个box_side元素没有title", i+1)
                     continue
                 
                 title_text = title.get_text().strip()
-                logger.info(f"第 {i+1} 个box_side元素的title: {title_text}")
+                logger.info("第 %s 个box_side元素的title: %s", i+1, title_text)
                 content = box_side.select_one(".content")
                 if not content:
-                    logger.warning(f"第 {i+1} 个box_side元素没有content")
+                    logger.warning("第 %s 个box_side元素没有content", i+1)
                     continue
                 
                 player_table = content.select_one("table")
                 if not player_table:
-                    logger.warning(f"第 {i+1} 个box_side元素的content中没有table")
+                    logger.warning("第 %s 个box_side元素的content中没有table", i+1)
                     continue
                 
                 player_rows = player_table.select("tr")
-                logger.info(f"第 {i+1} 个box_side元素的table中有 {len(player_rows)} 行")
+                logger.info("第 %s 个box_side元素的table中有 %s 行", i+1, len(player_rows))
                 for row in player_rows:
                     tds = row.select("td")
                     if len(tds) < 2:
@@ -580,17 +874,17 @@ class MatchScraper:
                         if title_text == "预计首发阵容":
                             if team_index == 0:
                                 match_details["home_team"]["starting_lineup"].append(player)
-                                logger.info(f"添加主队首发球员: {player}")
+                                row_logger.info("添加主队首发球员: %s", player)
                             else:
                                 match_details["away_team"]["starting_lineup"].append(player)
-                                logger.info(f"添加客队首发球员: {player}")
+                                row_logger.info("添加客队首发球员: %s", player)
                         elif title_text == "后备":
                             if team_index == 1:
                                 match_details["home_team"]["substitutes"].append(player)
-                                logger.info(f"添加主队替补球员: {player}")
+                                row_logger.info("添加主队替补球员: %s", player)
                             else:
                                 match_details["away_team"]["substitutes"].append(player)
-                                logger.info(f"添加客队替补球员: {player}")
+                                row_logger.info("添加客队替补球员: %s", player)
                 
                 # 更新team_index
                 team_index += 1
@@ -604,12 +898,12 @@ class MatchScraper:
             if match_table:
                 logger.info("找到mtable元素")
                 event_rows = match_table.select("tr")
-                logger.info(f"mtable中有 {len(event_rows)} 行")
+                logger.info("mtable中有 %s 行", len(event_rows))
                 # 跳过表头行
                 for i, row in enumerate(event_rows[1:]):
                     tds = row.select("td")
                     if len(tds) < 5:
-                        logger.warning(f"第 {i+1} 个事件行td数量不足5个，跳过")
+                        row_logger.warning("第 %s 个事件行td数量不足5个，跳过", i+1)
                         continue
                     
                     home_event = tds[1].get_text().strip()
@@ -631,17 +925,17 @@ class MatchScraper:
                         }
                         
                         match_details["match_events"].append(event)
-                        logger.info(f"添加比赛事件: {event}")
+                        row_logger.info("添加比赛事件: %s", event)
             else:
                 logger.warning("没有找到mtable元素")
                 # 尝试使用其他选择器查找比赛进程
                 logger.info("尝试使用其他选择器查找比赛进程")
                 # 查看所有table元素
                 all_tables = soup.select("table")
-                logger.info(f"找到 {len(all_tables)} 个table元素")
+                logger.info("找到 %s 个table元素", len(all_tables))
                 # 查看前几个table的类名
                 for i, table in enumerate(all_tables[:5]):
-                    logger.info(f"第 {i+1} 个table的类名: {table.get('class')}")
+                    logger.info("第 %s 个table的类名: %s", i+1, table.get('class'))
 
             # 3. 提取技术统计数据
             logger.info("开始提取技术统计数据")
@@ -663,7 +957,7 @@ class MatchScraper:
                         
                         # 获取所有行
                         stat_rows = tech_stats_table.select("tr")
-                        logger.info(f"找到 {len(stat_rows)} 个技术统计行")
+                        logger.info("找到 %s 个技术统计行", len(stat_rows))
                         
                         for i, row in enumerate(stat_rows):
                             tds = row.select("td")
@@ -698,20 +992,20 @@ class MatchScraper:
                                     "awayBarWidth": away_bar_width
                                 }
                                 match_details["tech_stats"].append(tech_stat)
-                                logger.info(f"添加技术统计数据: {tech_stat}")
+                                row_logger.info("添加技术统计数据: %s", tech_stat)
             else:
                 logger.warning("没有找到t2元素，无法提取技术统计数据")
             
-            logger.info(f"成功获取比赛 {fid} 的详情")
-            logger.info(f"主队首发阵容: {len(match_details['home_team']['starting_lineup'])} 人")
-            logger.info(f"主队替补: {len(match_details['home_team']['substitutes'])} 人")
-            logger.info(f"客队首发阵容: {len(match_details['away_team']['starting_lineup'])} 人")
-            logger.info(f"客队替补: {len(match_details['away_team']['substitutes'])} 人")
-            logger.info(f"比赛事件: {len(match_details['match_events'])} 个")
-            logger.info(f"技术统计: {len(match_details['tech_stats'])} 项")
+            logger.info("成功获取比赛 %s 的详情", fid)
+            logger.info("主队首发阵容: %s 人", len(match_details['home_team']['starting_lineup']))
+            logger.info("主队替补: %s 人", len(match_details['home_team']['substitutes']))
+            logger.info("客队首发阵容: %s 人", len(match_details['away_team']['starting_lineup']))
+            logger.info("客队替补: %s 人", len(match_details['away_team']['substitutes']))
+            logger.info("比赛事件: %s 个", len(match_details['match_events']))
+            logger.info("技术统计: %s 项", len(match_details['tech_stats']))
             return match_details
         except Exception as e:
-            logger.error(f"获取比赛详情失败: {e}")
+            logger.error("获取比赛详情失败: %s", e)
             logger.debug(traceback.format_exc())
             return None
 
@@ -755,21 +1049,56 @@ class OddsScraper:
         return None
     
     @staticmethod
-    def fetch_oupei_data(match_id):
+    def _fetch_odds_page(kind, match_id):
         """
-        获取欧赔数据
+        获取欧赔、亚盘或大小球页面，页面不完整时返回None
         """
-        url = f'{BASE_URL["ODDS_BASE"]}ouzhi-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(
+        page_name, marker, _ = ODDS_PAGES[kind]
+        url = f'{BASE_URL["ODDS_BASE"]}{page_name}-{match_id}.shtml'
+        page = MatchScraper.fetch_page(
             url,
             {**HEADERS, "referer": f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'},
         )
 
-        if not res or "百家欧赔" not in res.text:
+        if not page or marker not in page.text:
             return None
+        return page
 
+    @staticmethod
+    def _parse_odds_page(kind, page):
+        """
+        解析已下载的欧赔、亚盘或大小球页面，页面不完整时返回None
+        """
+        if ODDS_PAGES[kind][1] not in page.text:
+            return None
+        return OddsScraper._odds_data(kind, page)
+
+    @staticmethod
+    def _odds_data(kind, page):
+        """
+        解析赔率页面，解析结果随页面缓存，页面未更新时直接复用
+        """
+        if kind == "oupei":
+            return page.derived(kind, lambda: OddsScraper._parse_oupei(page), serialize=True)
+        return page.derived(
+            kind, lambda: OddsScraper._parse_handicap_table(page, ODDS_PAGES[kind][2]), serialize=True
+        )
+
+    @staticmethod
+    def fetch_oupei_data(match_id):
+        """
+        获取欧赔数据
+        """
+        page = OddsScraper._fetch_odds_page("oupei", match_id)
+        return OddsScraper._odds_data("oupei", page) if page is not None else None
+
+    @staticmethod
+    def _parse_oupei(page):
+        """
+        解析欧赔页面
+        """
         try:
-            soup = BeautifulSoup(res.text, "lxml")
+            soup = page.soup("lxml")
             data_table = soup.find("table", id="datatb")
 
             if not data_table:
@@ -799,7 +1128,7 @@ class OddsScraper:
 
             return extracted_data
         except Exception as e:
-            logger.error(f"解析欧赔数据失败: {e}")
+            logger.error("解析欧赔数据失败: %s", e)
             return None
 
     @staticmethod
@@ -807,17 +1136,24 @@ class OddsScraper:
         """
         获取亚盘数据
         """
-        url = f'{BASE_URL["ODDS_BASE"]}yazhi-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(
-            url,
-            {**HEADERS, "referer": f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'},
-        )
+        page = OddsScraper._fetch_odds_page("yapan", match_id)
+        return OddsScraper._odds_data("yapan", page) if page is not None else None
 
-        if not res or "亚盘对比" not in res.text:
-            return None
+    @staticmethod
+    def fetch_daxiao_data(match_id):
+        """
+        获取大小球数据
+        """
+        page = OddsScraper._fetch_odds_page("daxiao", match_id)
+        return OddsScraper._odds_data("daxiao", page) if page is not None else None
 
+    @staticmethod
+    def _parse_handicap_table(page, label):
+        """
+        解析亚盘或大小球页面，两者的表格结构相同：即时盘在第2列，初盘在第4列
+        """
         try:
-            soup = BeautifulSoup(res.text, "lxml")
+            soup = page.soup("lxml")
             data_table = soup.find("table", id="datatb")
 
             if not data_table:
@@ -860,69 +1196,34 @@ class OddsScraper:
 
             return extracted_data
         except Exception as e:
-            logger.error(f"解析亚盘数据失败: {e}")
+            logger.error("解析%s数据失败: %s", label, e)
             return None
 
     @staticmethod
-    def fetch_daxiao_data(match_id):
+    def fetch_odds_stats(match_id, kind="oupei"):
         """
-        获取大小球数据
+        获取欧赔、亚盘或大小球的统计数据：各公司的数值赔率，以及所有公司的平均值、最大值、最小值、
+        标准差、隐含概率、抽水率、返还率和凯利指数
+
+        统计数据与解析结果一起随页面缓存，页面未更新时不重新计算
         """
-        url = f'{BASE_URL["ODDS_BASE"]}daxiao-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(
-            url,
-            {**HEADERS, "referer": f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'},
-        )
+        # 统计依赖NumPy，第一次计算时才导入，缩短冷启动时间
+        from odds_stats import compute_odds_stats
 
-        if not res or "大小指数" not in res.text:
+        page = OddsScraper._fetch_odds_page(kind, match_id)
+        if page is None:
             return None
-
-        try:
-            soup = BeautifulSoup(res.text, "lxml")
-            data_table = soup.find("table", id="datatb")
-
-            if not data_table:
-                return None
-
-            extracted_data = {}
-
-            company_rows = data_table.find_all("tr", id=re.compile(r"^\d+$"))
-            for row in company_rows:
-                try:
-                    all_tds = row.find_all("td", recursive=False)
-                    if len(all_tds) < 6:
-                        continue
-
-                    company_link = all_tds[1].find("a")
-                    if not company_link or not company_link.has_attr("title"):
-                        continue
-
-                    clean_company_name = company_link["title"]
-                    instant_table = all_tds[2].find("table")
-                    initial_table = all_tds[4].find("table")
-
-                    if instant_table and initial_table:
-                        instant_data = [
-                            d.get_text(strip=True)
-                            for d in instant_table.find_all("td")[:3]
-                        ]
-                        initial_data = [
-                            d.get_text(strip=True)
-                            for d in initial_table.find_all("td")[:3]
-                        ]
-
-                        if len(instant_data) == 3 and len(initial_data) == 3:
-                            extracted_data[clean_company_name] = {
-                                "initial": initial_data,
-                                "instant": instant_data,
-                            }
-                except (AttributeError, IndexError):
-                    continue
-
-            return extracted_data
-        except Exception as e:
-            logger.error(f"解析大小球数据失败: {e}")
+        data = OddsScraper._odds_data(kind, page)
+        if not data:
             return None
+        return page.derived(f"{kind}_stats", lambda: compute_odds_stats(kind, data), serialize=True)
+
+    @staticmethod
+    def fetch_all_odds_stats(match_id):
+        """
+        获取欧赔、亚盘和大小球三类赔率的统计数据
+        """
+        return {kind: OddsScraper.fetch_odds_stats(match_id, kind) for kind in ODDS_PAGES}
 
     @staticmethod
     def fetch_match_name(match_id):
@@ -930,13 +1231,19 @@ class OddsScraper:
         获取比赛名称
         """
         url = f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(url)
+        page = MatchScraper.fetch_page(url)
 
-        if not res:
+        if not page:
             return "获取失败"
+        return OddsScraper._parse_match_name(page)
 
+    @staticmethod
+    def _parse_match_name(page):
+        """
+        从shuju页面解析比赛名称
+        """
         try:
-            soup = BeautifulSoup(res.text, "lxml")
+            soup = page.soup("lxml")
             m_sub_title_div = soup.find("div", class_="M_sub_title")
 
             if m_sub_title_div:
@@ -953,20 +1260,36 @@ class OddsScraper:
             return "解析HTML出错"
 
     @staticmethod
-    def fetch_average_data(match_id):
+    def _shuju_data(match_id, key, parse):
         """
-        获取平均数据
+        获取shuju页面并解析其中一部分数据，解析结果随页面缓存，页面未更新时直接复用
+
+        结果登记为可预先序列化，接口直接返回它时只编码一次JSON
+        :param parse: 解析函数，参数为(页面, URL, 比赛ID)
         """
         url = f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(url)
+        page = MatchScraper.fetch_page(url)
 
-        if not res:
-            logger.error(f"请求失败: {url}")
+        if not page:
+            logger.error("请求失败: %s", url)
             return None
+        return page.derived(key, lambda: parse(page, url, match_id), serialize=True)
+
+    @staticmethod
+    def fetch_average_data(match_id):
+        """
+        获取平均数据
+        """
+        return OddsScraper._shuju_data(match_id, "average", OddsScraper._parse_average_data)
 
+    @staticmethod
+    def _parse_average_data(page, url, match_id):
+        """
+        解析shuju页面中的平均数据
+        """
         # 尝试使用更宽松的条件，不依赖于特定文本
         try:
-            soup = BeautifulSoup(res.text, "lxml")
+            soup = page.soup("lxml")
 
             # 寻找所有包含"平均数据"的div
             average_divs = soup.find_all("div", class_="M_box")
@@ -980,13 +1303,13 @@ class OddsScraper:
                     break
 
             if not average_data_div:
-                logger.error(f"未找到平均数据容器: {url}")
+                logger.error("未找到平均数据容器: %s", url)
                 return None
 
             # 提取球队名称和排名
             team_names = average_data_div.select(".M_sub_title .team_name")
             if len(team_names) < 2:
-                logger.error(f"未找到足够的球队名称: {url}")
+                logger.error("未找到足够的球队名称: %s", url)
                 return None
 
             home_team_info = team_names[0].get_text(strip=True)
@@ -995,7 +1318,7 @@ class OddsScraper:
             # 提取平均数据表格 - 调整选择器，使用更通用的选择器
             all_tables = average_data_div.select("table.pub_table")
             if len(all_tables) < 2:
-                logger.error(f"未找到足够的平均数据表格: {url}")
+                logger.error("未找到足够的平均数据表格: %s", url)
                 return None
 
             # 提取数据的辅助函数
@@ -1076,7 +1399,7 @@ class OddsScraper:
             away_data = extract_team_data(all_tables[1])
 
             if not home_data or not away_data:
-                logger.error(f"提取球队数据失败: {url}")
+                logger.error("提取球队数据失败: %s", url)
                 return None
 
             result = {
@@ -1094,10 +1417,10 @@ class OddsScraper:
 
             return result
         except Exception as e:
-            logger.error(f"解析平均数据失败: {e}, URL: {url}")
+            logger.error("解析平均数据失败: %s, URL: %s", e, url)
             # 打印更多调试信息
-            logger.error(f"响应状态: {res.status_code}")
-            logger.error(f"响应长度: {len(res.text)}")
+            logger.error("响应状态: %s", page.status_code)
+            logger.error("响应长度: %s", len(page.text))
             return None
     
     @staticmethod
@@ -1105,29 +1428,29 @@ class OddsScraper:
         """
         获取两队交战历史数据
         """
-        url = f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(url)
-        
-        if not res:
-            logger.error(f'请求失败: {url}')
-            return None
-        
+        return OddsScraper._shuju_data(match_id, "head_to_head", OddsScraper._parse_head_to_head_data)
+
+    @staticmethod
+    def _parse_head_to_head_data(page, url, match_id):
+        """
+        解析shuju页面中的两队交战历史数据
+        """
         try:
-            soup = BeautifulSoup(res.text, 'lxml')
+            soup = page.soup('lxml')
             
             # 寻找所有M_box div，看看有哪些
             all_m_box_divs = soup.find_all('div', class_='M_box')
-            logger.info(f'找到 {len(all_m_box_divs)} 个 M_box div')
+            logger.info('找到 %s 个 M_box div', len(all_m_box_divs))
             
             # 遍历所有M_box div，打印h4内容
             for i, div in enumerate(all_m_box_divs):
                 h4 = div.find('h4')
                 if h4:
                     h4_text = h4.get_text(strip=True)
-                    logger.info(f'M_box {i+1} h4内容: {h4_text}')
+                    logger.info('M_box %s h4内容: %s', i+1, h4_text)
                     # 检查是否包含"交战历史"或其他相关关键词
                     if "历史" in h4_text or "交战" in h4_text:
-                        logger.info(f'找到可能的交战历史div: {h4_text}')
+                        logger.info('找到可能的交战历史div: %s', h4_text)
             
             # 寻找包含"交战历史"或"历史"的div
             head_to_head_div = None
@@ -1137,11 +1460,11 @@ class OddsScraper:
                     h4_text = h4.get_text(strip=True)
                     if "交战历史" in h4_text or "历史" in h4_text:
                         head_to_head_div = div
-                        logger.info(f'确定使用的交战历史div: {h4_text}')
+                        logger.info('确定使用的交战历史div: %s', h4_text)
                         break
             
             if not head_to_head_div:
-                logger.error(f'未找到交战历史容器: {url}')
+                logger.error('未找到交战历史容器: %s', url)
                 return None
             
             # 提取交战历史标题
@@ -1151,11 +1474,11 @@ class OddsScraper:
             # 提取交战历史统计信息
             stats_span = head_to_head_div.find('span', class_='his_info')
             stats = stats_span.get_text(strip=True) if stats_span else ''
-            logger.info(f'交战历史统计信息: {stats}')
+            logger.info('交战历史统计信息: %s', stats)
             
             # 提取所有表格，看看有哪些
             all_tables = head_to_head_div.find_all('table')
-            logger.info(f'在交战历史div中找到 {len(all_tables)} 个表格')
+            logger.info('在交战历史div中找到 %s 个表格', len(all_tables))
             
             # 提取交战记录表格
             table = None
@@ -1171,7 +1494,7 @@ class OddsScraper:
                 logger.info('使用第一个表格作为备用')
             
             if not table:
-                logger.error(f'未找到交战记录表格: {url}')
+                logger.error('未找到交战记录表格: %s', url)
                 return None
             
             # 提取表格数据
@@ -1183,10 +1506,10 @@ class OddsScraper:
             else:
                 rows = tbody.find_all('tr')
             
-            logger.info(f'找到 {len(rows)} 行表格数据')
+            logger.info('找到 %s 行表格数据', len(rows))
             
             if len(rows) < 2:  # 至少需要标题行和一行数据
-                logger.error(f'未找到足够的交战记录行: {url}')
+                logger.error('未找到足够的交战记录行: %s', url)
                 # 但是我们仍然返回，即使只有标题行
                 return {
                     'title': title,
@@ -1202,13 +1525,15 @@ class OddsScraper:
                     continue
                 
                 tds = row.find_all('td')
-                logger.info(f'行 {len(matches)+1} 有 {len(tds)} 个td')
+                row_logger.info('行 %s 有 %s 个td', len(matches)+1, len(tds))
                 
                 if len(tds) < 10:
                     # 不跳过，而是使用现有的td数据
-                    logger.info(f'行 {len(matches)+1} td不足10个，使用现有数据')
+                    row_logger.info('行 %s td不足10个，使用现有数据', len(matches)+1)
                     # 补全td到10个
                     while len(tds) < 10:
+                        from bs4 import BeautifulSoup
+
                         tds.append(BeautifulSoup('<td></td>', 'lxml').find('td'))
                 
                 # 提取赛事
@@ -1260,7 +1585,7 @@ class OddsScraper:
                         
                         # 尝试获取所有文本并智能分割
                         td_text = match_td.get_text(strip=True)
-                        logger.info(f'直接从td提取对阵信息: {td_text}')
+                        row_logger.info('直接从td提取对阵信息: %s', td_text)
                         
                         # 尝试多种分割方式
                         if 'VS' in td_text or 'vs' in td_text:
@@ -1341,10 +1666,10 @@ class OddsScraper:
                 }
                 
                 matches.append(match_record)
-                logger.info(f'添加比赛记录: {match_info["home_team"]} {match_info["score"]} {match_info["away_team"]}')
+                row_logger.info('添加比赛记录: %s %s %s', match_info["home_team"], match_info["score"], match_info["away_team"])
             
             # 构建结果
-            logger.info(f'总共提取到 {len(matches)} 条比赛记录')
+            logger.info('总共提取到 %s 条比赛记录', len(matches))
             result = {
                 'title': title,
                 'stats': stats,
@@ -1352,7 +1677,7 @@ class OddsScraper:
             }
             return result
         except Exception as e:
-            logger.error(f'解析交战历史数据失败: {e}, URL: {url}')
+            logger.error('解析交战历史数据失败: %s, URL: %s', e, url)
             # 保存错误信息到文件
             with open(f"head_to_head_error_{match_id}.txt", "w", encoding="utf-8") as f:
                 f.write(f"Error: {e}")
@@ -1363,33 +1688,33 @@ class OddsScraper:
         """
         获取两队近期战绩数据
         """
-        url = f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(url)
-        
-        if not res:
-            logger.error(f'请求失败: {url}')
-            return None
-        
+        return OddsScraper._shuju_data(match_id, "recent_records", OddsScraper._parse_recent_records)
+
+    @staticmethod
+    def _parse_recent_records(page, url, match_id):
+        """
+        解析shuju页面中的两队近期战绩数据
+        """
         try:
-            soup = BeautifulSoup(res.text, 'lxml')
+            soup = page.soup('lxml')
             
             # 寻找所有M_box div，查找近期战绩部分
             all_m_box_divs = soup.find_all('div', class_='M_box')
-            logger.info(f'找到 {len(all_m_box_divs)} 个 M_box div')
+            logger.info('找到 %s 个 M_box div', len(all_m_box_divs))
             
             recent_records_div = None
             for div in all_m_box_divs:
                 h4 = div.find('h4')
                 if h4:
                     h4_text = h4.get_text(strip=True)
-                    logger.info(f'M_box h4内容: {h4_text}')
+                    logger.info('M_box h4内容: %s', h4_text)
                     if "近期战绩" in h4_text:
                         recent_records_div = div
-                        logger.info(f'找到近期战绩div: {h4_text}')
+                        logger.info('找到近期战绩div: %s', h4_text)
                         break
             
             if not recent_records_div:
-                logger.error(f'未找到近期战绩容器: {url}')
+                logger.error('未找到近期战绩容器: %s', url)
                 return None
             
             # 提取两支球队的近期战绩 - 使用更准确的选择器
@@ -1409,7 +1734,7 @@ class OddsScraper:
                 # 过滤掉不包含pub_table的div
                 teams = [team for team in teams if team.find('table', class_='pub_table')]
             
-            logger.info(f'找到 {len(teams)} 支球队的近期战绩')
+            logger.info('找到 %s 支球队的近期战绩', len(teams))
             
             recent_records_data = []
             
@@ -1424,21 +1749,21 @@ class OddsScraper:
                 team_name_strong = team_div.find('strong', class_='team_name')
                 if team_name_strong:
                     team_data['name'] = team_name_strong.get_text(strip=True)
-                    logger.info(f'球队名称: {team_data["name"]}')
+                    logger.info('球队名称: %s', team_data["name"])
                 else:
                     # 尝试其他方式获取球队名称 - 查找所有strong元素
                     all_strong = team_div.find_all('strong')
                     for strong in all_strong:
                         if 'team_name' in strong.get('class', []):
                             team_data['name'] = strong.get_text(strip=True)
-                            logger.info(f'球队名称(strong): {team_data["name"]}')
+                            logger.info('球队名称(strong): %s', team_data["name"])
                             break
                     # 如果还是没找到，尝试查找div.team_name
                     if not team_data['name']:
                         team_name_div = team_div.find('div', class_='team_name')
                         if team_name_div:
                             team_data['name'] = team_name_div.get_text(strip=True)
-                            logger.info(f'球队名称(div): {team_data["name"]}')
+                            logger.info('球队名称(div): %s', team_data["name"])
                 
                 # 提取比赛记录表格
                 team_table = team_div.find('table', class_='pub_table')
@@ -1449,11 +1774,11 @@ class OddsScraper:
                     else:
                         rows = team_table.find_all('tr')
                     
-                    logger.info(f'找到 {len(rows)} 行比赛记录')
+                    logger.info('找到 %s 行比赛记录', len(rows))
                     
                     # 确保至少有标题行
                     if len(rows) < 1:
-                        logger.warning(f'球队 {team_data["name"]} 没有表格行')
+                        logger.warning('球队 %s 没有表格行', team_data["name"])
                         recent_records_data.append(team_data)
                         continue
                     
@@ -1461,7 +1786,7 @@ class OddsScraper:
                     for row in rows[1:]:
                         # 跳过隐藏行
                         if row.get('style') == 'display:none;':
-                            logger.info('跳过隐藏行')
+                            row_logger.info('跳过隐藏行')
                             continue
                         
                         # 检查是否是统计行 - 改进逻辑
@@ -1473,24 +1798,24 @@ class OddsScraper:
                                 record_msg = row.find('p', class_='record_msg')
                                 if record_msg:
                                     team_data['stats'] = record_msg.get_text(strip=True)
-                                    logger.info(f'统计数据: {team_data["stats"]}')
+                                    logger.info('统计数据: %s', team_data["stats"])
                                     continue
                                 # 如果没找到，尝试获取td内的所有文本
                                 td_text = tds[0].get_text(strip=True)
                                 if td_text:
-                                    logger.info(f'发现colspan行，文本内容: {td_text}')
+                                    row_logger.info('发现colspan行，文本内容: %s', td_text)
                                     # 检查是否包含统计关键字
                                     if '近10场' in td_text or '胜率' in td_text or '赢盘率' in td_text:
                                         team_data['stats'] = td_text
-                                        logger.info(f'从td文本提取统计数据: {team_data["stats"]}')
+                                        logger.info('从td文本提取统计数据: %s', team_data["stats"])
                                         continue
                         
                         tds = row.find_all('td')
-                        logger.info(f'行有 {len(tds)} 个td')
+                        row_logger.info('行有 %s 个td', len(tds))
                         
                         # 确保有足够的td（至少8个）
                         if len(tds) < 8:
-                            logger.warning(f'行td不足8个，跳过，当前td数量：{len(tds)}')
+                            row_logger.warning('行td不足8个，跳过，当前td数量：%s', len(tds))
                             continue
                         
                         match_record = {
@@ -1515,18 +1840,18 @@ class OddsScraper:
                             match_record['event'] = event_link.get_text(strip=True)
                         else:
                             match_record['event'] = event_td.get_text(strip=True)
-                        logger.info(f'赛事: {match_record["event"]}')
+                        row_logger.info('赛事: %s', match_record["event"])
                         
                         # 2. 提取比赛日期
                         match_record['date'] = tds[1].get_text(strip=True)
-                        logger.info(f'日期: {match_record["date"]}')
+                        row_logger.info('日期: %s', match_record["date"])
                         
                         # 3. 提取对阵信息 - 优化：更可靠的方式
                         match_td = tds[2]
                         
                         # 直接获取对阵信息的所有文本内容，然后进行解析
                         match_text = match_td.get_text(strip=True)
-                        logger.info(f'对阵原始文本: {match_text}')
+                        row_logger.info('对阵原始文本: %s', match_text)
                         
                         # 尝试从a标签中提取信息
                         a_tag = match_td.find('a')
@@ -1554,18 +1879,18 @@ class OddsScraper:
                                 match_record['match_info']['away_team'] = remove_rank(dz_r.get_text(strip=True))
                                 if score_em:
                                     match_record['match_info']['score'] = score_em.get_text(strip=True)
-                                logger.info(f'对阵信息: {match_record["match_info"]["home_team"]} {match_record["match_info"]["score"]} {match_record["match_info"]["away_team"]}')
+                                row_logger.info('对阵信息: %s %s %s', match_record["match_info"]["home_team"], match_record["match_info"]["score"], match_record["match_info"]["away_team"])
                         
                         # 如果上述方法失败，尝试直接解析文本
                         if not match_record['match_info']['home_team']:
-                            logger.info(f'尝试直接解析对阵文本: {match_text}')
+                            row_logger.info('尝试直接解析对阵文本: %s', match_text)
                             # 查找比分分隔符
                             score_sep_index = match_text.find(':')
                             if score_sep_index != -1:
                                 # 尝试找到主队和客队
                                 # 简单处理：比分前为主队，比分为主客队之间的部分，比分后为客队
                                 # 但这种方法可能不准确，需要根据实际情况调整
-                                logger.warning(f'无法准确解析对阵信息，比分分隔符位置: {score_sep_index}')
+                                row_logger.warning('无法准确解析对阵信息，比分分隔符位置: %s', score_sep_index)
                         
                         # 4. 提取盘口
                         match_record['handicap'] = tds[3].get_text(strip=True)
@@ -1585,7 +1910,7 @@ class OddsScraper:
                         # 只有当至少有部分数据时，才添加到列表中
                         if match_record['event'] or match_record['date'] or match_record['match_info']['home_team']:
                             team_data['matches'].append(match_record)
-                            logger.info(f'添加比赛记录: {match_record["match_info"]["home_team"]} {match_record["match_info"]["score"]} {match_record["match_info"]["away_team"]}')
+                            row_logger.info('添加比赛记录: %s %s %s', match_record["match_info"]["home_team"], match_record["match_info"]["score"], match_record["match_info"]["away_team"])
                 
                 # 如果没有在表格中找到统计数据，尝试在div中查找
                 if not team_data['stats']:
@@ -1593,29 +1918,29 @@ class OddsScraper:
                     record_msg = team_div.find('p', class_='record_msg')
                     if record_msg:
                         team_data['stats'] = record_msg.get_text(strip=True)
-                        logger.info(f'从div中提取统计数据: {team_data["stats"]}')
+                        logger.info('从div中提取统计数据: %s', team_data["stats"])
                     else:
                         # 尝试查找bottom_info
                         bottom_info = team_div.find('div', class_='bottom_info')
                         if bottom_info:
-                            logger.info(f'找到bottom_info: {bottom_info}')
+                            logger.info('找到bottom_info: %s', bottom_info)
                             # 查找bottom_info中的p标签
                             bottom_p = bottom_info.find('p')
                             if bottom_p:
                                 bottom_text = bottom_p.get_text(strip=True)
-                                logger.info(f'bottom_info p标签内容: {bottom_text}')
+                                logger.info('bottom_info p标签内容: %s', bottom_text)
                                 # 检查是否包含统计关键字
                                 if '近' in bottom_text and ('胜' in bottom_text or '平' in bottom_text or '负' in bottom_text):
                                     team_data['stats'] = bottom_text
-                                    logger.info(f'从bottom_info提取统计数据: {team_data["stats"]}')
+                                    logger.info('从bottom_info提取统计数据: %s', team_data["stats"])
                 
                 # 添加球队数据
                 recent_records_data.append(team_data)
             
-            logger.info(f'总共提取到 {len(recent_records_data)} 支球队的近期战绩')
+            logger.info('总共提取到 %s 支球队的近期战绩', len(recent_records_data))
             return recent_records_data
         except Exception as e:
-            logger.error(f'解析近期战绩数据失败: {e}, URL: {url}')
+            logger.error('解析近期战绩数据失败: %s, URL: %s', e, url)
             # 保存错误信息到文件
             with open(f"recent_records_error_{match_id}.txt", "w", encoding="utf-8") as f:
                 f.write(f"Error: {e}\nTraceback: {traceback.format_exc()}")
@@ -1626,15 +1951,15 @@ class OddsScraper:
         """
         获取两队区分主客场的近期战绩数据
         """
-        url = f'{BASE_URL["ODDS_BASE"]}shuju-{match_id}.shtml'
-        res = MatchScraper.make_request_with_retries(url)
-        
-        if not res:
-            logger.error(f'请求失败: {url}')
-            return None
-        
+        return OddsScraper._shuju_data(match_id, "home_away_records", OddsScraper._parse_home_away_records)
+
+    @staticmethod
+    def _parse_home_away_records(page, url, match_id):
+        """
+        解析shuju页面中的两队区分主客场的近期战绩数据
+        """
         try:
-            soup = BeautifulSoup(res.text, 'lxml')
+            soup = page.soup('lxml')
             
             # 寻找主客场近期战绩部分 - 使用ID选择器
             home_away_records = []
@@ -1655,13 +1980,13 @@ class OddsScraper:
                 team_name_strong = team_zhanji2_1.find('strong', class_='team_name')
                 if team_name_strong:
                     home_team_data['name'] = team_name_strong.get_text(strip=True)
-                    logger.info(f'主队名称: {home_team_data["name"]}')
+                    logger.info('主队名称: %s', home_team_data["name"])
                 
                 # 提取当前显示的是主场还是客场
                 current_type_em = team_zhanji2_1.find('em', id='home_zj2_1')
                 if current_type_em:
                     home_team_data['current_type'] = 'home' if '主场' in current_type_em.get_text() else 'away'
-                    logger.info(f'主队当前显示类型: {home_team_data["current_type"]}')
+                    logger.info('主队当前显示类型: %s', home_team_data["current_type"])
                 
                 # 提取比赛记录表格
                 team_table = team_zhanji2_1.find('table', class_='pub_table')
@@ -1672,7 +1997,7 @@ class OddsScraper:
                     else:
                         rows = team_table.find_all('tr')
                     
-                    logger.info(f'主队找到 {len(rows)} 行比赛记录')
+                    logger.info('主队找到 %s 行比赛记录', len(rows))
                     
                     if len(rows) > 1:
                         # 解析每一行数据（跳过标题行，从第二行开始）
@@ -1763,7 +2088,7 @@ class OddsScraper:
                             bottom_text = bottom_p.get_text(strip=True)
                             if '近' in bottom_text and ('胜' in bottom_text or '平' in bottom_text or '负' in bottom_text):
                                 home_team_data['stats'] = bottom_text
-                                logger.info(f'主队统计数据: {home_team_data["stats"]}')
+                                logger.info('主队统计数据: %s', home_team_data["stats"])
                 
                 home_away_records.append(home_team_data)
             
@@ -1783,13 +2108,13 @@ class OddsScraper:
                 team_name_strong = team_zhanji2_0.find('strong', class_='team_name')
                 if team_name_strong:
                     away_team_data['name'] = team_name_strong.get_text(strip=True)
-                    logger.info(f'客队名称: {away_team_data["name"]}')
+                    logger.info('客队名称: %s', away_team_data["name"])
                 
                 # 提取当前显示的是主场还是客场
                 current_type_em = team_zhanji2_0.find('em', id='home_zj2_0')
                 if current_type_em:
                     away_team_data['current_type'] = 'home' if '主场' in current_type_em.get_text() else 'away'
-                    logger.info(f'客队当前显示类型: {away_team_data["current_type"]}')
+                    logger.info('客队当前显示类型: %s', away_team_data["current_type"])
                 
                 # 提取比赛记录表格
                 team_table = team_zhanji2_0.find('table', class_='pub_table')
@@ -1800,7 +2125,7 @@ class OddsScraper:
                     else:
                         rows = team_table.find_all('tr')
                     
-                    logger.info(f'客队找到 {len(rows)} 行比赛记录')
+                    logger.info('客队找到 %s 行比赛记录', len(rows))
                     
                     if len(rows) > 1:
                         # 解析每一行数据（跳过标题行，从第二行开始）
@@ -1891,15 +2216,20 @@ class OddsScraper:
                             bottom_text = bottom_p.get_text(strip=True)
                             if '近' in bottom_text and ('胜' in bottom_text or '平' in bottom_text or '负' in bottom_text):
                                 away_team_data['stats'] = bottom_text
-                                logger.info(f'客队统计数据: {away_team_data["stats"]}')
+                                logger.info('客队统计数据: %s', away_team_data["stats"])
                 
                 home_away_records.append(away_team_data)
             
-            logger.info(f'总共提取到 {len(home_away_records)} 支球队的主客场战绩')
+            logger.info('总共提取到 %s 支球队的主客场战绩', len(home_away_records))
             return home_away_records
         except Exception as e:
-            logger.error(f'解析主客场战绩数据失败: {e}, URL: {url}')
+            logger.error('解析主客场战绩数据失败: %s, URL: %s', e, url)
             # 保存错误信息到文件
             with open(f"home_away_records_error_{match_id}.txt", "w", encoding="utf-8") as f:
                 f.write(f"Error: {e}\nTraceback: {traceback.format_exc()}")
             return None
+
+
+# 记录各抓取方法的耗时和调用结果
+instrument_fetchers(MatchScraper, skip=("fetch_page",))
+instrument_fetchers(OddsScraper)
@@ -1,6 +1,52 @@
 // Match_data.js - 处理比赛平均数据的前端逻辑
 
 const matchDataModule = {
+    // 当前弹窗的聚合数据请求，各部分数据共用这一次请求
+    currentBundle: null,
+
+    /**
+     * 请求比赛聚合数据，打开弹窗时调用一次，之后各部分的获取函数直接复用
+     * @param {string} matchId - 比赛ID
+     * @param {string} sid - 赛事ID（可选）
+     * @returns {Promise<Object|null>} 聚合数据对象
+     */
+    loadMatchBundle(matchId, sid) {
+        const query = sid ? `?sid=${encodeURIComponent(sid)}` : '';
+        const promise = fetch(`/api/match/${matchId}/bundle${query}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .catch(error => {
+                console.error('获取比赛聚合数据失败:', error);
+                return null;
+            });
+        this.currentBundle = { matchId: String(matchId), sid: sid ? String(sid) : '', promise };
+        return promise;
+    },
+
+    /**
+     * 从聚合数据中取出某一部分
+     * @param {string} section - 数据部分名称
+     * @param {string} matchId - 比赛ID
+     * @param {string} sid - 赛事ID（仅积分榜和联赛平均数据需要）
+     * @returns {Promise<*>} 该部分数据；聚合数据不可用时返回undefined，由调用方回退到单独接口
+     */
+    async getBundleSection(section, matchId, sid) {
+        const current = this.currentBundle;
+        if (!current) return undefined;
+        if (sid ? current.sid !== String(sid) : current.matchId !== String(matchId)) {
+            return undefined;
+        }
+        const bundle = await current.promise;
+        if (!bundle || !(section in bundle) || (bundle.errors && bundle.errors[section])) {
+            return undefined;
+        }
+        return bundle[section];
+    },
+
     /**
      * 获取平均数据
      * @param {string} matchId - 比赛ID
@@ -8,6 +54,10 @@ const matchDataModule = {
      */
     async fetchAverageData(matchId) {
         try {
+            const bundled = await this.getBundleSection('average', matchId);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const response = await fetch(`/api/odds/average/${matchId}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -27,6 +77,10 @@ const matchDataModule = {
      */
     async fetchHeadToHeadData(matchId) {
         try {
+            const bundled = await this.getBundleSection('head_to_head', matchId);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const response = await fetch(`/api/odds/head-to-head/${matchId}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -46,6 +100,10 @@ const matchDataModule = {
      */
     async fetchRecentRecords(matchId) {
         try {
+            const bundled = await this.getBundleSection('recent_records', matchId);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const response = await fetch(`/api/odds/recent-records/${matchId}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -65,6 +123,10 @@ const matchDataModule = {
      */
     async fetchHomeAwayRecords(matchId) {
         try {
+            const bundled = await this.getBundleSection('home_away_records', matchId);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const response = await fetch(`/api/odds/home-away-records/${matchId}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -84,6 +146,10 @@ const matchDataModule = {
      */
     async fetchStandingsData(sid) {
         try {
+            const bundled = await this.getBundleSection('standings', null, sid);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const response = await fetch(`/api/standings/${sid}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -103,6 +169,10 @@ const matchDataModule = {
      */
     async fetchLeagueAverageData(sid) {
         try {
+            const bundled = await this.getBundleSection('league_average', null, sid);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const response = await fetch(`/api/league-average/${sid}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -1168,6 +1238,10 @@ const matchDataModule = {
      */
     async fetchMatchProcessData(matchId) {
         try {
+            const bundled = await this.getBundleSection('match_process', matchId);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const url = `/api/match-process/${matchId}`;
             console.log(`请求比赛进程数据: ${url}`);
             const response = await fetch(url);
@@ -1190,6 +1264,10 @@ const matchDataModule = {
      */
     async fetchPlayersData(matchId) {
         try {
+            const bundled = await this.getBundleSection('players', matchId);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const url = `/api/players/${matchId}`;
             console.log(`请求球员名单数据: ${url}`);
             const response = await fetch(url);
@@ -1310,6 +1388,10 @@ const matchDataModule = {
      */
     async fetchTechStatsData(matchId) {
         try {
+            const bundled = await this.getBundleSection('tech_stats', matchId);
+            if (bundled !== undefined) {
+                return bundled;
+            }
             const url = `/api/tech-stats/${matchId}`;
             console.log(`请求技术统计数据: ${url}`);
             const response = await fetch(url);
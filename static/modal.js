@@ -1180,6 +1180,11 @@ const modalModule = {
             ...matchInfo
         };
         
+        // 一次请求获取弹窗所需的全部数据，各部分的获取函数会复用这次请求
+        if (window.matchDataModule) {
+            matchDataModule.loadMatchBundle(matchId, sid);
+        }
+        
         try {
             // 更新模态框标题为对阵双方
             if (matchInfo.homeTeam && matchInfo.awayTeam) {
@@ -10,6 +10,22 @@ const oddsDataModule = {
      */
     async fetchAllOddsData(matchId) {
         try {
+            // 优先使用弹窗已经请求的聚合数据
+            if (typeof window !== 'undefined' && window.matchDataModule) {
+                const bundled = await window.matchDataModule.getBundleSection('oupei', matchId);
+                if (bundled !== undefined) {
+                    const bundle = await window.matchDataModule.currentBundle.promise;
+                    return {
+                        id: bundle.id,
+                        name: bundle.name,
+                        oupei: bundle.oupei,
+                        yapan: bundle.yapan,
+                        daxiao: bundle.daxiao,
+                        errors: bundle.errors
+                    };
+                }
+            }
+            
             // 使用后端代理接口避免跨域问题
             const response = await fetch(`/api/odds/${matchId}`);
             
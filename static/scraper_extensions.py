@@ -4,13 +4,14 @@
 import re
 import traceback
 
-from bs4 import BeautifulSoup
-
 from scraper import MatchScraper
-from logger import get_logger
+from logger import get_logger, get_sampled_logger
+from metrics import instrument_fetchers
 
 # 创建日志记录器
 logger = get_logger("standings_scraper")
+# 逐行解析的日志采样输出
+row_logger = get_sampled_logger("standings_scraper")
 
 
 class StandingsScraper:
@@ -25,19 +26,18 @@ class StandingsScraper:
         url = f"https://liansai.500.com/zuqiu-{sid}/"
         
         try:
-            # 使用MatchScraper的重试机制和会话池
-            response = MatchScraper.make_request_with_retries(url)
+            # 使用MatchScraper的重试机制、会话池和页面缓存
+            page = MatchScraper.fetch_page(url)
             
-            if not response:
-                logger.error(f"获取积分榜数据失败: 响应为空, URL: {url}")
+            if not page:
+                logger.error("获取积分榜数据失败: 响应为空, URL: %s", url)
                 return {
                     "title": "联赛积分榜",
                     "teams": []
                 }
             
-            # 设置正确的编码
-            response.encoding = 'gb2312'
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # 使用正确的编码解析页面
+            soup = page.soup('html.parser', encoding='gb2312')
             
             # 初始化返回数据
             standings_data = {
@@ -48,7 +48,7 @@ class StandingsScraper:
             # 查找积分榜表格 - 使用正确的类名
             standings_table = soup.find('table', class_='lstable1')
             if not standings_table:
-                logger.warning(f"未找到积分榜表格, URL: {url}")
+                logger.warning("未找到积分榜表格, URL: %s", url)
                 return standings_data
             
             # 查找表格标题
@@ -58,7 +58,7 @@ class StandingsScraper:
             
             # 解析表格数据 - 直接查找tr元素，不需要tbody
             rows = standings_table.find_all('tr')
-            logger.info(f"找到 {len(rows)} 个行, URL: {url}")
+            logger.info("找到 %s 个行, URL: %s", len(rows), url)
             
             # 跳过表头行，直接处理数据行
             for idx, row in enumerate(rows):
@@ -80,15 +80,15 @@ class StandingsScraper:
                             "points": cols[6].text.strip()
                         }
                         standings_data['teams'].append(team_data)
-                        logger.debug(f"成功解析第 {idx+1} 行球队数据: {team_data['name']}")
+                        row_logger.debug("成功解析第 %s 行球队数据: %s", idx+1, team_data['name'])
                 except Exception as e:
-                    logger.error(f"解析第 {idx+1} 行数据失败: {e}, URL: {url}")
+                    logger.error("解析第 %s 行数据失败: %s, URL: %s", idx+1, e, url)
                     continue
             
-            logger.info(f"成功解析 {len(standings_data['teams'])} 支球队的积分榜数据, URL: {url}")
+            logger.info("成功解析 %s 支球队的积分榜数据, URL: %s", len(standings_data['teams']), url)
             return standings_data
         except Exception as e:
-            logger.error(f"爬取积分榜数据失败: {e}, URL: {url}")
+            logger.error("爬取积分榜数据失败: %s, URL: %s", e, url)
             logger.debug(traceback.format_exc())
             return {
                 "title": "联赛积分榜",
@@ -106,19 +106,18 @@ class StandingsScraper:
         url = f"https://liansai.500.com/zuqiu-{sid}/"
         
         try:
-            # 使用MatchScraper的重试机制和会话池
-            response = MatchScraper.make_request_with_retries(url)
+            # 使用MatchScraper的重试机制、会话池和页面缓存
+            page = MatchScraper.fetch_page(url)
             
-            if not response:
-                logger.error(f"获取联赛平均数据失败: 响应为空, URL: {url}")
+            if not page:
+                logger.error("获取联赛平均数据失败: 响应为空, URL: %s", url)
                 return {
                     "homeGoals": "0",
                     "awayGoals": "0"
                 }
             
-            # 设置正确的编码
-            response.encoding = 'gb2312'
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # 使用正确的编码解析页面
+            soup = page.soup('html.parser', encoding='gb2312')
             
             # 初始化返回数据
             league_average_data = {
@@ -129,7 +128,7 @@ class StandingsScraper:
             # 查找联赛平均数据表格
             stats_table = soup.find('table', class_='lchart')
             if not stats_table:
-                logger.warning(f"未找到联赛平均数据表格, URL: {url}")
+                logger.warning("未找到联赛平均数据表格, URL: %s", url)
                 return league_average_data
             
             # 查找数据行
@@ -141,7 +140,7 @@ class StandingsScraper:
                     cells = data_row.find_all('td')
                     if len(cells) >= 2:
                         avg_text = cells[1].get_text(strip=True)
-                        logger.debug(f"平均数据文本: {avg_text}, URL: {url}")
+                        logger.debug("平均数据文本: %s, URL: %s", avg_text, url)
                         
                         # 使用正则表达式提取数据
                         # 更宽松的提取方式，匹配一位或两位小数
@@ -153,15 +152,19 @@ class StandingsScraper:
                         if away_goals_match:
                             league_average_data['awayGoals'] = away_goals_match.group(1)
                 except Exception as e:
-                    logger.error(f"解析联赛平均数据失败: {e}, URL: {url}")
+                    logger.error("解析联赛平均数据失败: %s, URL: %s", e, url)
                     logger.debug(traceback.format_exc())
             
-            logger.info(f"成功解析联赛平均数据: 主队场均 {league_average_data['homeGoals']}, 客队场均 {league_average_data['awayGoals']}, URL: {url}")
+            logger.info("成功解析联赛平均数据: 主队场均 %s, 客队场均 %s, URL: %s", league_average_data['homeGoals'], league_average_data['awayGoals'], url)
             return league_average_data
         except Exception as e:
-            logger.error(f"爬取联赛平均数据失败: {e}, URL: {url}")
+            logger.error("爬取联赛平均数据失败: %s, URL: %s", e, url)
             logger.debug(traceback.format_exc())
             return {
                 "homeGoals": "0",
                 "awayGoals": "0"
-            }
\ No newline at end of file
+            }
+
+
+# 记录各抓取方法的耗时和调用结果
+instrument_fetchers(StandingsScraper)
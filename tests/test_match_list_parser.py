@@ -0,0 +1,49 @@
+# 比赛列表解析测试
+# 逐行流式解析的MatchScraper.parse_match_list与旧版BeautifulSoup解析器
+# （benchmarks/legacy_list_parser.py）对直播、历史和未来比赛页面的输出应完全一致
+
+import pytest
+
+from benchmarks.fixtures import history_list_page, live_list_page
+from benchmarks.legacy_list_parser import (legacy_parse_jc_fid_map,
+                                           legacy_parse_match_list)
+from scraper import MatchScraper
+
+ROWS = 120
+
+
+def _html(page):
+    return page.decode("gbk")
+
+
+def test_jc_fid_map_matches_legacy_parser():
+    html = _html(live_list_page(ROWS))
+
+    jc_fid_map = MatchScraper.parse_jc_fid_map(html)
+
+    assert jc_fid_map
+    assert jc_fid_map == legacy_parse_jc_fid_map(html)
+
+
+@pytest.mark.parametrize(
+    "page, date, is_future_match",
+    [
+        pytest.param(live_list_page(ROWS), None, False, id="live"),
+        pytest.param(history_list_page(ROWS), "2026-10-16", False, id="history"),
+        pytest.param(live_list_page(ROWS, seed=7), "2026-10-18", True, id="future"),
+    ],
+)
+def test_parse_match_list_matches_legacy_parser(page, date, is_future_match):
+    html = _html(page)
+    jc_fid_map = legacy_parse_jc_fid_map(html)
+
+    matches = MatchScraper.parse_match_list(html, date, is_future_match, jc_fid_map)
+
+    assert len(matches) == ROWS
+    assert matches == legacy_parse_match_list(html, date, is_future_match, jc_fid_map)
+
+
+def test_iter_match_list_yields_same_rows_as_parse_match_list():
+    html = _html(history_list_page(ROWS))
+
+    assert list(MatchScraper.iter_match_list(html, "2026-10-16")) == MatchScraper.parse_match_list(html, "2026-10-16")
@@ -0,0 +1,138 @@
+# 请求合并测试
+# 用计数的慢速上游替换MatchScraper._request_with_retries，验证并发的比赛详情请求只访问一次上游
+
+import threading
+import time
+
+import pytest
+import requests
+
+from cache import SingleFlight, match_details_flight, page_cache
+from scraper import MatchScraper
+
+FID = "1100001"
+DETAIL_URL = f"https://live.500.com/detail.php?fid={FID}"
+DETAIL_HTML = "<html><body><div class='box_side'></div></body></html>".encode("gbk")
+CONCURRENCY = 8
+
+
+class FakeUpstream:
+    """
+    计数的慢速上游，每次调用等待delay秒后返回detail.php的响应，ok为False时返回None（请求失败）
+    """
+
+    def __init__(self, delay=0.2, ok=True):
+        self.delay = delay
+        self.ok = ok
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, headers=None, retries=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if not self.ok:
+            return None
+        response = requests.Response()
+        response._content = DETAIL_HTML
+        response.status_code = 200
+        response.encoding = "gbk"
+        response.url = url
+        return response
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    page_cache.clear()
+    match_details_flight.forget(FID)
+    yield
+    page_cache.clear()
+    match_details_flight.forget(FID)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(MatchScraper, "_request_with_retries", staticmethod(fake))
+    return fake
+
+
+def _run_concurrently(fn, n=CONCURRENCY):
+    """
+    n个线程同时调用fn，返回(结果列表, 异常列表)
+    """
+    barrier = threading.Barrier(n)
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = fn()
+        except BaseException as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results, errors
+
+
+def test_concurrent_fetch_match_details_calls_upstream_once(upstream):
+    results, errors = _run_concurrently(lambda: MatchScraper.fetch_match_details(FID))
+
+    assert errors == [None] * CONCURRENCY
+    assert upstream.calls == 1
+    assert results[0] is not None
+    assert all(result is results[0] for result in results)
+
+
+def test_fetch_after_memo_window_calls_upstream_again(upstream, monkeypatch):
+    monkeypatch.setattr(match_details_flight, "memo_seconds", 0.05)
+
+    first = MatchScraper.fetch_match_details(FID)
+    assert MatchScraper.fetch_match_details(FID) is first
+    assert upstream.calls == 1
+
+    # 复用时间和页面缓存都过期后重新下载
+    time.sleep(0.1)
+    page_cache.invalidate(DETAIL_URL)
+    second = MatchScraper.fetch_match_details(FID)
+    assert upstream.calls == 2
+    assert second is not first
+
+
+def test_none_result_is_not_memoized(upstream):
+    upstream.ok = False
+
+    results, _ = _run_concurrently(lambda: MatchScraper.fetch_match_details(FID))
+    assert results == [None] * CONCURRENCY
+    assert upstream.calls == 1
+
+    # 失败的结果不复用，下一次调用立即重试
+    upstream.ok = True
+    assert MatchScraper.fetch_match_details(FID) is not None
+    assert upstream.calls == 2
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight(memo_seconds=3)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("上游解析失败")
+
+    _, errors = _run_concurrently(lambda: flight.do("key", failing))
+
+    assert len(calls) == 1
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert len({id(error) for error in errors}) == 1
+
+    # 异常不复用，下一次调用重新执行
+    with pytest.raises(RuntimeError):
+        flight.do("key", failing)
+    assert len(calls) == 2
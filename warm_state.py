@@ -0,0 +1,196 @@
+# 启动快照模块
+# 阿里云函数计算、Vercel等按需启动的部署中，新实例的页面缓存、竞彩标识映射和直播比分快照都是空的，
+# 第一个请求需要等待上游页面下载和解析。本模块定期把这些状态写入本地文件（/tmp），
+# 实例被回收后在同一台机器上重新初始化时恢复，首个请求可以直接命中缓存，或者用保存的ETag向上游确认页面未变化。
+# 页面的解析结果（登记为可预先序列化的纯JSON数据）一起保存，恢复后不需要重新解析页面。
+#
+# 快照只是缓存，内容过期、文件损坏或写入失败时忽略即可，不影响正常请求
+
+import base64
+import json
+import os
+import threading
+import time
+
+from cache import CachedPage, jc_fid_map_cache, page_cache
+from config import (WARM_STATE_LIVE_MAX_AGE, WARM_STATE_MAX_AGE,
+                    WARM_STATE_MAX_PAGES, WARM_STATE_PATH,
+                    WARM_STATE_SAVE_INTERVAL)
+from fanout import submit
+from live_feed import live_feed
+from logger import get_logger
+from pool import session_pools
+
+# 创建日志记录器
+logger = get_logger("warm_state")
+
+# 快照格式版本，格式变化后旧文件不再恢复
+SNAPSHOT_VERSION = 1
+
+
+class WarmState:
+    """
+    启动快照的保存和恢复
+    """
+
+    def __init__(self, path=WARM_STATE_PATH, max_pages=WARM_STATE_MAX_PAGES,
+                 save_interval=WARM_STATE_SAVE_INTERVAL, max_age=WARM_STATE_MAX_AGE,
+                 live_max_age=WARM_STATE_LIVE_MAX_AGE):
+        self.path = path
+        self.max_pages = max_pages
+        self.save_interval = save_interval
+        self.max_age = max_age
+        self.live_max_age = live_max_age
+        self._saving = threading.Lock()
+        self._last_save = None  # 最近一次安排保存的时间（monotonic）
+        self.saves = 0
+        self.save_errors = 0
+        self.last_save_seconds = None
+        self.restored_pages = 0
+        self.restored_live = False
+        self.restore_seconds = None
+
+    def snapshot(self):
+        """
+        收集需要保存的状态
+        """
+        pages = [
+            {
+                "url": url,
+                "content": base64.b64encode(page.content).decode("ascii"),
+                "status_code": page.status_code,
+                "headers": dict(page.headers),
+                "encoding": page.encoding,
+                "remaining": remaining,
+                "derived": page.export_derived(),
+            }
+            for url, page, remaining in page_cache.export(self.max_pages)
+        ]
+        jc_fid_map = [
+            {"key": key, "value": value, "remaining": remaining}
+            for key, value, remaining in jc_fid_map_cache.export()
+        ]
+        live = None
+        if live_feed.updated_at is not None:
+            live = {"matches": live_feed.matches(), "updated_at": live_feed.updated_at}
+        return {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "pages": pages,
+            "jc_fid_map": jc_fid_map,
+            "live": live,
+            "sessions": session_pools.export_settings(),
+        }
+
+    def save(self):
+        """
+        写入快照文件，先写临时文件再替换，实例在写入过程中被冻结也不会留下不完整的文件
+
+        :return: 是否已保存，已有保存在进行时直接返回False
+        """
+        if not self.path or not self._saving.acquire(blocking=False):
+            return False
+        start = time.perf_counter()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            data = json.dumps(self.snapshot(), ensure_ascii=False, separators=(",", ":"))
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+            self.saves += 1
+            self.last_save_seconds = time.perf_counter() - start
+            logger.debug("启动快照已保存: %s，%s 字节，耗时 %.1fms", self.path, len(data), self.last_save_seconds * 1000)
+            return True
+        except Exception as e:
+            self.save_errors += 1
+            logger.warning("保存启动快照失败: %s", e)
+            return False
+        finally:
+            self._saving.release()
+
+    def maybe_save(self):
+        """
+        距离上次保存超过save_interval时在后台保存快照，由请求结束时调用
+        """
+        if not self.path:
+            return
+        now = time.monotonic()
+        if self._last_save is not None and now - self._last_save < self.save_interval:
+            return
+        self._last_save = now
+        submit(self.save)
+
+    def restore(self):
+        """
+        从快照文件恢复状态，应用初始化时调用
+
+        :return: 是否已恢复
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        start = time.perf_counter()
+        # 刚恢复的状态不需要马上再写回
+        self._last_save = time.monotonic()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                logger.info("启动快照版本不一致，忽略: %s", self.path)
+                return False
+            age = time.time() - snapshot["saved_at"]
+            if age > self.max_age:
+                logger.info("启动快照已保存 %.0f 秒，超过有效期，忽略", age)
+                return False
+
+            # 剩余有效时间扣除快照保存后经过的时间，已过期的页面仍可用于条件请求
+            for entry in snapshot["pages"]:
+                page = CachedPage(
+                    entry["url"],
+                    base64.b64decode(entry["content"]),
+                    entry["status_code"],
+                    entry["headers"],
+                    entry["encoding"],
+                )
+                page.restore_derived(entry["derived"])
+                page_cache.restore(entry["url"], page, entry["remaining"] - age)
+            for entry in snapshot["jc_fid_map"]:
+                jc_fid_map_cache.restore(entry["key"], entry["value"], entry["remaining"] - age)
+
+            live = snapshot.get("live")
+            if live and time.time() - live["updated_at"] <= self.live_max_age:
+                self.restored_live = live_feed.restore(live["matches"], live["updated_at"])
+
+            session_pools.seed(snapshot.get("sessions") or {})
+        except Exception as e:
+            logger.warning("恢复启动快照失败: %s", e)
+            return False
+
+        self.restored_pages = len(snapshot["pages"])
+        self.restore_seconds = time.perf_counter() - start
+        logger.info(
+            "已恢复启动快照: %s 个页面，直播比分%s，快照保存于 %.0f 秒前，耗时 %.1fms",
+            self.restored_pages, "已恢复" if self.restored_live else "未恢复", age, self.restore_seconds * 1000,
+        )
+        return True
+
+    def stats(self):
+        """
+        获取启动快照的统计信息
+        """
+        return {
+            "enabled": bool(self.path),
+            "path": self.path,
+            "saves": self.saves,
+            "save_errors": self.save_errors,
+            "last_save_ms": round(self.last_save_seconds * 1000, 2) if self.last_save_seconds is not None else None,
+            "restored_pages": self.restored_pages,
+            "restored_live": self.restored_live,
+            "restore_ms": round(self.restore_seconds * 1000, 2) if self.restore_seconds is not None else None,
+        }
+
+
+# 全局启动快照
+warm_state = WarmState()